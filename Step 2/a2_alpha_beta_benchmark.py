@@ -0,0 +1,99 @@
+"""
+A benchmark comparing Minimax with and without alpha-beta pruning for A2.
+
+Run this file to print, for every matchup of the classes in CHARACTER_CLASSES,
+how many states get_state_score and get_state_score_alpha_beta visit from the
+start of a game, and how many states alpha-beta pruning skipped.
+
+    python a2_alpha_beta_benchmark.py --hp 60
+
+The transposition table is not used, so the node counts only reflect pruning.
+"""
+import argparse
+import time
+from a2_game import CHARACTER_CLASSES
+from a2_battle_queue import BattleQueue
+from a2_playstyle import ManualPlaystyle, SearchStats, get_state_score, \
+    get_state_score_alpha_beta
+
+
+def set_up_matchup(p1_key: str, p2_key: str, hp: int = 100,
+                   battle_queue_class: type = BattleQueue) -> BattleQueue:
+    """
+    Return a BattleQueue of battle_queue_class where the characters for
+    p1_key and p2_key in CHARACTER_CLASSES, named p1 and p2 and using
+    ManualPlaystyles, both start with hp HP.
+
+    >>> from a2_battle_queue import RestrictedBattleQueue
+    >>> set_up_matchup('m', 'r', 30, RestrictedBattleQueue)
+    p1 (Mage): 30/100 -> p2 (Rogue): 30/100
+    """
+    bq = battle_queue_class()
+    p1 = CHARACTER_CLASSES[p1_key]("p1", bq, ManualPlaystyle(bq))
+    p2 = CHARACTER_CLASSES[p2_key]("p2", bq, ManualPlaystyle(bq))
+    p1.enemy = p2
+    p2.enemy = p1
+    p1.set_hp(hp)
+    p2.set_hp(hp)
+    bq.add(p1)
+    bq.add(p2)
+    return bq
+
+
+def benchmark_matchup(p1_key: str, p2_key: str, hp: int) -> dict:
+    """
+    Return the node counts and times of both searches for one matchup.
+    """
+    bq = set_up_matchup(p1_key, p2_key, hp)
+    minimax_stats, alpha_beta_stats = SearchStats(), SearchStats()
+
+    start = time.perf_counter()
+    minimax_score = get_state_score(bq, None, minimax_stats)
+    minimax_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    alpha_beta_score = get_state_score_alpha_beta(bq, None, alpha_beta_stats)
+    alpha_beta_time = time.perf_counter() - start
+
+    if minimax_score != alpha_beta_score:
+        raise AssertionError("Scores differ for {} vs {}: {} != {}".format(
+            p1_key, p2_key, minimax_score, alpha_beta_score))
+
+    return {'score': minimax_score,
+            'minimax_nodes': minimax_stats.nodes,
+            'alpha_beta_nodes': alpha_beta_stats.nodes,
+            'pruned': minimax_stats.nodes - alpha_beta_stats.nodes,
+            'cutoffs': alpha_beta_stats.cutoffs,
+            'minimax_time': minimax_time,
+            'alpha_beta_time': alpha_beta_time}
+
+
+def main() -> None:
+    """
+    Run the benchmark for every matchup and print a table of the results.
+    """
+    parser = argparse.ArgumentParser(
+        description='Compare Minimax with and without alpha-beta pruning.')
+    parser.add_argument('--hp', type=int, default=60,
+                        help='the HP both characters start with')
+    args = parser.parse_args()
+
+    print("{:>5} {:>6} {:>10} {:>10} {:>10} {:>8} {:>9} {:>9}".format(
+        'match', 'score', 'minimax', 'alphabeta', 'pruned', 'cutoffs',
+        'mm (s)', 'ab (s)'))
+
+    for p1_key in CHARACTER_CLASSES:
+        for p2_key in CHARACTER_CLASSES:
+            result = benchmark_matchup(p1_key, p2_key, args.hp)
+            print("{:>5} {:>6} {:>10} {:>10} {:>10} {:>8} {:>9.3f} "
+                  "{:>9.3f}".format('{}v{}'.format(p1_key, p2_key),
+                                    str(result['score']),
+                                    result['minimax_nodes'],
+                                    result['alpha_beta_nodes'],
+                                    result['pruned'], result['cutoffs'],
+                                    result['minimax_time'],
+                                    result['alpha_beta_time']))
+
+
+if __name__ == '__main__':
+    main()
@@ -8,12 +8,57 @@ BattleQueue has been completed for you, and the class header for
 RestrictedBattleQueue has been provided. You must implement
 RestrictedBattleQueue and document it accordingly.
 """
-from typing import Union, List
+from typing import Iterable, Optional, Union, List
+from collections import deque
+from a2_persistent_deque import PersistentDeque
+from a2_zobrist import get_zobrist_key, get_code, get_queue_hash, \
+    push_back, pop_front
+
+# The codes of the entries of a queue, for each player number.
+QUEUE_CODES = [get_code('queue', 0), get_code('queue', 1)]
+
+# The codes of the restriction flags of a RestrictedBattleQueue.
+FLAG_CODES = {'Y': get_code('flag', 'Y'), 'N': get_code('flag', 'N')}
+
+
+# The Zobrist keys of (player number, HP, SP) that have been used.
+_STATS_KEYS = {}
+
+
+def _get_stats_key(player: int, character: 'Character') -> int:
+    """
+    Return the Zobrist key of the HP and SP of character, who has the player
+    number player.
+    """
+    stats = (player, character.get_hp(), character.get_sp())
+    key = _STATS_KEYS.get(stats)
+    if key is None:
+        key = get_zobrist_key('hp', player, stats[1]) ^ \
+            get_zobrist_key('sp', player, stats[2])
+        _STATS_KEYS[stats] = key
+    return key
+
 
 class BattleQueue:
     """
     A class representing a BattleQueue.
+
+    The characters are kept in a deque, so adding to the back and removing
+    from the front take constant time.
+
+    Whether the game is over, and who won, are worked out once and kept
+    until the queue or either character's HP or SP changes.
+
+    Once get_state_hash has been called, a 64-bit hash of the queue is kept
+    up to date as characters are added and removed, rather than worked out
+    again for every lookup. BattleQueues that are never hashed do not pay
+    for keeping it.
+
+    verify_hash - whether get_state_hash checks the hash it has kept against
+                  one worked out from scratch. This is slow, and is meant for
+                  debugging.
     """
+    verify_hash: bool = False
     
     def __init__(self) -> None:
         """
@@ -23,9 +68,19 @@ class BattleQueue:
         >>> bq.is_empty()
         True
         """
-        self._content = []
+        self._content = deque()
         self._p1 = None
         self._p2 = None
+        self._journal = None
+        self._moves = []
+        # (is_over, winner), or None if it has to be worked out again.
+        self._result = None
+        # The hashes of the class and players, of the players' HP and SP and
+        # of the queue. The last two are None until they are needed, and
+        # again whenever they have to be worked out from scratch.
+        self._identity_hash = self._get_identity_hash()
+        self._stats_hash = None
+        self._queue_hash = None
     
     def _clean_queue(self) -> None:
         """
@@ -44,8 +99,82 @@ class BattleQueue:
         >>> bq.is_empty()
         False
         """
-        while self._content and self._content[0].get_available_actions() == []:
-            self._content.pop(0)
+        while self._content and self._front().get_available_actions() == []:
+            character = self._pop_front()
+            if self._journal is not None:
+                self._journal.append(('pop', character))
+
+    def _push_back(self, character: 'Character') -> None:
+        """
+        Add character to the back of the queue.
+        """
+        self._result = None
+        if self._queue_hash is not None:
+            self._queue_hash = push_back(self._queue_hash,
+                                         len(self._content),
+                                         QUEUE_CODES[character is self._p2])
+        self._content.append(character)
+
+    def _pop_front(self) -> 'Character':
+        """
+        Remove and return the character at the front of the queue.
+        """
+        self._result = None
+        character = self._content.popleft()
+        if self._queue_hash is not None:
+            self._queue_hash = pop_front(self._queue_hash,
+                                         QUEUE_CODES[character is self._p2])
+        return character
+
+    def _push_front(self, character: 'Character') -> None:
+        """
+        Add character back to the front of the queue.
+
+        Only unmake_move uses this, and it puts back the hash the queue had
+        before the move, so the hash is not updated here.
+        """
+        self._result = None
+        self._content.appendleft(character)
+
+    def _pop_back(self) -> 'Character':
+        """
+        Remove and return the character at the back of the queue.
+
+        Only unmake_move uses this, and it puts back the hash the queue had
+        before the move, so the hash is not updated here.
+        """
+        self._result = None
+        return self._content.pop()
+
+    def _get_player(self, character: 'Character') -> int:
+        """
+        Return the player number of character: 0 for the first player added
+        and 1 for the other.
+        """
+        return 1 if character is self._p2 else 0
+
+    def _set_players(self, p1: 'Character', p2: 'Character') -> None:
+        """
+        Make p1 and p2 the first and second players of this BattleQueue.
+        """
+        self._p1 = p1
+        self._p2 = p2
+        self._identity_hash = self._get_identity_hash()
+        self._stats_hash = None
+        self._queue_hash = None
+
+    def _front(self) -> 'Character':
+        """
+        Return the character at the front of the queue, which must not be
+        empty.
+        """
+        return self._content[0]
+
+    def _characters(self) -> Iterable['Character']:
+        """
+        Return the characters in the queue, from front to back.
+        """
+        return self._content
     
     def add(self, character: 'Character') -> None:
         """
@@ -62,11 +191,12 @@ class BattleQueue:
         >>> bq.is_empty()
         False
         """
-        self._content.append(character)
-        
         if not self._p1:
-            self._p1 = character
-            self._p2 = character.enemy
+            self._set_players(character, character.enemy)
+
+        self._push_back(character)
+        if self._journal is not None:
+            self._journal.append(('append',))
     
     def remove(self) -> 'Character':
         """
@@ -87,7 +217,10 @@ class BattleQueue:
         """
         self._clean_queue()
         
-        return self._content.pop(0)
+        character = self._pop_front()
+        if self._journal is not None:
+            self._journal.append(('pop', character))
+        return character
     
     def is_empty(self) -> bool:
         """
@@ -100,7 +233,7 @@ class BattleQueue:
         """
         self._clean_queue()
         
-        return self._content == []
+        return not self._content
     
     def peek(self) -> 'Character':
         """
@@ -126,7 +259,7 @@ class BattleQueue:
         self._clean_queue()
         
         if self._content:
-            return self._content[0]
+            return self._front()
 
         return self._p1
     
@@ -155,13 +288,26 @@ class BattleQueue:
         >>> bq.is_over()
         False
         """
-        if self.is_empty():
-            return True
-    
-        if self._p1.get_hp() == 0 or self._p2.get_hp() == 0:
-            return True
-        
-        return False
+        if self._result is None:
+            self._update_result()
+        return self._result[0]
+
+    def _update_result(self) -> None:
+        """
+        Work out whether the game is over and who won, and keep the result
+        until something changes.
+        """
+        over = self.is_empty() or self._p1.get_hp() == 0 or \
+            self._p2.get_hp() == 0
+
+        winner = None
+        if over and self._p1:
+            if self._p1.get_hp() == 0:
+                winner = self._p2
+            elif self._p2.get_hp() == 0:
+                winner = self._p1
+
+        self._result = (over, winner)
     
     def get_winner(self) -> Union['Character', None]:
         """
@@ -178,15 +324,9 @@ class BattleQueue:
         >>> bq.add(c)
         >>> bq.get_winner()
         """
-        if not self.is_over():
-            return None
-        
-        if self._p1.get_hp() == 0:
-            return self._p2
-        elif self._p2.get_hp() == 0:
-            return self._p1
-    
-        return None
+        if self._result is None:
+            self._update_result()
+        return self._result[1]
     
     def copy(self) -> 'BattleQueue':
         """
@@ -221,7 +361,7 @@ class BattleQueue:
         if not new_battle_queue.is_empty():
             new_battle_queue.remove()
         
-        for character in self._content:
+        for character in self._characters():
             if character == self._p1:
                 new_battle_queue.add(p1_copy)
             else:
@@ -229,6 +369,262 @@ class BattleQueue:
         
         return new_battle_queue
     
+    def make_move(self, action: str) -> 'Character':
+        """
+        Remove the character at the front of this BattleQueue and make them
+        perform action in place: 'A' for attack and 'S' for special attack.
+        Any other action (such as 'X') only removes the character.
+
+        Every change the move makes to this BattleQueue and its characters is
+        recorded, so it can be reverted by unmake_move. This lets a search
+        walk the game tree without copying the BattleQueue.
+
+        Return the character that acted.
+
+        >>> bq = BattleQueue()
+        >>> from a2_characters import Rogue, Mage
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> m = Mage("m", bq, ManualPlaystyle(bq))
+        >>> r.enemy = m
+        >>> m.enemy = r
+        >>> bq.add(r)
+        >>> bq.add(m)
+        >>> bq.make_move('S')
+        r (Rogue): 100/90
+        >>> bq
+        m (Mage): 88/100 -> r (Rogue): 100/90 -> r (Rogue): 100/90
+        >>> bq.make_move('A')
+        m (Mage): 88/95
+        >>> bq.unmake_move()
+        >>> bq.unmake_move()
+        >>> bq
+        r (Rogue): 100/100 -> m (Mage): 100/100
+        """
+        if self._journal is None:
+            self._journal = []
+        hashes = None if self._queue_hash is None else self._get_hashes()
+        self._moves.append((len(self._journal), hashes))
+
+        character = self.remove()
+        if action in ['A', 'S']:
+            character.use_skill(action)
+
+        return character
+
+    def unmake_move(self) -> None:
+        """
+        Revert the last move made by make_move that has not been reverted.
+        """
+        mark, hashes = self._moves.pop()
+        journal = self._journal
+        self._journal = None
+
+        while len(journal) > mark:
+            self._undo(journal.pop())
+        if hashes is not None or self._queue_hash is not None:
+            self._set_hashes(hashes)
+
+        if self._moves:
+            self._journal = journal
+
+    def record_change(self, character: 'Character') -> None:
+        """
+        Record character's HP and SP before they are changed, if a move is
+        being made, and forget whether the game is over and the hash of the
+        players' HP and SP.
+        """
+        self._result = None
+        self._stats_hash = None
+        if self._journal is not None:
+            self._journal.append(('stats', character, character.get_hp(),
+                                  character.get_sp()))
+
+    def record_identity_change(self) -> None:
+        """
+        Work out the hash of the players again, after one of them has been
+        changed in a way that their state key shows (such as being given a
+        new SkillDecisionTree).
+        """
+        self._identity_hash = self._get_identity_hash()
+
+    def _undo(self, entry: tuple) -> None:
+        """
+        Revert the change recorded in entry.
+        """
+        if entry[0] == 'pop':
+            self._push_front(entry[1])
+        elif entry[0] == 'append':
+            self._pop_back()
+        elif entry[0] == 'stats':
+            entry[1].set_hp(entry[2])
+            entry[1].set_sp(entry[3])
+
+    def set_content(self, p1: 'Character', p2: 'Character',
+                    order: List[int]) -> None:
+        """
+        Replace the contents of this BattleQueue with p1 and p2 in the order
+        given by order, where 0 stands for p1 and 1 stands for p2.
+
+        >>> bq = BattleQueue()
+        >>> from a2_characters import Rogue, Mage
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> m = Mage("m", bq, ManualPlaystyle(bq))
+        >>> r.enemy = m
+        >>> m.enemy = r
+        >>> bq.set_content(r, m, [1, 0, 0])
+        >>> bq
+        m (Mage): 100/100 -> r (Rogue): 100/100 -> r (Rogue): 100/100
+        """
+        self._set_players(p1, p2)
+        self._content = deque(p2 if player else p1 for player in order)
+        self._queue_hash = None
+        self._result = None
+
+    def get_state_key(self) -> tuple:
+        """
+        Return a hashable key describing the state of the game being carried
+        out in this BattleQueue: both characters' state keys and the order of
+        the queue, where 0 stands for the first player and 1 for the second.
+
+        Two BattleQueues with equal keys have the same score, so the key can
+        be used to cache search results.
+
+        >>> bq = BattleQueue()
+        >>> from a2_characters import Rogue, Mage
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> m = Mage("m", bq, ManualPlaystyle(bq))
+        >>> r.enemy = m
+        >>> m.enemy = r
+        >>> bq.add(r)
+        >>> bq.add(m)
+        >>> bq.add(r)
+        >>> key = bq.get_state_key()
+        >>> key[1]
+        ('rogue', 'r', 100, 100)
+        >>> key[3]
+        (0, 1, 0)
+        >>> bq.copy().get_state_key() == bq.get_state_key()
+        True
+        """
+        if not self._p1:
+            return (self.__class__.__name__,)
+
+        order = tuple(0 if character is self._p1 else 1
+                      for character in self._characters())
+
+        return (self.__class__.__name__, self._p1.get_state_key(),
+                self._p2.get_state_key(), order)
+
+    def get_state_hash(self) -> int:
+        """
+        Return a 64-bit hash of the state that get_state_key describes,
+        without having to build the key.
+
+        The first call works the hash of the queue out from scratch. After
+        that, it is kept up to date as characters are added and removed, and
+        the keys of the players' HP and SP are looked up again only after
+        they change, so later calls take constant time. If verify_hash, check
+        the hash against compute_state_hash, and raise AssertionError if they
+        are different.
+
+        >>> bq = BattleQueue()
+        >>> from a2_characters import Rogue, Mage
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> m = Mage("m", bq, ManualPlaystyle(bq))
+        >>> r.enemy = m
+        >>> m.enemy = r
+        >>> bq.add(r)
+        >>> bq.add(m)
+        >>> bq.verify_hash = True
+        >>> start = bq.get_state_hash()
+        >>> _ = bq.make_move('S')
+        >>> bq.get_state_hash() == start
+        False
+        >>> bq.unmake_move()
+        >>> bq.get_state_hash() == start
+        True
+        >>> bq.copy().get_state_hash() == start
+        True
+        """
+        if self._stats_hash is None:
+            self._stats_hash = self._get_stats_hash()
+        if self._queue_hash is None:
+            self._queue_hash = self._get_queue_hash()
+
+        state_hash = self._get_kept_hash()
+        if self.verify_hash and state_hash != self.compute_state_hash():
+            raise AssertionError('The kept hash of {} is {:x}, but it should '
+                                 'be {:x}'.format(self, state_hash,
+                                                  self.compute_state_hash()))
+        return state_hash
+
+    def _get_hashes(self) -> tuple:
+        """
+        Return the hashes this BattleQueue has kept that a move can change,
+        so that unmake_move can put them back.
+        """
+        return self._queue_hash, self._stats_hash
+
+    def _set_hashes(self, hashes: Optional[tuple]) -> None:
+        """
+        Put back hashes, as returned by _get_hashes, or forget the kept
+        hashes if hashes is None.
+        """
+        if hashes is None:
+            self._queue_hash, self._stats_hash = None, None
+        else:
+            self._queue_hash, self._stats_hash = hashes
+
+    def _get_kept_hash(self) -> int:
+        """
+        Return the hash of this BattleQueue from the hashes it has kept.
+        """
+        return self._identity_hash ^ self._stats_hash ^ self._queue_hash
+
+    def _get_identity_hash(self) -> int:
+        """
+        Return the hash of the class of this BattleQueue and the players'
+        types and names, and of the SkillDecisionTree of any Sorcerer that
+        does not use the default tree.
+        """
+        identity_hash = get_zobrist_key('class', self.__class__.__name__)
+        for player, character in enumerate([self._p1, self._p2]):
+            if character is not None:
+                key = character.get_state_key()
+                identity_hash ^= get_zobrist_key(
+                    'character', player, key[0], key[1],
+                    *[id(extra) for extra in key[4:]])
+        return identity_hash
+
+    def _get_stats_hash(self) -> int:
+        """
+        Return the hash of the players' HP and SP.
+        """
+        stats_hash = 0
+        for player, character in enumerate([self._p1, self._p2]):
+            if character is not None:
+                stats_hash ^= _get_stats_key(player, character)
+        return stats_hash
+
+    def _get_queue_hash(self) -> int:
+        """
+        Return the hash of the order of the queue.
+        """
+        return get_queue_hash([QUEUE_CODES[self._get_player(character)]
+                               for character in self._characters()])
+
+    def compute_state_hash(self) -> int:
+        """
+        Return the hash of the state of this BattleQueue, worked out from
+        scratch rather than from the hashes it has kept.
+        """
+        return self._get_identity_hash() ^ self._get_stats_hash() ^ \
+            self._get_queue_hash()
+
     def __repr__(self) -> str:
         """
         Return a representation of this BattleQueue.
@@ -245,7 +641,8 @@ class BattleQueue:
         >>> bq
         r (Rogue): 100/100 -> r2 (Rogue): 100/100
         """
-        return " -> ".join([repr(character) for character in self._content])
+        return " -> ".join([repr(character)
+                            for character in self._characters()])
 
 
 class RestrictedBattleQueue(BattleQueue):
@@ -286,8 +683,12 @@ class RestrictedBattleQueue(BattleQueue):
 
     def __init__(self):
         super().__init__()
-        self._restriction_lst = []
+        self._restriction_lst = deque()
+        # The hash of the restriction flags, kept like the queue's hash.
+        self._flag_hash = None
         self._seen = {}
+        # The number of times each character is in the queue.
+        self._counts = {}
 
     def add(self, character: 'Character') -> None:
         """
@@ -295,29 +696,81 @@ class RestrictedBattleQueue(BattleQueue):
 
         """
         if not self._p1:
-            self._p1 = character
-            self._p2 = character.enemy
+            self._set_players(character, character.enemy)
 
         if character not in self._seen:
             self._seen[character] = 1
-            self._content.append(character)
-            self._restriction_lst.append("Y")
-        elif self._content and character == self._content[0]:
+            if self._journal is not None:
+                self._journal.append(('seen', character))
+            self._append(character, "Y")
+        elif self._content and character == self._front():
             if self._restriction_lst[0] == "N":
                 return
             else:
-                count = self._content.count(character)
+                count = self._counts.get(character, 0)
                 if count >= 2:
-                    self._content.append(character)
-                    self._restriction_lst.append("N")
+                    self._append(character, "N")
                 else:
-                    self._content.append(character)
-                    self._restriction_lst.append("Y")
+                    self._append(character, "Y")
         else:
             if self._restriction_lst and self._restriction_lst[0] == "N":
                 return
-            self._content.append(character)
-            self._restriction_lst.append("N")
+            self._append(character, "N")
+
+    def _set_players(self, p1: 'Character', p2: 'Character') -> None:
+        """
+        Make p1 and p2 the first and second players of this
+        RestrictedBattleQueue. The hash of the restriction flags is worked
+        out again along with the hash of the queue.
+        """
+        super()._set_players(p1, p2)
+        self._flag_hash = None
+
+    def _append(self, character: 'Character', flag: str) -> None:
+        """
+        Add character to the back of this RestrictedBattleQueue with the
+        restriction flag flag.
+        """
+        self._push_back(character)
+        if self._flag_hash is not None:
+            self._flag_hash = push_back(self._flag_hash,
+                                        len(self._restriction_lst),
+                                        FLAG_CODES[flag])
+        self._restriction_lst.append(flag)
+        if self._journal is not None:
+            self._journal.append(('append',))
+
+    def _push_back(self, character: 'Character') -> None:
+        """
+        Add character to the back of the queue, and count them.
+        """
+        super()._push_back(character)
+        self._counts[character] = self._counts.get(character, 0) + 1
+
+    def _pop_front(self) -> 'Character':
+        """
+        Remove and return the character at the front of the queue, and stop
+        counting them.
+        """
+        character = super()._pop_front()
+        self._counts[character] -= 1
+        return character
+
+    def _push_front(self, character: 'Character') -> None:
+        """
+        Add character back to the front of the queue, and count them.
+        """
+        super()._push_front(character)
+        self._counts[character] = self._counts.get(character, 0) + 1
+
+    def _pop_back(self) -> 'Character':
+        """
+        Remove and return the character at the back of the queue, and stop
+        counting them.
+        """
+        character = super()._pop_back()
+        self._counts[character] -= 1
+        return character
 
     def remove(self) -> 'Character':
         """
@@ -325,12 +778,157 @@ class RestrictedBattleQueue(BattleQueue):
 
         """
         self._clean_queue()
-        self._restriction_lst.pop(0)
-        return self._content.pop(0)
+        flag = self._restriction_lst.popleft()
+        if self._flag_hash is not None:
+            self._flag_hash = pop_front(self._flag_hash, FLAG_CODES[flag])
+        character = self._pop_front()
+        if self._journal is not None:
+            self._journal.append(('pop', character, flag))
+        return character
 
     def clear_seen(self):
         self._seen.clear()
 
+    def set_content(self, p1: 'Character', p2: 'Character',
+                    order: List[int], flags: List[str] = None,
+                    seen: List[bool] = None) -> None:
+        """
+        Replace the contents of this RestrictedBattleQueue with p1 and p2 in
+        the order given by order, where 0 stands for p1 and 1 stands for p2.
+
+        flags are the restriction flags ('Y' or 'N') of the characters in
+        order, and seen says whether p1 and p2 have been added before. By
+        default every character can add and both have been seen.
+
+        >>> bq = RestrictedBattleQueue()
+        >>> from a2_characters import Rogue, Mage
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> m = Mage("m", bq, ManualPlaystyle(bq))
+        >>> r.enemy = m
+        >>> m.enemy = r
+        >>> bq.set_content(r, m, [0, 1, 1], ['Y', 'Y', 'N'])
+        >>> bq.get_state_key()[3:]
+        ((0, 1, 1), ('Y', 'Y', 'N'), (True, True))
+        """
+        super().set_content(p1, p2, order)
+        self._restriction_lst = deque(flags) if flags is not None \
+            else deque(['Y'] * len(order))
+        self._flag_hash = None
+        self._counts = {p1: order.count(0), p2: order.count(1)}
+        if seen is None:
+            seen = (True, True)
+        self._seen = {character: 1 for character, was_seen
+                      in zip([p1, p2], seen) if was_seen}
+
+    def _undo(self, entry: tuple) -> None:
+        """
+        Revert the change recorded in entry, including any change to the
+        restriction flags.
+        """
+        if entry[0] == 'pop' and len(entry) == 3:
+            self._restriction_lst.appendleft(entry[2])
+        elif entry[0] == 'append':
+            self._restriction_lst.pop()
+        elif entry[0] == 'seen':
+            del self._seen[entry[1]]
+
+        super()._undo(entry)
+
+    def get_state_key(self) -> tuple:
+        """
+        Return a hashable key describing the state of the game being carried
+        out in this RestrictedBattleQueue. Besides the characters and the
+        queue order, the key records which characters are able to add and
+        which characters have already been added once.
+
+        >>> bq = RestrictedBattleQueue()
+        >>> from a2_characters import Rogue, Mage
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> m = Mage("m", bq, ManualPlaystyle(bq))
+        >>> r.enemy = m
+        >>> m.enemy = r
+        >>> bq.add(r)
+        >>> bq.add(m)
+        >>> bq.add(m)
+        >>> bq.get_state_key()[3:]
+        ((0, 1, 1), ('Y', 'Y', 'N'), (True, True))
+        """
+        key = super().get_state_key()
+        if not self._p1:
+            return key
+
+        seen = (self._p1 in self._seen, self._p2 in self._seen)
+        return key + (tuple(self._restriction_lst), seen)
+
+    def _get_hashes(self) -> tuple:
+        """
+        Return the hashes this RestrictedBattleQueue has kept that a move can
+        change, including the hash of its restriction flags.
+        """
+        return super()._get_hashes() + (self._flag_hash,)
+
+    def _set_hashes(self, hashes: Optional[tuple]) -> None:
+        """
+        Put back hashes, as returned by _get_hashes, or forget the kept
+        hashes if hashes is None.
+        """
+        if hashes is None:
+            super()._set_hashes(None)
+            self._flag_hash = None
+        else:
+            super()._set_hashes(hashes[:-1])
+            self._flag_hash = hashes[-1]
+
+    def _get_kept_hash(self) -> int:
+        """
+        Return the hash of this RestrictedBattleQueue from the hashes it has
+        kept, including its restriction flags and who has been seen.
+        """
+        if self._flag_hash is None:
+            self._flag_hash = self._get_flag_hash()
+        return super()._get_kept_hash() ^ self._flag_hash ^ \
+            self._get_seen_hash()
+
+    def _get_flag_hash(self) -> int:
+        """
+        Return the hash of the restriction flags.
+        """
+        return get_queue_hash([FLAG_CODES[flag]
+                               for flag in self._restriction_lst])
+
+    def _get_seen_hash(self) -> int:
+        """
+        Return the hash of which players have been added once.
+        """
+        seen_hash = 0
+        for player, character in enumerate([self._p1, self._p2]):
+            if character is not None and character in self._seen:
+                seen_hash ^= get_zobrist_key('seen', player)
+        return seen_hash
+
+    def compute_state_hash(self) -> int:
+        """
+        Return the hash of the state of this RestrictedBattleQueue, worked
+        out from scratch rather than from the hashes it has kept.
+
+        >>> bq = RestrictedBattleQueue()
+        >>> from a2_characters import Rogue, Mage
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> m = Mage("m", bq, ManualPlaystyle(bq))
+        >>> r.enemy = m
+        >>> m.enemy = r
+        >>> bq.add(r)
+        >>> bq.add(m)
+        >>> bq.add(m)
+        >>> bq.compute_state_hash() == bq.get_state_hash()
+        True
+        """
+        return super().compute_state_hash() ^ self._get_flag_hash() ^ \
+            self._get_seen_hash()
+
     def copy(self) -> 'BattleQueue':
         """
         Return a copy of this BattleQueue. The copy contains copies of the
@@ -350,7 +948,7 @@ class RestrictedBattleQueue(BattleQueue):
             new_battle_queue.remove()
             new_battle_queue.clear_seen()
 
-        for character in self._content:
+        for character in self._characters():
             if character == self._p1:
                 new_battle_queue.add(p1_copy)
             else:
@@ -359,6 +957,195 @@ class RestrictedBattleQueue(BattleQueue):
         return new_battle_queue
 
 
+class PersistentBattleQueue(BattleQueue):
+    """
+    A BattleQueue whose queue is a PersistentDeque of player numbers (0 for
+    the first player added and 1 for the other), rather than of characters.
+
+    Copies share the queue with this PersistentBattleQueue until either
+    changes it, so copy only has to copy the two characters and takes
+    constant time however long the queue is.
+
+    >>> from a2_characters import Rogue, Mage
+    >>> from a2_playstyle import ManualPlaystyle
+    >>> bq = PersistentBattleQueue()
+    >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+    >>> m = Mage("m", bq, ManualPlaystyle(bq))
+    >>> r.enemy = m
+    >>> m.enemy = r
+    >>> bq.add(r)
+    >>> bq.add(m)
+    >>> new_bq = bq.copy()
+    >>> new_bq.peek().special_attack()
+    >>> new_bq
+    r (Rogue): 100/90 -> m (Mage): 88/100 -> r (Rogue): 100/90 -> \
+r (Rogue): 100/90
+    >>> bq
+    r (Rogue): 100/100 -> m (Mage): 100/100
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize this PersistentBattleQueue.
+
+        >>> PersistentBattleQueue().is_empty()
+        True
+        """
+        super().__init__()
+        self._content = PersistentDeque()
+
+    def _get_character(self, player: int) -> 'Character':
+        """
+        Return the character with the player number player.
+        """
+        return self._p2 if player else self._p1
+
+    def _push_back(self, character: 'Character') -> None:
+        """
+        Add character to the back of the queue.
+        """
+        self._result = None
+        player = self._get_player(character)
+        if self._queue_hash is not None:
+            self._queue_hash = push_back(self._queue_hash,
+                                         len(self._content),
+                                         QUEUE_CODES[player])
+        self._content.append(player)
+
+    def _pop_front(self) -> 'Character':
+        """
+        Remove and return the character at the front of the queue.
+        """
+        self._result = None
+        player = self._content.popleft()
+        if self._queue_hash is not None:
+            self._queue_hash = pop_front(self._queue_hash,
+                                         QUEUE_CODES[player])
+        return self._get_character(player)
+
+    def _push_front(self, character: 'Character') -> None:
+        """
+        Add character back to the front of the queue. As in BattleQueue,
+        unmake_move puts back the hash.
+        """
+        self._result = None
+        self._content.appendleft(self._get_player(character))
+
+    def _pop_back(self) -> 'Character':
+        """
+        Remove and return the character at the back of the queue. As in
+        BattleQueue, unmake_move puts back the hash.
+        """
+        self._result = None
+        return self._get_character(self._content.pop())
+
+    def _front(self) -> 'Character':
+        """
+        Return the character at the front of the queue, which must not be
+        empty.
+        """
+        return self._get_character(self._content[0])
+
+    def _characters(self) -> Iterable['Character']:
+        """
+        Return the characters in the queue, from front to back.
+        """
+        return [self._get_character(player) for player in self._content]
+
+    def set_content(self, p1: 'Character', p2: 'Character',
+                    order: List[int]) -> None:
+        """
+        Replace the contents of this PersistentBattleQueue with p1 and p2 in
+        the order given by order, where 0 stands for p1 and 1 stands for p2.
+        """
+        super().set_content(p1, p2, order)
+        self._content = PersistentDeque(1 if player else 0
+                                        for player in order)
+
+    def _copy_characters(self, new_battle_queue: 'BattleQueue') -> None:
+        """
+        Give new_battle_queue copies of this PersistentBattleQueue's
+        characters, and share this PersistentBattleQueue's queue with it.
+        """
+        p1_copy = self._p1.copy(new_battle_queue)
+        p2_copy = self._p2.copy(new_battle_queue)
+        p1_copy.enemy = p2_copy
+        p2_copy.enemy = p1_copy
+
+        new_battle_queue._set_players(p1_copy, p2_copy)
+        new_battle_queue._content = self._content.copy()
+        new_battle_queue._queue_hash = self._queue_hash
+
+    def copy(self) -> 'BattleQueue':
+        """
+        Return a copy of this PersistentBattleQueue. The copy contains copies
+        of the characters inside this PersistentBattleQueue, and shares its
+        queue, so copying takes constant time.
+        """
+        new_battle_queue = PersistentBattleQueue()
+        self._copy_characters(new_battle_queue)
+        return new_battle_queue
+
+
+class PersistentRestrictedBattleQueue(RestrictedBattleQueue,
+                                      PersistentBattleQueue):
+    """
+    A RestrictedBattleQueue whose queue and restriction flags are
+    PersistentDeques, so that copy takes constant time.
+
+    Unlike RestrictedBattleQueue.copy, which adds the characters to the copy
+    again, copy keeps the restriction flags exactly as they are.
+
+    >>> from a2_characters import Rogue, Mage
+    >>> from a2_playstyle import ManualPlaystyle
+    >>> bq = PersistentRestrictedBattleQueue()
+    >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+    >>> m = Mage("m", bq, ManualPlaystyle(bq))
+    >>> r.enemy = m
+    >>> m.enemy = r
+    >>> bq.add(r)
+    >>> bq.add(m)
+    >>> bq.add(m)
+    >>> bq.copy().get_state_key()[3:] == bq.get_state_key()[3:]
+    True
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize this PersistentRestrictedBattleQueue.
+        """
+        super().__init__()
+        self._restriction_lst = PersistentDeque()
+
+    def set_content(self, p1: 'Character', p2: 'Character',
+                    order: List[int], flags: List[str] = None,
+                    seen: List[bool] = None) -> None:
+        """
+        Replace the contents of this PersistentRestrictedBattleQueue, as in
+        RestrictedBattleQueue.set_content.
+        """
+        super().set_content(p1, p2, order, flags, seen)
+        self._restriction_lst = PersistentDeque(self._restriction_lst)
+
+    def copy(self) -> 'BattleQueue':
+        """
+        Return a copy of this PersistentRestrictedBattleQueue. The copy
+        contains copies of the characters inside it, and shares its queue and
+        restriction flags, so copying takes constant time.
+        """
+        new_battle_queue = PersistentRestrictedBattleQueue()
+        self._copy_characters(new_battle_queue)
+        new_battle_queue._restriction_lst = self._restriction_lst.copy()
+        new_battle_queue._flag_hash = self._flag_hash
+
+        for character, copy in [(self._p1, new_battle_queue._p1),
+                                (self._p2, new_battle_queue._p2)]:
+            new_battle_queue._counts[copy] = self._counts.get(character, 0)
+            if character in self._seen:
+                new_battle_queue._seen[copy] = 1
+        return new_battle_queue
+
+
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config='a2_pyta.txt')
@@ -0,0 +1,117 @@
+"""
+Unittests for the bookkeeping inside BattleQueue and RestrictedBattleQueue
+for A2.
+"""
+import random
+import unittest
+
+from a2_game import CHARACTER_CLASSES
+from a2_alpha_beta_benchmark import set_up_matchup
+from a2_battle_queue import BattleQueue, RestrictedBattleQueue
+
+
+
+class BattleQueueBookkeepingUnitTests(unittest.TestCase):
+    def assert_counts(self, bq):
+        """
+        Assert that the counts kept by bq match its contents.
+        """
+        content = list(bq._content)
+        for character, count in bq._counts.items():
+            self.assertEqual(count, content.count(character))
+
+    def test_counts_follow_moves(self):
+        """
+        Test that the counts of a RestrictedBattleQueue stay right as moves
+        are made and unmade.
+        """
+        rng = random.Random(0)
+        for p1_key in CHARACTER_CLASSES:
+            for p2_key in CHARACTER_CLASSES:
+                bq = set_up_matchup(p1_key, p2_key,
+                                    battle_queue_class=RestrictedBattleQueue)
+                made = 0
+                while not bq.is_over():
+                    bq.make_move(rng.choice(
+                        bq.peek().get_available_actions()))
+                    made += 1
+                    self.assert_counts(bq)
+                for _ in range(made):
+                    bq.unmake_move()
+                    self.assert_counts(bq)
+
+    def test_counts_after_copy_and_set_content(self):
+        """
+        Test that copies and set_content start with the right counts.
+        """
+        bq = set_up_matchup('r', 'v', battle_queue_class=RestrictedBattleQueue)
+        bq.peek().special_attack()
+        self.assert_counts(bq.copy())
+
+        p1, p2 = bq.peek(), bq.peek().enemy
+        bq.set_content(p1, p2, [1, 0, 0, 1, 1])
+        self.assert_counts(bq)
+
+    def test_long_queue(self):
+        """
+        Test that a long queue can be filled and emptied, in order.
+        """
+        for battle_queue_class in [BattleQueue, RestrictedBattleQueue]:
+            bq = set_up_matchup('m', 'r',
+                                battle_queue_class=battle_queue_class)
+            p1, p2 = bq.peek(), bq.peek().enemy
+            order = [i % 3 % 2 for i in range(100000)]
+            bq.set_content(p1, p2, order)
+
+            removed = [bq.remove() for _ in order]
+            self.assertEqual(removed, [p2 if player else p1
+                                       for player in order])
+            self.assertTrue(bq.is_empty())
+
+    def test_result_is_cached(self):
+        """
+        Test that is_over and get_winner are only worked out again after
+        the queue or a character changes.
+        """
+        bq = set_up_matchup('m', 'r')
+        p1, p2 = bq.peek(), bq.peek().enemy
+        self.assertFalse(bq.is_over())
+
+        # Changing HP without going through the character's methods is not
+        # noticed, which shows that the result was kept.
+        p2._hp = 0
+        self.assertFalse(bq.is_over())
+        self.assertIsNone(bq.get_winner())
+
+        p2.set_hp(0)
+        self.assertTrue(bq.is_over())
+        self.assertIs(bq.get_winner(), p1)
+
+    def test_result_follows_changes(self):
+        """
+        Test that the kept result changes with HP, SP, the queue, and moves
+        being made and unmade.
+        """
+        bq = set_up_matchup('m', 'r')
+        p1, p2 = bq.peek(), bq.peek().enemy
+
+        p1.set_sp(0)
+        p2.reduce_sp(100)
+        self.assertTrue(bq.is_over())
+        self.assertIsNone(bq.get_winner())
+
+        p2.set_sp(100)
+        bq.add(p2)
+        self.assertFalse(bq.is_over())
+
+        p1.set_hp(12)
+        bq.make_move('S')
+        self.assertTrue(bq.is_over())
+        self.assertIs(bq.get_winner(), p2)
+        bq.unmake_move()
+        self.assertFalse(bq.is_over())
+        self.assertIsNone(bq.get_winner())
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
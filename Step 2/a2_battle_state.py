@@ -0,0 +1,541 @@
+"""
+A compact, immutable representation of a battle for A2's searches.
+
+A BattleState is a small tuple of ints that holds everything get_state_score
+needs to know about a BattleQueue: the kind, HP and SP of both characters,
+the order of the queue and, for a RestrictedBattleQueue, the restriction
+flags and which characters have been added before. BattleStates are hashable,
+so they can be cached, and can be pickled to send to other processes.
+
+successors, is_over and score are pure functions that follow the same rules
+as BattleQueue, RestrictedBattleQueue and the skills in a2_skills, and
+get_battle_state_score searches BattleStates the same way get_state_score
+searches BattleQueues.
+
+Sorcerers always use the tree from get_default_tree, and the two
+characters are told apart by whether they are p1 or p2 (rather than by
+name).
+"""
+from typing import List, NamedTuple, Tuple
+from functools import lru_cache
+from a2_characters import Mage, Rogue, Vampire, Sorcerer
+from a2_skills import MageAttack, MageSpecial, RogueAttack, RogueSpecial, \
+    VampireAttack, VampireSpecial, SorcererAttack, SorcererSpecial
+from a2_skill_decision_tree import get_default_tree
+
+# The character classes, in the order of their kind numbers.
+CHARACTER_KINDS = [Mage, Rogue, Vampire, Sorcerer]
+
+_SAMPLES = [character_class('', None, None)
+            for character_class in CHARACTER_KINDS]
+_KIND_OF_TYPE = {sample.get_state_key()[0]: kind
+                 for kind, sample in enumerate(_SAMPLES)}
+_DEFENSE = [sample.get_defense() for sample in _SAMPLES]
+_SKILLS = [{'A': sample.get_skill('A'), 'S': sample.get_skill('S')}
+           for sample in _SAMPLES]
+
+SKILL_DECISION_TREE = get_default_tree()
+
+
+class BattleState(NamedTuple):
+    """
+    The state of a battle between the characters p1 and p2.
+
+    p1_kind, p2_kind - the index of each character's class in CHARACTER_KINDS.
+    p1_hp, p1_sp, p2_hp, p2_sp - each character's HP and SP.
+    queue - the order of the queue, where 0 stands for p1 and 1 for p2.
+    flags - None for a BattleQueue. For a RestrictedBattleQueue, whether each
+            entry in the queue is able to add (1) or not (0).
+    seen - a bit mask of the characters that have been added to a
+           RestrictedBattleQueue before: 1 for p1 and 2 for p2.
+    """
+    p1_kind: int
+    p1_hp: int
+    p1_sp: int
+    p2_kind: int
+    p2_hp: int
+    p2_sp: int
+    queue: Tuple[int, ...]
+    flags: Tuple[int, ...] = None
+    seen: int = 0
+
+    @staticmethod
+    def from_battle_queue(battle_queue: 'BattleQueue') -> 'BattleState':
+        """
+        Return the BattleState of battle_queue.
+
+        >>> from a2_battle_queue import BattleQueue
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> bq = BattleQueue()
+        >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+        >>> m = Mage("m", bq, ManualPlaystyle(bq))
+        >>> r.enemy = m
+        >>> m.enemy = r
+        >>> bq.add(r)
+        >>> bq.add(m)
+        >>> m.set_hp(40)
+        >>> BattleState.from_battle_queue(bq)
+        BattleState(p1_kind=1, p1_hp=100, p1_sp=100, p2_kind=0, p2_hp=40, \
+p2_sp=100, queue=(0, 1), flags=None, seen=0)
+        """
+        key = battle_queue.get_state_key()
+        if len(key[1]) > 4 or len(key[2]) > 4:
+            raise ValueError('Only Sorcerers with the default tree can be in '
+                             'a BattleState')
+        p1_type, _, p1_hp, p1_sp = key[1]
+        p2_type, _, p2_hp, p2_sp = key[2]
+
+        flags, seen = None, 0
+        if len(key) > 4:
+            flags = tuple(1 if flag == 'Y' else 0 for flag in key[4])
+            seen = key[5][0] + 2 * key[5][1]
+
+        return BattleState(_KIND_OF_TYPE[p1_type], p1_hp, p1_sp,
+                           _KIND_OF_TYPE[p2_type], p2_hp, p2_sp,
+                           key[3], flags, seen)
+
+    def to_battle_queue(self, names: Tuple[str, str] = ('p1', 'p2'),
+                        playstyle_class: type = None) -> 'BattleQueue':
+        """
+        Return a new BattleQueue (or RestrictedBattleQueue) in this state,
+        whose characters are named names and use playstyle_class (by default,
+        ManualPlaystyle).
+
+        >>> state = BattleState(1, 100, 100, 0, 40, 100, (0, 1, 1), \
+(1, 1, 0), 3)
+        >>> bq = state.to_battle_queue(('r', 'm'))
+        >>> bq
+        r (Rogue): 100/100 -> m (Mage): 40/100 -> m (Mage): 40/100
+        >>> BattleState.from_battle_queue(bq) == state
+        True
+        """
+        from a2_battle_queue import BattleQueue, RestrictedBattleQueue
+        from a2_playstyle import ManualPlaystyle
+        if playstyle_class is None:
+            playstyle_class = ManualPlaystyle
+
+        bq = BattleQueue() if self.flags is None else RestrictedBattleQueue()
+        characters = []
+        for kind, name, hp, sp in [(self.p1_kind, names[0], self.p1_hp,
+                                    self.p1_sp),
+                                   (self.p2_kind, names[1], self.p2_hp,
+                                    self.p2_sp)]:
+            character = CHARACTER_KINDS[kind](name, bq, playstyle_class(bq))
+            character.set_hp(hp)
+            character.set_sp(sp)
+            characters.append(character)
+
+        p1, p2 = characters
+        p1.enemy = p2
+        p2.enemy = p1
+
+        if self.flags is None:
+            bq.set_content(p1, p2, list(self.queue))
+        else:
+            bq.set_content(p1, p2, list(self.queue),
+                           ['Y' if flag else 'N' for flag in self.flags],
+                           [bool(self.seen & 1), bool(self.seen & 2)])
+        return bq
+
+
+class _Battle:
+    """
+    A mutable working copy of a BattleState, used to apply a move by
+    following the same steps as BattleQueue and the skills.
+    """
+
+    def __init__(self, state: BattleState) -> None:
+        """
+        Initialize this _Battle from state.
+        """
+        self.kinds = (state.p1_kind, state.p2_kind)
+        self.hp = [state.p1_hp, state.p2_hp]
+        self.sp = [state.p1_sp, state.p2_sp]
+        self.queue = list(state.queue)
+        self.flags = None if state.flags is None else list(state.flags)
+        self.seen = state.seen
+
+    def freeze(self) -> BattleState:
+        """
+        Return the BattleState of this _Battle.
+        """
+        flags = None if self.flags is None else tuple(self.flags)
+        return BattleState(self.kinds[0], self.hp[0], self.sp[0],
+                           self.kinds[1], self.hp[1], self.sp[1],
+                           tuple(self.queue), flags, self.seen)
+
+    def can_act(self, player: int) -> bool:
+        """
+        Return whether player has any action available.
+        """
+        return _can_act(self.kinds[player], self.sp[player])
+
+    def clean(self) -> None:
+        """
+        Same as BattleQueue._clean_queue. (Like that method, this does not
+        remove restriction flags.)
+        """
+        while self.queue and not self.can_act(self.queue[0]):
+            self.queue.pop(0)
+
+    def remove(self) -> int:
+        """
+        Same as BattleQueue.remove and RestrictedBattleQueue.remove.
+        """
+        self.clean()
+        if self.flags is not None:
+            self.flags.pop(0)
+        return self.queue.pop(0)
+
+    def add(self, player: int) -> None:
+        """
+        Same as BattleQueue.add and RestrictedBattleQueue.add.
+        """
+        if self.flags is None:
+            self.queue.append(player)
+            return
+
+        if not self.seen & (1 << player):
+            self.seen |= 1 << player
+            flag = 1
+        elif self.queue and player == self.queue[0]:
+            if not self.flags[0]:
+                return
+            flag = 0 if self.queue.count(player) >= 2 else 1
+        else:
+            if self.flags and not self.flags[0]:
+                return
+            flag = 0
+
+        self.queue.append(player)
+        self.flags.append(flag)
+
+    def deal_damage(self, skill: 'Skill', caster: int) -> None:
+        """
+        Same as Skill._deal_damage.
+        """
+        target = 1 - caster
+        self.sp[caster] -= skill.get_sp_cost()
+        damage = skill.get_damage() - _DEFENSE[self.kinds[target]]
+        self.hp[target] = max(self.hp[target] - damage, 0)
+
+    def use(self, skill: 'Skill', caster: int) -> None:
+        """
+        Make caster use skill on the other character, the same way
+        skill.use does.
+        """
+        _EFFECTS[type(skill)](self, skill, caster)
+
+
+def _normal_attack(battle: _Battle, skill: 'Skill', caster: int) -> None:
+    """
+    Same as NormalAttack.use.
+    """
+    battle.deal_damage(skill, caster)
+    battle.add(caster)
+
+
+def _mage_special(battle: _Battle, skill: 'Skill', caster: int) -> None:
+    """
+    Same as MageSpecial.use.
+    """
+    battle.deal_damage(skill, caster)
+    battle.add(1 - caster)
+    battle.add(caster)
+
+
+def _rogue_special(battle: _Battle, skill: 'Skill', caster: int) -> None:
+    """
+    Same as RogueSpecial.use.
+    """
+    battle.deal_damage(skill, caster)
+    battle.add(caster)
+    battle.add(caster)
+
+
+def _vampire_drain(battle: _Battle, skill: 'Skill', caster: int) -> None:
+    """
+    Deal skill's damage and heal caster by the HP the target lost, the same
+    way both Vampire skills do.
+    """
+    before_hp = battle.hp[1 - caster]
+    battle.deal_damage(skill, caster)
+    battle.hp[caster] += before_hp - battle.hp[1 - caster]
+
+
+def _vampire_attack(battle: _Battle, skill: 'Skill', caster: int) -> None:
+    """
+    Same as VampireAttack.use.
+    """
+    _vampire_drain(battle, skill, caster)
+    battle.add(caster)
+
+
+def _vampire_special(battle: _Battle, skill: 'Skill', caster: int) -> None:
+    """
+    Same as VampireSpecial.use.
+    """
+    _vampire_drain(battle, skill, caster)
+    battle.add(caster)
+    battle.add(caster)
+    battle.add(1 - caster)
+
+
+def _sorcerer_attack(battle: _Battle, skill: 'Skill', caster: int) -> None:
+    """
+    Same as SorcererAttack.use, with the default SkillDecisionTree.
+    """
+    target = 1 - caster
+    picked = SKILL_DECISION_TREE.compile().pick_skill_by_stats(
+        battle.hp[caster], battle.sp[caster], battle.hp[target],
+        battle.sp[target])
+    battle.use(picked, caster)
+    battle.sp[caster] += picked.get_sp_cost() - skill.get_sp_cost()
+
+
+def _sorcerer_special(battle: _Battle, skill: 'Skill', caster: int) -> None:
+    """
+    Same as SorcererSpecial.use.
+    """
+    battle.deal_damage(skill, caster)
+    removed = []
+    battle.clean()
+    while battle.queue:
+        removed.append(battle.remove())
+        battle.clean()
+
+    if caster in removed:
+        battle.add(caster)
+    if 1 - caster in removed:
+        battle.add(1 - caster)
+    battle.add(caster)
+
+
+_EFFECTS = {MageAttack: _normal_attack,
+            RogueAttack: _normal_attack,
+            MageSpecial: _mage_special,
+            RogueSpecial: _rogue_special,
+            VampireAttack: _vampire_attack,
+            VampireSpecial: _vampire_special,
+            SorcererAttack: _sorcerer_attack,
+            SorcererSpecial: _sorcerer_special}
+
+
+def _can_act(kind: int, sp: int) -> bool:
+    """
+    Return whether a character of kind with sp SP has any action available.
+    """
+    skills = _SKILLS[kind]
+    return skills['A'].get_sp_cost() <= sp or skills['S'].get_sp_cost() <= sp
+
+
+def get_available_actions(state: BattleState, player: int) -> List[str]:
+    """
+    Return the actions that player (0 for p1, 1 for p2) can perform in
+    state.
+
+    >>> state = BattleState(0, 100, 20, 1, 100, 100, (0, 1))
+    >>> get_available_actions(state, 0)
+    ['A']
+    >>> get_available_actions(state, 1)
+    ['A', 'S']
+    """
+    kind = state.p1_kind if player == 0 else state.p2_kind
+    sp = state.p1_sp if player == 0 else state.p2_sp
+    return [action for action in ['A', 'S']
+            if _SKILLS[kind][action].get_sp_cost() <= sp]
+
+
+def clean(state: BattleState) -> BattleState:
+    """
+    Return state with the characters that cannot act removed from the front
+    of its queue, as BattleQueue.is_empty does.
+
+    >>> clean(BattleState(0, 100, 2, 1, 100, 100, (0, 1)))
+    BattleState(p1_kind=0, p1_hp=100, p1_sp=2, p2_kind=1, p2_hp=100, \
+p2_sp=100, queue=(1,), flags=None, seen=0)
+    """
+    queue = state.queue
+    start = 0
+    while start < len(queue):
+        player = queue[start]
+        kind = state.p1_kind if player == 0 else state.p2_kind
+        sp = state.p1_sp if player == 0 else state.p2_sp
+        if _can_act(kind, sp):
+            break
+        start += 1
+
+    if start == 0:
+        return state
+    return state._replace(queue=queue[start:])
+
+
+def next_player(state: BattleState) -> int:
+    """
+    Return the player who acts next in state (0 for p1, 1 for p2), or 0 if
+    nobody can act, as BattleQueue.peek does.
+
+    >>> next_player(BattleState(0, 100, 100, 1, 100, 100, (1, 0)))
+    1
+    """
+    queue = clean(state).queue
+    return queue[0] if queue else 0
+
+
+def is_over(state: BattleState) -> bool:
+    """
+    Return whether the game in state is over, as BattleQueue.is_over does.
+
+    >>> is_over(BattleState(0, 100, 100, 1, 100, 100, (0, 1)))
+    False
+    >>> is_over(BattleState(0, 0, 100, 1, 100, 100, (0, 1)))
+    True
+    >>> is_over(BattleState(0, 100, 4, 1, 100, 2, (0, 1)))
+    True
+    """
+    if not clean(state).queue:
+        return True
+    return state.p1_hp == 0 or state.p2_hp == 0
+
+
+def get_winner(state: BattleState) -> int:
+    """
+    Return the winner of the game in state (0 for p1, 1 for p2), or None if
+    the game is not over or is a tie.
+
+    >>> get_winner(BattleState(0, 0, 100, 1, 40, 100, (0, 1)))
+    1
+    >>> get_winner(BattleState(0, 10, 100, 1, 40, 100, (0, 1))) is None
+    True
+    """
+    if not is_over(state):
+        return None
+    if state.p1_hp == 0:
+        return 1
+    if state.p2_hp == 0:
+        return 0
+    return None
+
+
+def score(state: BattleState) -> int:
+    """
+    Return the score of a state that is over, as get_score_when_is_over does:
+    the winner's HP if the next player won, minus the winner's HP if they
+    lost, and 0 for a tie.
+
+    >>> score(BattleState(0, 0, 100, 1, 40, 100, (1, 0)))
+    40
+    >>> score(BattleState(0, 0, 100, 1, 40, 100, (0, 1)))
+    -40
+    """
+    winner = get_winner(state)
+    if winner is None:
+        return 0
+
+    hp = state.p1_hp if winner == 0 else state.p2_hp
+    return hp if winner == next_player(state) else -hp
+
+
+def apply_move(state: BattleState, action: str) -> BattleState:
+    """
+    Return the state after the next player in state leaves the queue and
+    performs action ('A' or 'S'), the same way BattleQueue.make_move does.
+    Any other action only removes the next player.
+
+    >>> state = BattleState(1, 100, 100, 0, 100, 100, (0, 1))
+    >>> apply_move(state, 'S')
+    BattleState(p1_kind=1, p1_hp=100, p1_sp=90, p2_kind=0, p2_hp=88, \
+p2_sp=100, queue=(1, 0, 0), flags=None, seen=0)
+    """
+    battle = _Battle(state)
+    caster = battle.remove()
+    if action in ['A', 'S']:
+        battle.use(_SKILLS[battle.kinds[caster]][action], caster)
+    return battle.freeze()
+
+
+def successors(state: BattleState) -> List[Tuple[str, BattleState]]:
+    """
+    Return a list of (action, state) pairs for every action the next player
+    in state can perform, with 'A' before 'S'. If the game in state is over,
+    return an empty list.
+
+    >>> state = BattleState(1, 100, 5, 0, 100, 100, (0, 1))
+    >>> [action for action, _ in successors(state)]
+    ['A']
+    >>> successors(state._replace(p2_hp=0))
+    []
+    """
+    if is_over(state):
+        return []
+    state = clean(state)
+    return [(action, apply_move(state, action))
+            for action in get_available_actions(state, next_player(state))]
+
+
+def acts_again(state: BattleState) -> bool:
+    """
+    Return whether the next player in state (a game that is not over) is
+    also the next player after they perform 'A', or after they leave the
+    queue if they cannot perform 'A'. This decides whether the scores of
+    state's successors are maximized or negated and minimized.
+
+    >>> acts_again(BattleState(1, 100, 100, 0, 100, 100, (0, 1)))
+    False
+    >>> acts_again(BattleState(1, 100, 100, 0, 100, 100, (0, 0, 1)))
+    True
+    """
+    state = clean(state)
+    player = next_player(state)
+    action = 'A' if 'A' in get_available_actions(state, player) else 'X'
+    return next_player(apply_move(state, action)) == player
+
+
+def combine_scores(max_: bool, scores: List[int]) -> int:
+    """
+    Return the score of a state whose successors scored scores, the same way
+    get_state_score does: scores of 0 or None are ignored, and the rest are
+    maximized if max_, or else negated and minimized. Return None if no
+    scores are left.
+
+    >>> combine_scores(True, [-10, 30])
+    30
+    >>> combine_scores(False, [-10, 30])
+    10
+    >>> combine_scores(False, [0, None]) is None
+    True
+    """
+    scores = [child_score for child_score in scores if child_score]
+    if not scores:
+        return None
+    if max_:
+        return max(scores)
+    return -min(scores)
+
+
+@lru_cache(maxsize=1 << 20)
+def get_battle_state_score(state: BattleState) -> int:
+    """
+    Return the highest score that the next player in state can guarantee,
+    searching the same way get_state_score does.
+
+    Results are cached, since BattleStates are hashable.
+
+    >>> get_battle_state_score(BattleState(1, 100, 100, 0, 3, 100, (0, 1)))
+    100
+    >>> get_battle_state_score(BattleState(1, 40, 100, 0, 3, 100, (0, 1)))
+    40
+    >>> get_battle_state_score(BattleState(1, 40, 100, 0, 3, 100, (1, 0)))
+    -10
+    """
+    if is_over(state):
+        return score(state)
+
+    return combine_scores(acts_again(state),
+                          [get_battle_state_score(child)
+                           for _, child in successors(state)])
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
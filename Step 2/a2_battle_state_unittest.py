@@ -0,0 +1,108 @@
+"""
+Unittests for the compact BattleState representation in A2.
+
+successors and get_battle_state_score must agree with BattleQueue.make_move
+and get_state_score for every matchup and both kinds of BattleQueue.
+"""
+import random
+import unittest
+
+from a2_game import CHARACTER_CLASSES
+from a2_alpha_beta_benchmark import set_up_matchup
+from a2_playstyle import get_state_score
+from a2_battle_queue import BattleQueue, RestrictedBattleQueue
+from a2_battle_state import BattleState, successors, is_over, score, \
+    get_battle_state_score
+
+
+def random_positions(seed, count):
+    """
+    Return count BattleQueues reached by random moves from random starting
+    HP and SP, for every matchup and both kinds of BattleQueue.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        battle_queue_class = rng.choice([BattleQueue, RestrictedBattleQueue])
+        bq = set_up_matchup(rng.choice(list(CHARACTER_CLASSES)),
+                            rng.choice(list(CHARACTER_CLASSES)),
+                            battle_queue_class=battle_queue_class)
+        p1, p2 = bq.peek(), bq.peek().enemy
+        hp = (rng.randint(1, 40), rng.randint(1, 40))
+        sp = (rng.randint(0, 60), rng.randint(0, 60))
+        p1.set_hp(hp[0])
+        p1.set_sp(sp[0])
+        p2.set_hp(hp[1])
+        p2.set_sp(sp[1])
+        for _ in range(rng.randint(0, 4)):
+            if bq.is_over():
+                break
+            bq.make_move(rng.choice(bq.peek().get_available_actions()))
+        positions.append(bq)
+    return positions
+
+
+class BattleStateUnitTests(unittest.TestCase):
+    def test_round_trip(self):
+        """
+        Test that converting a BattleQueue to a BattleState and back gives a
+        BattleQueue in the same state.
+        """
+        for bq in random_positions(1, 100):
+            state = BattleState.from_battle_queue(bq)
+            self.assertEqual(state.to_battle_queue().get_state_key(),
+                             bq.get_state_key())
+
+    def test_is_hashable(self):
+        """
+        Test that equal BattleStates hash the same, so they can be cached.
+        """
+        bq = set_up_matchup('m', 'r', 30)
+        states = {BattleState.from_battle_queue(bq),
+                  BattleState.from_battle_queue(bq.copy())}
+        self.assertEqual(len(states), 1)
+
+    def test_successors_match_make_move(self):
+        """
+        Test that successors gives the same states as making each move in
+        the BattleQueue.
+        """
+        for bq in random_positions(2, 300):
+            state = BattleState.from_battle_queue(bq)
+            self.assertEqual(is_over(state), bq.is_over())
+            if bq.is_over():
+                self.assertEqual(successors(state), [])
+                continue
+
+            expected = []
+            for action in bq.peek().get_available_actions():
+                bq.make_move(action)
+                expected.append((action, BattleState.from_battle_queue(bq)))
+                bq.unmake_move()
+            self.assertEqual(successors(state), expected)
+
+    def test_scores_match_get_state_score(self):
+        """
+        Test that get_battle_state_score gives the same score as
+        get_state_score.
+        """
+        for bq in random_positions(3, 150):
+            state = BattleState.from_battle_queue(bq)
+            expected = get_state_score(bq, None)
+            self.assertEqual(get_battle_state_score(state), expected,
+                             "Different scores for {}".format(state))
+
+    def test_score_when_over(self):
+        """
+        Test that score is positive for a win for the next player, negative
+        for a loss, and 0 for a tie.
+        """
+        self.assertEqual(score(BattleState(0, 0, 100, 1, 40, 100, (1, 0))),
+                         40)
+        self.assertEqual(score(BattleState(0, 0, 100, 1, 40, 100, (0, 1))),
+                         -40)
+        self.assertEqual(score(BattleState(0, 10, 0, 1, 40, 0, (0, 1))), 0)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
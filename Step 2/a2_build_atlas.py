@@ -0,0 +1,153 @@
+"""
+The build step that packs A2's sprites into one atlas image, for a2_ui.
+
+Run this file after adding or changing anything in sprites/ to rebuild
+sprites/atlas.png and its index, sprites/atlas.json:
+
+    python a2_build_atlas.py --directory sprites --max-width 2048
+
+A SpriteCache then loads the one atlas image (instead of decoding every PNG)
+and takes each sprite as a sub-rect of it.
+
+Most of each sprite is transparent, so only the part of it that is not
+(its bounding rect) is packed. The index maps each (character_type, state,
+frame) that get_next_sprite names, such as ('mage', 'idle', 0) for
+mage_idle_0.png, to where that part is in the atlas and where it goes in the
+whole sprite, as {character_type: {state: [placement, ...]}} with one
+placement per frame. A placement is
+[x, y, width, height, left, top, sprite_width, sprite_height]: the part is
+the rect (x, y, width, height) of the atlas, and goes at (left, top) of a
+sprite_width by sprite_height sprite. Sprites with other names (such as the
+background) are kept under 'others' by name.
+"""
+from typing import Dict, List, Tuple
+import argparse
+import json
+import os
+import re
+import pygame
+
+# The names of the atlas image and its index in the sprites directory.
+ATLAS_IMAGE = 'atlas.png'
+ATLAS_INDEX = 'atlas.json'
+
+# The name of a character's sprite: {character_type}_{state}_{frame}.
+FRAME_NAME = re.compile(r'^([a-z]+)_([a-z]+)_(\d+)$')
+
+# Where a sprite is in the atlas, as
+# [x, y, width, height, left, top, sprite_width, sprite_height].
+Placement = List[int]
+
+
+def get_sprite_names(directory: str) -> List[str]:
+    """
+    Return the names (without .png) of the sprites in directory, leaving
+    out the atlas itself.
+    """
+    return [os.path.splitext(file_name)[0]
+            for file_name in sorted(os.listdir(directory))
+            if file_name.endswith('.png') and file_name != ATLAS_IMAGE]
+
+
+def pack(sizes: List[Tuple[int, int]], max_width: int) \
+        -> Tuple[List[Tuple[int, int]], Tuple[int, int]]:
+    """
+    Return where to put rects of sizes so that none of them overlap, and the
+    size of the image that holds them all, which is at most max_width wide
+    (unless a rect is wider).
+
+    Rects are put in rows from the tallest down, left to right.
+
+    >>> pack([(10, 5), (10, 8), (15, 5)], 25)
+    ([(10, 0), (0, 0), (0, 8)], (20, 13))
+    """
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i][1])
+    positions = [(0, 0)] * len(sizes)
+    x, y, row_height, width = 0, 0, 0, 0
+    for index in order:
+        rect_width, rect_height = sizes[index]
+        if x > 0 and x + rect_width > max_width:
+            x, y, row_height = 0, y + row_height, 0
+        positions[index] = (x, y)
+        x += rect_width
+        width = max(width, x)
+        row_height = max(row_height, rect_height)
+    return positions, (width, y + row_height)
+
+
+def build_atlas(directory: str, max_width: int = 2048) \
+        -> Tuple[pygame.Surface, Dict[str, dict]]:
+    """
+    Return an atlas image of every sprite in directory, and its index.
+    """
+    names = get_sprite_names(directory)
+    images = [pygame.image.load(os.path.join(directory, name + '.png'))
+              for name in names]
+    bounds = [image.get_bounding_rect() for image in images]
+    positions, size = pack([bound.size for bound in bounds], max_width)
+
+    atlas = pygame.Surface(size, pygame.SRCALPHA)
+    index = {'frames': {}, 'others': {}}
+    for name, image, bound, position in zip(names, images, bounds,
+                                            positions):
+        atlas.blit(image, position, bound)
+        placement = list(position) + list(bound.size) + \
+            list(bound.topleft) + list(image.get_size())
+        match = FRAME_NAME.match(name)
+        if match is None:
+            index['others'][name] = placement
+            continue
+        character_type, state, frame = match.groups()
+        frames = index['frames'].setdefault(character_type, {}).setdefault(
+            state, [])
+        while len(frames) <= int(frame):
+            frames.append(None)
+        frames[int(frame)] = placement
+    return atlas, index
+
+
+def read_index(directory: str) -> Dict[Tuple, Placement]:
+    """
+    Return the placements in the atlas index in directory, keyed by
+    (character_type, state, frame) for characters' sprites and by name for
+    the others.
+    """
+    with open(os.path.join(directory, ATLAS_INDEX)) as index_file:
+        index = json.load(index_file)
+
+    placements = {}
+    for character_type, states in index['frames'].items():
+        for state, frames in states.items():
+            for frame, placement in enumerate(frames):
+                if placement is not None:
+                    placements[(character_type, state, frame)] = placement
+    placements.update(index['others'])
+    return placements
+
+
+def main() -> None:
+    """
+    Build the atlas of the sprites in a directory, and save it and its index
+    there.
+    """
+    parser = argparse.ArgumentParser(
+        description='Pack the sprites into one atlas image and an index.')
+    parser.add_argument('--directory', default='sprites',
+                        help='the directory of the sprites')
+    parser.add_argument('--max-width', type=int, default=2048,
+                        help='the widest the atlas image may be')
+    args = parser.parse_args()
+
+    atlas, index = build_atlas(args.directory, args.max_width)
+    pygame.image.save(atlas, os.path.join(args.directory, ATLAS_IMAGE))
+    with open(os.path.join(args.directory, ATLAS_INDEX), 'w') as index_file:
+        json.dump(index, index_file, separators=(',', ':'))
+
+    print("Packed {} sprites into a {}x{} atlas".format(
+        sum(len(frames) for states in index['frames'].values()
+            for frames in states.values()) + len(index['others']),
+        atlas.get_width(), atlas.get_height()))
+
+
+if __name__ == '__main__':
+    main()
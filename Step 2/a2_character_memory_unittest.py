@@ -0,0 +1,112 @@
+"""
+Unittests for the compact layout of A2's Characters and Skills.
+
+Characters and Skills must not have a per-instance __dict__, every
+Character of a class (including copies) must share the same Skill objects, and
+a Sorcerer's copies must share its SkillDecisionTree.
+"""
+import pickle
+import unittest
+
+from a2_game import CHARACTER_CLASSES
+from a2_playstyle import ManualPlaystyle
+from a2_alpha_beta_benchmark import set_up_matchup
+from a2_skill_decision_tree import SkillDecisionTree, create_default_tree, \
+    get_default_tree
+from a2_skills import RogueSpecial
+
+
+class CharacterMemoryUnitTests(unittest.TestCase):
+    def test_no_instance_dicts(self):
+        """
+        Test that Characters and their Skills have no __dict__.
+        """
+        for key in CHARACTER_CLASSES:
+            character = set_up_matchup(key, key, 100).peek()
+            self.assertFalse(hasattr(character, '__dict__'), key)
+            for action in ['A', 'S']:
+                self.assertFalse(
+                    hasattr(character.get_skill(action), '__dict__'), key)
+
+    def test_skills_are_shared(self):
+        """
+        Test that Characters of the same class, and their copies, use the
+        same Skill objects.
+        """
+        for key, character_class in CHARACTER_CLASSES.items():
+            bq = set_up_matchup(key, key, 100)
+            character = bq.peek()
+            other = character_class('other', bq, ManualPlaystyle(bq))
+            copy = bq.copy().peek()
+            for action in ['A', 'S']:
+                self.assertIs(other.get_skill(action),
+                              character.get_skill(action))
+                self.assertIs(copy.get_skill(action),
+                              character.get_skill(action))
+
+    def test_copies_are_independent(self):
+        """
+        Test that changing a copy's HP and SP does not change the original,
+        even though they share their Skills.
+        """
+        for key in CHARACTER_CLASSES:
+            bq = set_up_matchup(key, 'm', 100)
+            copy = bq.copy()
+            copy.peek().attack()
+            self.assertEqual(bq.peek().get_sp(), 100)
+            self.assertEqual(bq.peek().enemy.get_hp(), 100)
+
+    def test_default_tree_is_shared(self):
+        """
+        Test that new Sorcerers and their copies all use the default tree,
+        which picks the same skills as a newly built one.
+        """
+        bq = set_up_matchup('s', 's', 100)
+        tree = get_default_tree()
+        copy = bq.copy()
+        for sorcerer in [bq.peek(), bq.peek().enemy, copy.peek(),
+                         copy.copy().peek().enemy]:
+            self.assertIs(sorcerer.get_skill_decision_tree(), tree)
+
+        new_tree = create_default_tree()
+        caster, target = bq.peek(), bq.peek().enemy
+        for hp, sp in [(100, 100), (80, 50), (40, 10), (20, 0)]:
+            caster.set_hp(hp)
+            caster.set_sp(sp)
+            target.set_hp(100 - hp)
+            target.set_sp(100 - sp)
+            self.assertIs(type(tree.pick_skill(caster, target)),
+                          type(new_tree.pick_skill(caster, target)))
+
+    def test_copies_keep_custom_tree(self):
+        """
+        Test that copying a Sorcerer keeps the tree it was given, rather
+        than going back to the default tree.
+        """
+        bq = set_up_matchup('s', 'm', 100)
+        tree = SkillDecisionTree(RogueSpecial(), lambda _, __: True, 1)
+        bq.peek().set_skill_decision_tree(tree)
+
+        copy = bq.copy()
+        self.assertIs(copy.peek().get_skill_decision_tree(), tree)
+        self.assertIs(copy.copy().peek().get_skill_decision_tree(), tree)
+
+    def test_sorcerers_pickle_after_attacking(self):
+        """
+        Test that a BattleQueue with a Sorcerer can still be pickled once the
+        Sorcerer has attacked (and so compiled the shared default tree), and
+        that the unpickled Sorcerer picks skills the same way.
+        """
+        bq = set_up_matchup('s', 'r', 100)
+        bq.peek().attack()
+        for _ in range(2):
+            copy = pickle.loads(pickle.dumps(bq))
+            self.assertEqual(copy.peek().get_hp(), bq.peek().get_hp())
+            copy.peek().attack()
+            bq.peek().attack()
+            self.assertEqual(copy.peek().get_hp(), bq.peek().get_hp())
+        pickle.dumps(set_up_matchup('s', 's', 100))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
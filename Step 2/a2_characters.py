@@ -14,7 +14,7 @@ a SkillDecisionTree to be used whenever the Sorcerer attacks.
 from typing import List
 from a2_skills import MageAttack, MageSpecial, RogueAttack, RogueSpecial, \
     VampireAttack, VampireSpecial, SorcererAttack, SorcererSpecial
-from a2_skill_decision_tree import create_default_tree
+from a2_skill_decision_tree import create_default_tree, get_default_tree
 
 class Character:
     """
@@ -23,9 +23,20 @@ class Character:
     battle_queue - the BattleQueue that this Character will add to.
     playstyle - the Playstyle that this Character uses to pick actions.
     enemy - the Character that this Character attacks.
+
+    Characters use __slots__, and each class's type, defense and skills are
+    class attributes shared by all of its Characters (skills have no state
+    of their own), so a Character and its copies are small and cheap to make.
     """
+    __slots__ = ['_name', 'battle_queue', 'playstyle', '_hp', '_sp', 'enemy',
+                 '_current_state', '_current_frame']
     battle_queue: 'BattleQueue'
     playstyle: 'Playstyle'
+    _character_type = ''
+    _defense = 0
+    _skills = {'A': None,
+               'S': None
+              }
     
     def __init__(self, name: str, bq: 'BattleQueue', ps: 'Playstyle') -> None:
         """
@@ -37,16 +48,10 @@ class Character:
         self.playstyle = ps
         self._hp = 100
         self._sp = 100
-        self._defense = 0
         self.enemy = None
         
-        self._character_type = ''
         self._current_state = 'idle'
         self._current_frame = 0
-        
-        self._skills = {'A': None,
-                        'S': None
-                       }
     
     def get_name(self) -> str:
         """
@@ -66,6 +71,20 @@ class Character:
         """
         return self._sp
     
+    def get_defense(self) -> int:
+        """
+        Return the defense of this Character.
+        """
+        return self._defense
+    
+    def get_skill(self, action: str) -> 'Skill':
+        """
+        Return the skill this Character uses for action.
+        'A' corresponds to attack().
+        'S' corresponds to special_attack().
+        """
+        return self._skills[action]
+    
     def get_next_sprite(self) -> str:
         """
         Return the next sprite that needs to be drawn for this Character.
@@ -114,7 +133,7 @@ class Character:
         """
         self._current_state = 'attack'
         self._current_frame = 0
-        self._skills['A'].use(self, self.enemy)
+        self.use_skill('A')
     
     def special_attack(self) -> None:
         """
@@ -122,12 +141,23 @@ class Character:
         """
         self._current_state = 'special'
         self._current_frame = 0
-        self._skills['S'].use(self, self.enemy)
+        self.use_skill('S')
+
+    def use_skill(self, action: str) -> None:
+        """
+        Use the skill corresponding to action on this Character's enemy,
+        without changing the sprite being drawn.
+        'A' corresponds to attack().
+        'S' corresponds to special_attack().
+        """
+        self._skills[action].use(self, self.enemy)
         
     def reduce_sp(self, cost: int) -> None:
         """
         Reduce this Character's SP by cost.
         """
+        if self.battle_queue is not None:
+            self.battle_queue.record_change(self)
         self._sp -= cost
     
     def apply_damage(self, damage: int) -> None:
@@ -135,6 +165,8 @@ class Character:
         Reduce this Character's HP by damage modified by this Character's 
         defense.
         """
+        if self.battle_queue is not None:
+            self.battle_queue.record_change(self)
         damage -= self._defense
         self._hp -= damage
         self._hp = max(self._hp, 0)
@@ -143,14 +175,30 @@ class Character:
         """
         Sets this Character's SP to new_sp.
         """
+        if self.battle_queue is not None:
+            self.battle_queue.record_change(self)
         self._sp = new_sp
     
     def set_hp(self, new_hp: int) -> None:
         """
         Sets this Character's HP to new_hp.
+
+        >>> rogue = Rogue('r', None, None)
+        >>> rogue.set_hp(5)
+        >>> rogue.get_hp()
+        5
         """
+        if self.battle_queue is not None:
+            self.battle_queue.record_change(self)
         self._hp = new_hp
     
+    def get_state_key(self) -> tuple:
+        """
+        Return a hashable key describing this Character's type, name, HP and
+        SP.
+        """
+        return (self._character_type, self._name, self._hp, self._sp)
+
     def __repr__(self):
         """
         Return a representation of this Character in the format:
@@ -182,8 +230,13 @@ class Mage(Character):
     playstyle - the Playstyle that this Mage uses to pick actions.
     enemy - the Mage that this Mage attacks.
     """
+    __slots__ = []
     battle_queue: 'BattleQueue'
     playstyle: 'Playstyle'
+    _character_type = 'mage'
+    _defense = 8
+    _skills = {'A': MageAttack(),
+               'S': MageSpecial()}
     
     def __init__(self, name: str, bq: 'BattleQueue', ps: 'Playstyle') -> None:
         """
@@ -201,10 +254,6 @@ class Mage(Character):
         m (Mage): 100/100
         """
         super().__init__(name, bq, ps)
-        self._character_type = 'mage'
-        self._skills['A'] = MageAttack()
-        self._skills['S'] = MageSpecial()
-        self._defense = 8
     
     def copy(self, new_battle_queue: 'BattleQueue') -> 'Mage':
         """
@@ -247,8 +296,13 @@ class Rogue(Character):
     playstyle - the Playstyle that this Rogue uses to pick actions.
     enemy - the Rogue that this Rogue attacks.
     """
+    __slots__ = []
     battle_queue: 'BattleQueue'
     playstyle: 'Playstyle'
+    _character_type = 'rogue'
+    _defense = 10
+    _skills = {'A': RogueAttack(),
+               'S': RogueSpecial()}
     
     def __init__(self, name: str, bq: 'BattleQueue', ps: 'Playstyle') -> None:
         """
@@ -266,10 +320,6 @@ class Rogue(Character):
         r (Rogue): 100/100
         """
         super().__init__(name, bq, ps)
-        self._character_type = 'rogue'
-        self._skills['A'] = RogueAttack()
-        self._skills['S'] = RogueSpecial()
-        self._defense = 10
         
     def copy(self, new_battle_queue: 'BattleQueue') -> 'Rogue':
         """
@@ -315,8 +365,13 @@ class Vampire(Character):
     playstyle - the Playstyle that this Vampire uses to pick actions.
     enemy - the Vampire that this Vampire attacks.
     """
+    __slots__ = []
     battle_queue: 'BattleQueue'
     playstyle: 'Playstyle'
+    _character_type = 'vampire'
+    _defense = 3
+    _skills = {'A': VampireAttack(),
+               'S': VampireSpecial()}
 
     def __init__(self, name: str, bq: 'BattleQueue', ps: 'Playstyle') -> None:
         """
@@ -335,10 +390,6 @@ class Vampire(Character):
         v (Vampire): 100/100
         """
         super().__init__(name, bq, ps)
-        self._character_type = 'vampire'
-        self._skills['A'] = VampireAttack()
-        self._skills['S'] = VampireSpecial()
-        self._defense = 3
 
     def copy(self, new_battle_queue: 'BattleQueue') -> 'Vampire':
         """
@@ -381,8 +432,13 @@ class Sorcerer(Character):
     playstyle - the Playstyle that this Sorcerer uses to pick actions.
     enemy - the Sorcerer that this Sorcerer attacks.
     """
+    __slots__ = ['_skill_decision_tree']
     battle_queue: 'BattleQueue'
     playstyle: 'Playstyle'
+    _character_type = 'sorcerer'
+    _defense = 10
+    _skills = {'A': SorcererAttack(),
+               'S': SorcererSpecial()}
 
     def __init__(self, name: str, bq: 'BattleQueue', ps: 'Playstyle') -> None:
         """
@@ -401,15 +457,12 @@ class Sorcerer(Character):
         s (Sorcerer): 100/100
         """
         super().__init__(name, bq, ps)
-        self._character_type = 'sorcerer'
-        self._skills['A'] = SorcererAttack()
-        self._skills['S'] = SorcererSpecial()
-        self._defense = 10
-        self._skill_decision_tree = create_default_tree()
+        self._skill_decision_tree = get_default_tree()
 
     def copy(self, new_battle_queue: 'BattleQueue') -> 'Sorcerer':
         """
         Return a copy of this Sorcerer whose BattleQueue is new_battle_queue.
+        The copy shares this Sorcerer's SkillDecisionTree.
         >>> from a2_battle_queue import BattleQueue
         >>> from a2_playstyle import ManualPlaystyle
         >>> bq = BattleQueue()
@@ -433,9 +486,14 @@ class Sorcerer(Character):
         s2 (Sorcerer): 100/100
         >>> c2_copy
         s2 (Sorcerer): 90/100
+        >>> sdt = create_default_tree()
+        >>> c.set_skill_decision_tree(sdt)
+        >>> c.copy(new_bq).get_skill_decision_tree() is sdt
+        True
         """
         copy = Sorcerer(self._name, new_battle_queue,
                         self.playstyle.copy(new_battle_queue))
+        copy.set_skill_decision_tree(self._skill_decision_tree)
         self._set_copy_attributes(copy)
         return copy
 
@@ -454,6 +512,29 @@ class Sorcerer(Character):
         SDT(5, MageAttack)
         """
         self._skill_decision_tree = skill_decision_tree
+        if self.battle_queue is not None:
+            self.battle_queue.record_identity_change()
+
+    def get_state_key(self) -> tuple:
+        """
+        Return a hashable key describing this Sorcerer's type, name, HP and
+        SP, followed by its SkillDecisionTree if it is not the default tree,
+        since a Sorcerer's tree changes the scores of its states.
+
+        >>> from a2_skill_decision_tree import SkillDecisionTree
+        >>> from a2_skills import MageSpecial
+        >>> c = Sorcerer("s", None, None)
+        >>> c.get_state_key()
+        ('sorcerer', 's', 100, 100)
+        >>> sdt = SkillDecisionTree(MageSpecial(), lambda _, __: True, 1)
+        >>> c.set_skill_decision_tree(sdt)
+        >>> c.get_state_key()[4] is sdt
+        True
+        """
+        key = super().get_state_key()
+        if self._skill_decision_tree is not get_default_tree():
+            key += (self._skill_decision_tree,)
+        return key
 
     def get_skill_decision_tree(self) -> 'SkillDecisionTree':
         """
@@ -0,0 +1,207 @@
+"""
+Unittests for the CompiledSkillDecisionTrees in A2.
+
+A CompiledSkillDecisionTree must pick exactly the same skill as the
+SkillDecisionTree it was compiled from, for every caster and target, and so
+must its pick_skill_by_stats when the tree's conditions are pure.
+"""
+import random
+import unittest
+from unittest import mock
+
+import a2_skill_decision_tree
+from a2_skill_decision_tree import SkillDecisionTree, \
+    CompiledSkillDecisionTree, create_default_tree, pure_condition, _Stats
+from a2_skills import MageAttack, MageSpecial, RogueAttack, RogueSpecial
+
+SKILLS = [MageAttack(), MageSpecial(), RogueAttack(), RogueSpecial()]
+
+# Some HPs and SPs, including those either side of the default tree's
+# thresholds.
+AMOUNTS = [0, 20, 21, 29, 30, 40, 41, 50, 51, 90, 91, 100]
+
+
+def make_condition(stat, caster, threshold, pure=False):
+    """
+    Return a condition that is True when the caster's (or target's) stat is
+    greater than threshold, declared pure if pure.
+    """
+    def condition(c, t):
+        """
+        Return True if the character's stat is greater than threshold.
+        """
+        character = c if caster else t
+        if stat == 'hp':
+            return character.get_hp() > threshold
+        return character.get_sp() > threshold
+
+    if pure:
+        return pure_condition(('caster_' if caster else 'target_') + stat)(
+            condition)
+    return condition
+
+
+def both_hp_gt(threshold):
+    """
+    Return a pure condition that depends on two stats: it is True when the
+    caster's and target's HP are both greater than threshold.
+    """
+    @pure_condition('caster_hp', 'target_hp')
+    def condition(caster, target):
+        """
+        Return True if both HPs are greater than threshold.
+        """
+        return caster.get_hp() > threshold and target.get_hp() > threshold
+    return condition
+
+
+def make_random_tree(rng, size, priorities, pure=False):
+    """
+    Return a random SkillDecisionTree with size nodes, whose priorities are
+    taken from priorities, and whose conditions are pure if pure.
+    """
+    condition = make_condition(rng.choice(['hp', 'sp']), rng.random() < 0.5,
+                               rng.choice(AMOUNTS), pure)
+    tree = SkillDecisionTree(rng.choice(SKILLS), condition, priorities.pop())
+    size -= 1
+    while size > 0:
+        child_size = rng.randint(1, size)
+        tree.children.append(make_random_tree(rng, child_size, priorities,
+                                              pure))
+        size -= child_size
+    return tree
+
+
+class CompiledSkillDecisionTreeUnitTests(unittest.TestCase):
+    def assert_same_picks(self, tree, compiled, rng, count):
+        """
+        Assert that tree and compiled pick the same skill for count random
+        casters and targets.
+        """
+        for _ in range(count):
+            caster = _Stats(rng.choice(AMOUNTS), rng.choice(AMOUNTS))
+            target = _Stats(rng.choice(AMOUNTS), rng.choice(AMOUNTS))
+            self.assertIs(compiled.pick_skill(caster, target),
+                          tree.pick_skill(caster, target))
+
+    def assert_same_picks_by_stats(self, tree, amounts):
+        """
+        Assert that tree's pick_skill_by_stats picks the same skill as
+        tree for every combination of amounts.
+        """
+        pick_skill_by_stats = tree.compile().pick_skill_by_stats
+        for caster_hp in amounts:
+            for caster_sp in amounts:
+                for target_hp in amounts:
+                    for target_sp in amounts:
+                        self.assertIs(
+                            pick_skill_by_stats(caster_hp, caster_sp,
+                                                target_hp, target_sp),
+                            tree.pick_skill(_Stats(caster_hp, caster_sp),
+                                            _Stats(target_hp, target_sp)))
+
+    def test_default_tree(self):
+        """
+        Test that the compiled default tree picks the same skill as the
+        default tree for every combination of the amounts.
+        """
+        tree = create_default_tree()
+        compiled = tree.compile()
+        for caster_hp in AMOUNTS:
+            for caster_sp in AMOUNTS:
+                for target_hp in AMOUNTS:
+                    for target_sp in AMOUNTS:
+                        caster = _Stats(caster_hp, caster_sp)
+                        target = _Stats(target_hp, target_sp)
+                        self.assertIs(compiled.pick_skill(caster, target),
+                                      tree.pick_skill(caster, target))
+
+    def test_random_trees(self):
+        """
+        Test that compiled random trees pick the same skills as the trees,
+        including when priorities are repeated.
+        """
+        rng = random.Random(0)
+        for size in range(1, 15):
+            for repeated in [False, True]:
+                priorities = list(range(size))
+                if repeated:
+                    priorities = [rng.randrange(size // 2 + 1)
+                                  for _ in range(size)]
+                rng.shuffle(priorities)
+                tree = make_random_tree(rng, size, priorities)
+                self.assert_same_picks(tree, CompiledSkillDecisionTree(tree),
+                                       rng, 200)
+
+    def test_loop_for_large_trees(self):
+        """
+        Test that trees with too many conditions to generate a function for
+        still pick the same skills.
+        """
+        rng = random.Random(1)
+        with mock.patch.object(a2_skill_decision_tree,
+                               'MAX_GENERATED_CONDITIONS', 0):
+            for size in range(2, 15):
+                priorities = list(range(size))
+                rng.shuffle(priorities)
+                tree = make_random_tree(rng, size, priorities)
+                compiled = CompiledSkillDecisionTree(tree)
+                self.assertEqual(compiled.pick_skill,
+                                 compiled._pick_skill_in_loop)
+                self.assert_same_picks(tree, compiled, rng, 200)
+
+    def test_default_tree_by_stats(self):
+        """
+        Test that the default tree's table picks the same skills as the
+        tree, including for stats outside of the table.
+        """
+        self.assert_same_picks_by_stats(create_default_tree(),
+                                        AMOUNTS + [-10, 150, 200, 201, 500])
+
+    def test_random_pure_trees_by_stats(self):
+        """
+        Test that random trees of pure conditions pick the same skills by
+        stats as the trees do.
+        """
+        rng = random.Random(2)
+        for size in range(1, 10):
+            priorities = list(range(size))
+            rng.shuffle(priorities)
+            tree = make_random_tree(rng, size, priorities, True)
+            self.assert_same_picks_by_stats(tree, AMOUNTS[::2] + [300])
+
+    def test_memo_for_conditions_of_several_stats(self):
+        """
+        Test that a tree with conditions that depend on more than one stat
+        each still picks the same skills by stats.
+        """
+        tree = SkillDecisionTree(MageAttack(), both_hp_gt(50), 2, [
+            SkillDecisionTree(RogueAttack(), both_hp_gt(90), 1, [
+                SkillDecisionTree(MageSpecial(), both_hp_gt(0), 3)])])
+        self.assert_same_picks_by_stats(tree, AMOUNTS)
+        self.assertTrue(hasattr(tree.compile().pick_skill_by_stats,
+                                'cache_info'))
+
+    def test_no_pick_by_stats_for_impure_trees(self):
+        """
+        Test that trees with conditions that are not declared pure cannot
+        pick by stats, unless those conditions are never checked.
+        """
+        leaf = SkillDecisionTree(RogueAttack(),
+                                 make_condition('hp', True, 50), 1)
+        self.assertIsNotNone(leaf.compile().pick_skill_by_stats)
+        tree = SkillDecisionTree(MageAttack(), make_condition('hp', True, 50),
+                                 2, [leaf])
+        self.assertIsNone(tree.compile().pick_skill_by_stats)
+
+    def test_compile_is_cached(self):
+        """
+        Test that compiling a tree twice gives the same
+        CompiledSkillDecisionTree.
+        """
+        tree = create_default_tree()
+        self.assertIs(tree.compile(), tree.compile())
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,112 @@
+"""
+Redrawing only the parts of the screen that changed, for a2_ui.
+
+a2_ui describes each frame as a list of layers: surfaces and where to blit
+them, from the back to the front. The surfaces come from a SpriteCache, so a
+layer that has not changed is the very same surface at the same position as
+in the last frame, and the list of layers is the frame's change signature.
+
+A DirtyRenderer compares each frame's layers with the last frame's. Only the
+areas covered by a layer that changed (where it was and where it is now)
+are cleared and redrawn, by blitting every layer clipped to them, and only
+those areas are sent to the display with pygame.display.update. A frame
+where nothing changed draws nothing at all.
+"""
+from typing import List, Optional, Tuple
+import pygame
+
+# A layer of a frame: a surface, and the position of its top-left corner.
+Layer = Tuple[pygame.Surface, Tuple[int, int]]
+
+
+class DirtyRenderer:
+    """
+    Draws frames on screen, redrawing only what changed since the last one.
+
+    screen - the surface that frames are drawn on.
+    colour - the colour that areas are cleared to before they are redrawn.
+    """
+    screen: pygame.Surface
+    colour: Tuple[int, int, int]
+    _layers: Optional[List[Layer]]
+
+    def __init__(self, screen: pygame.Surface,
+                 colour: Tuple[int, int, int] = (255, 255, 255)) -> None:
+        """
+        Initialize this DirtyRenderer, which has not drawn any frames yet.
+        """
+        self.screen = screen
+        self.colour = colour
+        self._layers = None
+
+    def invalidate(self) -> None:
+        """
+        Make the next frame redraw the whole screen (for example, after the
+        window was uncovered).
+        """
+        self._layers = None
+
+    def render(self, layers: List[Layer]) -> List[pygame.Rect]:
+        """
+        Draw the frame made of layers, redrawing only the areas where it is
+        different from the last frame, and return those areas. These are
+        the areas to pass to pygame.display.update.
+        """
+        dirty = _merge(self._get_changes(layers))
+        for rect in dirty:
+            self.screen.set_clip(rect)
+            self.screen.fill(self.colour)
+            for surface, position in layers:
+                self.screen.blit(surface, position)
+        self.screen.set_clip(None)
+        self._layers = list(layers)
+        return dirty
+
+    def _get_changes(self, layers: List[Layer]) -> List[pygame.Rect]:
+        """
+        Return the areas covered by the layers that are not the same as the
+        layers of the last frame, both where they were and where they are.
+        """
+        if self._layers is None:
+            return [self.screen.get_rect()]
+
+        changes = []
+        for index in range(max(len(layers), len(self._layers))):
+            old = self._layers[index] if index < len(self._layers) else None
+            new = layers[index] if index < len(layers) else None
+            if old is not None and new is not None and old[0] is new[0] \
+                    and old[1] == new[1]:
+                continue
+            for layer in [old, new]:
+                if layer is not None:
+                    changes.append(layer[0].get_rect(topleft=layer[1]))
+        return [rect.clip(self.screen.get_rect()) for rect in changes
+                if rect.colliderect(self.screen.get_rect())]
+
+
+def _merge(rects: List[pygame.Rect]) -> List[pygame.Rect]:
+    """
+    Return rects with every group of overlapping rects replaced by the
+    smallest rect that covers them, so that no area is redrawn twice.
+
+    >>> _merge([pygame.Rect(0, 0, 10, 10), pygame.Rect(5, 5, 10, 10),
+    ...         pygame.Rect(50, 0, 5, 5)])
+    [<rect(0, 0, 15, 15)>, <rect(50, 0, 5, 5)>]
+    """
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        overlapping = [other for other in merged if other.colliderect(rect)]
+        while overlapping:
+            for other in overlapping:
+                merged.remove(other)
+            rect = rect.unionall(overlapping)
+            overlapping = [other for other in merged
+                           if other.colliderect(rect)]
+        merged.append(rect)
+    return merged
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
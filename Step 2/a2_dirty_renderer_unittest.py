@@ -0,0 +1,124 @@
+"""
+Unittests for the DirtyRenderer used by a2_ui.
+
+A DirtyRenderer must leave the screen exactly as drawing every layer from
+scratch would, while only redrawing (and returning) the areas that changed.
+These tests are skipped if pygame is not installed.
+"""
+import random
+import unittest
+
+try:
+    import pygame
+    from a2_dirty_renderer import DirtyRenderer
+except ImportError:
+    pygame = None
+
+SIZE = (60, 40)
+WHITE = (255, 255, 255)
+
+
+def make_surface(colour, size):
+    """
+    Return a new surface of size filled with colour.
+    """
+    surface = pygame.Surface(size)
+    surface.fill(colour)
+    return surface
+
+
+def draw_from_scratch(layers):
+    """
+    Return a new surface with every one of layers drawn on white.
+    """
+    screen = make_surface(WHITE, SIZE)
+    for surface, position in layers:
+        screen.blit(surface, position)
+    return screen
+
+
+@unittest.skipIf(pygame is None, 'pygame is not installed')
+class DirtyRendererUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a screen, a DirtyRenderer for it, and some surfaces to draw.
+        """
+        self.screen = make_surface((0, 0, 0), SIZE)
+        self.renderer = DirtyRenderer(self.screen, WHITE)
+        self.surfaces = [make_surface((10 * i, 200 - 10 * i, 50), (12, 8))
+                         for i in range(6)]
+
+    def assert_same_screen(self, layers):
+        """
+        Assert that the screen looks the same as layers drawn from scratch.
+        """
+        expected = draw_from_scratch(layers)
+        self.assertEqual(pygame.image.tobytes(self.screen, 'RGB'),
+                         pygame.image.tobytes(expected, 'RGB'))
+
+    def test_first_frame_is_drawn_whole(self):
+        """
+        Test that the first frame redraws the whole screen.
+        """
+        layers = [(self.surfaces[0], (5, 5))]
+        self.assertEqual(self.renderer.render(layers),
+                         [pygame.Rect((0, 0), SIZE)])
+        self.assert_same_screen(layers)
+
+    def test_unchanged_frame_draws_nothing(self):
+        """
+        Test that a frame with the same layers as the last one draws
+        nothing.
+        """
+        layers = [(self.surfaces[0], (5, 5)), (self.surfaces[1], (10, 8))]
+        self.renderer.render(layers)
+        self.screen.fill((1, 2, 3))
+        self.assertEqual(self.renderer.render(list(layers)), [])
+        self.assertEqual(self.screen.get_at((0, 0)), (1, 2, 3))
+
+    def test_only_changes_are_redrawn(self):
+        """
+        Test that only where a layer was and is now are redrawn.
+        """
+        self.renderer.render([(self.surfaces[0], (0, 0)),
+                              (self.surfaces[1], (40, 30))])
+        dirty = self.renderer.render([(self.surfaces[0], (0, 0)),
+                                      (self.surfaces[2], (45, 30))])
+        self.assertEqual(dirty, [pygame.Rect(40, 30, 17, 8)])
+
+    def test_invalidate(self):
+        """
+        Test that the frame after invalidate redraws the whole screen.
+        """
+        layers = [(self.surfaces[0], (5, 5))]
+        self.renderer.render(layers)
+        self.renderer.invalidate()
+        self.assertEqual(self.renderer.render(layers),
+                         [pygame.Rect((0, 0), SIZE)])
+
+    def test_random_frames(self):
+        """
+        Test that random frames (with layers that change, move, overlap,
+        leave the screen, and come and go) always look like they were drawn
+        from scratch.
+        """
+        rng = random.Random(0)
+        layers = []
+        for _ in range(300):
+            layers = list(layers)
+            change = rng.random()
+            if change < 0.3 and len(layers) < 8:
+                layers.insert(rng.randint(0, len(layers)),
+                              (rng.choice(self.surfaces),
+                               (rng.randint(-10, 60), rng.randint(-5, 40))))
+            elif change < 0.5 and layers:
+                layers.pop(rng.randrange(len(layers)))
+            elif change < 0.8 and layers:
+                index = rng.randrange(len(layers))
+                layers[index] = (rng.choice(self.surfaces), layers[index][1])
+            self.renderer.render(layers)
+            self.assert_same_screen(layers)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -10,7 +10,8 @@ We will not grade the documentation of this file.
 """
 # Import classes as needed
 from a2_battle_queue import BattleQueue, RestrictedBattleQueue
-from a2_playstyle import ManualPlaystyle, RandomPlaystyle, MinimaxRecursive, MinimaxIterative
+from a2_playstyle import ManualPlaystyle, RandomPlaystyle, MinimaxRecursive, MinimaxIterative, \
+    MinimaxAlphaBeta, MinimaxTimed, TablebasePlaystyle
 from a2_characters import Mage, Rogue, Vampire, Sorcerer
 from a2_skill_decision_tree import create_default_tree
 
@@ -26,10 +27,16 @@ CHARACTER_CLASSES = {'m': Mage,
 # Replace None with the name of your Playstyle classes
 # mr should map to your class for your recursive minimax playstyle
 # mi should map to your class for your iterative minimax playstyle
+# ma maps to minimax with alpha-beta pruning
+# mt maps to minimax with iterative deepening and a time budget per move
+# tb maps to looking moves up in the tablebases made by a2_tablebase.py
 PLAYSTYLE_CLASSES = {'m': ManualPlaystyle,
                      'r': RandomPlaystyle,
                      'mr': MinimaxRecursive,
-                     'mi': MinimaxIterative
+                     'mi': MinimaxIterative,
+                     'ma': MinimaxAlphaBeta,
+                     'mt': MinimaxTimed,
+                     'tb': TablebasePlaystyle
                     }
 
 BATTLE_QUEUE_CLASSES = {'n': BattleQueue,
@@ -115,7 +122,10 @@ def set_up_game():
         player_1_playstyle = input("Select a playstyle for the first " +
                                    "character (m for Manual, r for Random, " +
                                    "mr for Minimax (Recursive), " +
-                                   "mi for Minimax (Iterative)): ")
+                                   "mi for Minimax (Iterative), " +
+                                   "ma for Minimax (Alpha-Beta), " +
+                                   "mt for Minimax (Timed), " +
+                                   "tb for Tablebase): ")
         player_1_playstyle = player_1_playstyle.strip()
         
     # Get the parameters for the second character
@@ -133,7 +143,10 @@ def set_up_game():
         player_2_playstyle = input("Select a playstyle for the second " +
                                    "character (m for Manual, r for Random, " +
                                    "mr for Minimax (Recursive), " +
-                                   "mi for Minimax (Iterative)): ")
+                                   "mi for Minimax (Iterative), " +
+                                   "ma for Minimax (Alpha-Beta), " +
+                                   "mt for Minimax (Timed), " +
+                                   "tb for Tablebase): ")
         player_2_playstyle = player_2_playstyle.strip()
     
     # Store the classes in other variable names for convenience
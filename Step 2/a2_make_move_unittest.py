@@ -0,0 +1,122 @@
+"""
+Unittests for BattleQueue.make_move and BattleQueue.unmake_move in A2.
+
+Every skill in a2_skills must be fully reverted by unmake_move, so that
+searches can make moves in place instead of copying the BattleQueue.
+"""
+import unittest
+
+from a2_game import CHARACTER_CLASSES
+from a2_alpha_beta_benchmark import set_up_matchup
+from a2_playstyle import get_state_score, \
+    get_state_score_iterative, get_state_score_alpha_beta
+from a2_battle_queue import BattleQueue, RestrictedBattleQueue
+
+
+
+class MakeMoveUnitTests(unittest.TestCase):
+    def assert_reverted(self, bq, moves):
+        """
+        Assert that making moves one after another in bq, and then unmaking
+        them all, leaves bq exactly as it was.
+        """
+        before = bq.get_state_key()
+        made = 0
+
+        for move in moves:
+            if bq.is_over() or move not in bq.peek().get_available_actions():
+                break
+            bq.make_move(move)
+            made += 1
+
+        for _ in range(made):
+            bq.unmake_move()
+
+        self.assertEqual(before, bq.get_state_key(),
+                         "Moves {} were not reverted".format(moves[:made]))
+
+    def test_every_skill_is_reverted(self):
+        """
+        Test that every skill of every character is reverted, in both kinds
+        of BattleQueue.
+        """
+        for battle_queue_class in [BattleQueue, RestrictedBattleQueue]:
+            for p1_key in CHARACTER_CLASSES:
+                for p2_key in CHARACTER_CLASSES:
+                    for moves in [['A'], ['S'], ['S', 'S', 'A'],
+                                  ['A', 'S', 'S', 'A', 'S']]:
+                        bq = set_up_matchup(p1_key, p2_key, 100,
+                                            battle_queue_class)
+                        self.assert_reverted(bq, moves)
+
+    def test_make_move_changes_state(self):
+        """
+        Test that make_move has the same effect as removing the character and
+        having them attack.
+        """
+        bq = set_up_matchup('v', 's')
+        expected = bq.copy()
+        expected.remove().special_attack()
+
+        actor = bq.make_move('S')
+
+        self.assertEqual(actor.get_name(), "p1")
+        self.assertEqual(repr(bq), repr(expected))
+
+    def test_make_move_keeps_sprite(self):
+        """
+        Test that make_move does not change the sprite that will be drawn.
+        """
+        bq = set_up_matchup('m', 'r')
+        actor = bq.peek()
+
+        bq.make_move('A')
+        bq.unmake_move()
+
+        self.assertEqual(actor.get_next_sprite(), 'mage_idle_0')
+
+    def test_pass_only_removes(self):
+        """
+        Test that an action other than 'A' or 'S' only removes the character.
+        """
+        bq = set_up_matchup('m', 'r')
+        bq.make_move('X')
+        self.assertEqual(repr(bq), "p2 (Rogue): 100/100")
+        bq.unmake_move()
+        self.assertEqual(repr(bq),
+                         "p1 (Mage): 100/100 -> p2 (Rogue): 100/100")
+
+    def test_characters_without_queue(self):
+        """
+        Test that a Character that is not in a BattleQueue can still have
+        its HP and SP changed, since there are no changes to record.
+        """
+        for character_class in CHARACTER_CLASSES.values():
+            character = character_class('c', None, None)
+            character.set_hp(50)
+            character.set_sp(40)
+            character.reduce_sp(10)
+            character.apply_damage(20)
+            self.assertEqual(character.get_sp(), 30)
+            self.assertEqual(character.get_hp(),
+                             30 + character.get_defense())
+
+    def test_search_leaves_battle_queue_unchanged(self):
+        """
+        Test that searching a BattleQueue in place leaves it unchanged.
+        """
+        for battle_queue_class in [BattleQueue, RestrictedBattleQueue]:
+            bq = set_up_matchup('r', 's',
+                                battle_queue_class=battle_queue_class)
+            for character in [bq.peek(), bq.peek().enemy]:
+                character.set_hp(30)
+            before = bq.get_state_key()
+
+            for function in [get_state_score, get_state_score_iterative,
+                             get_state_score_alpha_beta]:
+                function(bq, None)
+                self.assertEqual(before, bq.get_state_key())
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
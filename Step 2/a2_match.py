@@ -0,0 +1,271 @@
+"""
+Headless matches for A2: play games to the end without the UI, input() or
+the globals in a2_game.
+
+    >>> from a2_characters import Rogue, Vampire
+    >>> from a2_playstyle import RandomPlaystyle
+    >>> result = simulate(Rogue, Vampire, RandomPlaystyle, RandomPlaystyle,
+    ...                   seed=1)
+    >>> result == simulate(Rogue, Vampire, RandomPlaystyle, RandomPlaystyle,
+    ...                    seed=1)
+    True
+    >>> result.trace[0]
+    (100, 100, 100, 100)
+    >>> len(result.trace) == result.turns + 1
+    True
+"""
+from typing import List, NamedTuple, Optional, Tuple
+import random
+from a2_battle_queue import BattleQueue
+from a2_characters import Sorcerer
+from a2_playstyle import RandomPlaystyle
+from a2_skill_decision_tree import get_default_tree
+
+
+class MatchResult(NamedTuple):
+    """
+    The result of a finished Match.
+
+    winner - 0 if p1 won, 1 if p2 won, or None for a tie.
+    turns - the number of turns played.
+    moves - the action performed on each turn ('A' or 'S'), in order.
+    players - who acted on each turn (0 for p1, 1 for p2), in order.
+    trace - (p1 HP, p1 SP, p2 HP, p2 SP) at the start and after every turn.
+    invalid_moves - how many times a playstyle picked an action its
+                    character could not perform (see Match.play).
+    """
+    winner: Optional[int]
+    turns: int
+    moves: str
+    players: Tuple[int, ...]
+    trace: Tuple[Tuple[int, int, int, int], ...]
+    invalid_moves: int
+
+
+class Match:
+    """
+    A game between two characters that is played without any I/O.
+
+    battle_queue - the BattleQueue the game is played in.
+    p1, p2 - the characters, where p1 is added to battle_queue first.
+    rng - the random number generator used by RandomPlaystyles.
+    recorder - None, or the ReplayWriter (from a2_replay) that each turn is
+               recorded with.
+    """
+    battle_queue: BattleQueue
+    p1: 'Character'
+    p2: 'Character'
+    rng: random.Random
+    _moves: List[str]
+    _players: List[int]
+    _trace: List[Tuple[int, int, int, int]]
+    _invalid_moves: int
+    recorder: Optional['ReplayWriter']
+
+    def __init__(self, p1_class: type, p2_class: type,
+                 p1_playstyle_class: type, p2_playstyle_class: type,
+                 battle_queue_class: type = BattleQueue, seed: int = None,
+                 names: Tuple[str, str] = ('p1', 'p2')) -> None:
+        """
+        Initialize this Match between a character of p1_class using
+        p1_playstyle_class and one of p2_class using p2_playstyle_class, in a
+        new BattleQueue of battle_queue_class. RandomPlaystyles pick their
+        attacks with a random number generator seeded with seed.
+
+        The names must be different, since Minimax playstyles tell the
+        characters apart by name.
+
+        >>> from a2_characters import Mage, Rogue
+        >>> from a2_playstyle import MinimaxRecursive
+        >>> match = Match(Mage, Rogue, MinimaxRecursive, RandomPlaystyle)
+        >>> match.battle_queue
+        p1 (Mage): 100/100 -> p2 (Rogue): 100/100
+        """
+        if names[0] == names[1]:
+            raise ValueError('The characters must have different names')
+
+        self.rng = random.Random(seed)
+        self.battle_queue = battle_queue_class()
+        characters = []
+        for character_class, playstyle_class, name in \
+                [(p1_class, p1_playstyle_class, names[0]),
+                 (p2_class, p2_playstyle_class, names[1])]:
+            playstyle = playstyle_class(self.battle_queue)
+            if isinstance(playstyle, RandomPlaystyle):
+                playstyle.rng = self.rng
+            character = character_class(name, self.battle_queue, playstyle)
+            if isinstance(character, Sorcerer):
+                character.set_skill_decision_tree(get_default_tree())
+            characters.append(character)
+
+        self.p1, self.p2 = characters
+        self.p1.enemy = self.p2
+        self.p2.enemy = self.p1
+        self.battle_queue.add(self.p1)
+        self.battle_queue.add(self.p2)
+
+        self._moves = []
+        self._players = []
+        self._trace = [self._get_stats()]
+        self._invalid_moves = 0
+        self.recorder = None
+
+    def _get_stats(self) -> Tuple[int, int, int, int]:
+        """
+        Return (p1 HP, p1 SP, p2 HP, p2 SP).
+        """
+        return (self.p1.get_hp(), self.p1.get_sp(), self.p2.get_hp(),
+                self.p2.get_sp())
+
+    def is_over(self) -> bool:
+        """
+        Return whether the game in this Match is over.
+        """
+        return self.battle_queue.is_over()
+
+    def get_winner(self) -> Optional[int]:
+        """
+        Return 0 if p1 has won, 1 if p2 has won, or None if the game is not
+        over or is a tie.
+        """
+        winner = self.battle_queue.get_winner()
+        if winner is None:
+            return None
+        return 0 if winner is self.p1 else 1
+
+    def play_turn(self, key: str = None) -> Optional[str]:
+        """
+        Have the next character use their playstyle to pick and perform an
+        attack, the same way perform_attack in a2_game does. key is passed to
+        a ManualPlaystyle as the key pressed.
+
+        Return the action performed, or None if the playstyle picked an
+        action the character cannot perform (in which case nothing happens).
+
+        >>> from a2_characters import Mage, Rogue
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> match = Match(Mage, Rogue, ManualPlaystyle, ManualPlaystyle)
+        >>> match.play_turn('S')
+        'S'
+        >>> match.play_turn('X') is None
+        True
+        >>> match.battle_queue
+        p2 (Rogue): 70/100 -> p2 (Rogue): 70/100 -> p1 (Mage): 100/70
+        """
+        playstyle = self.battle_queue.peek().playstyle
+        if playstyle.is_manual:
+            move = playstyle.select_attack(key)
+        else:
+            move = playstyle.select_attack()
+        return move if self.perform(move) else None
+
+    def perform(self, move: str) -> bool:
+        """
+        Have the next character perform move, which was picked somewhere
+        else (such as on another thread), and return whether they could.
+
+        >>> from a2_characters import Mage, Rogue
+        >>> from a2_playstyle import ManualPlaystyle
+        >>> match = Match(Mage, Rogue, ManualPlaystyle, ManualPlaystyle)
+        >>> match.perform('A'), match.perform('X')
+        (True, False)
+        >>> match.get_result().moves
+        'A'
+        """
+        character = self.battle_queue.peek()
+        if not character.is_valid_action(move):
+            return False
+        self._perform(character, move)
+        return True
+
+    def _perform(self, character: 'Character', move: str) -> None:
+        """
+        Have character, who is next in the queue, perform move, and record
+        the turn.
+        """
+        perform_move(self.battle_queue, move)
+        player = 0 if character is self.p1 else 1
+        self._moves.append(move)
+        self._players.append(player)
+        self._trace.append(self._get_stats())
+        if self.recorder is not None:
+            self.recorder.record(player, move, self.battle_queue)
+
+    def play(self) -> MatchResult:
+        """
+        Play the game in this Match until it is over, and return the result.
+
+        A playstyle that picks an action its character cannot perform would
+        make the game stall, so its character performs their first
+        available action instead, and the invalid move is counted.
+
+        Raise ValueError if a character with a ManualPlaystyle has to act,
+        since there are no keys to press.
+        """
+        while not self.battle_queue.is_over():
+            character = self.battle_queue.peek()
+            if character.playstyle.is_manual:
+                raise ValueError('{} needs a key to be pressed'.format(
+                    character.get_name()))
+
+            move = character.playstyle.select_attack()
+            if not character.is_valid_action(move):
+                self._invalid_moves += 1
+                move = character.get_available_actions()[0]
+            self._perform(character, move)
+
+        return self.get_result()
+
+    def get_result(self) -> MatchResult:
+        """
+        Return the result of the turns played so far in this Match.
+        """
+        return MatchResult(self.get_winner(), len(self._moves),
+                           ''.join(self._moves), tuple(self._players),
+                           tuple(self._trace), self._invalid_moves)
+
+
+def perform_move(battle_queue: BattleQueue, move: str) -> 'Character':
+    """
+    Have the next character in battle_queue perform move ('A' for attack,
+    anything else for special attack), the same way perform_attack in
+    a2_game does, and return them. The move is not checked.
+
+    >>> from a2_characters import Mage, Rogue
+    >>> match = Match(Mage, Rogue, RandomPlaystyle, RandomPlaystyle)
+    >>> perform_move(match.battle_queue, 'S')
+    p1 (Mage): 100/70
+    >>> match.battle_queue
+    p2 (Rogue): 70/100 -> p2 (Rogue): 70/100 -> p1 (Mage): 100/70
+    """
+    character = battle_queue.peek()
+    if move == 'A':
+        character.attack()
+    else:
+        character.special_attack()
+    if character.get_available_actions():
+        battle_queue.remove()
+    return character
+
+
+def simulate(p1_class: type, p2_class: type, p1_playstyle_class: type,
+             p2_playstyle_class: type, battle_queue_class: type = BattleQueue,
+             seed: int = None) -> MatchResult:
+    """
+    Play a Match between a character of p1_class using p1_playstyle_class and
+    one of p2_class using p2_playstyle_class, in a BattleQueue of
+    battle_queue_class, with RandomPlaystyles seeded with seed, and return
+    the result.
+
+    >>> from a2_characters import Mage, Rogue
+    >>> from a2_playstyle import MinimaxRecursive
+    >>> simulate(Mage, Rogue, MinimaxRecursive, MinimaxRecursive).winner
+    1
+    """
+    return Match(p1_class, p2_class, p1_playstyle_class, p2_playstyle_class,
+                 battle_queue_class, seed).play()
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
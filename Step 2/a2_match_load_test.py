@@ -0,0 +1,307 @@
+"""
+A load test of a2_match_server: keep thousands of rooms playing at once, and
+print how long the server takes to answer moves as it goes.
+
+    python a2_match_load_test.py --rooms 2000 --connections 20 \\
+        --think 1 --duration 30 --ai r --spawn
+    python a2_match_load_test.py --rooms 200 --connections 4 \\
+        --think 1 --duration 30 --ai ma --workers 4 --spawn
+
+Each room is a game between a random pair of characters in which the load
+test picks p1's moves at random, and the server picks p2's with the --ai
+playstyle. Like a player, the load test waits --think seconds (on average)
+after it is p1's turn before moving, so the rooms ask for about
+rooms / think moves a second between them. A room whose game is over is
+replaced by a new one, so the number of rooms stays the same. The latency of
+a move is the time from sending it to getting back the state after it, and
+the latency of an AI move is the time from getting the state in which it is
+p2's turn to getting the state after p2's move. Once a second, the number of
+moves answered, the number of AI moves being picked, and the percentiles of
+both latencies are printed, so that a latency that grows as the test goes on
+shows up.
+
+The server picks the moves of a RandomPlaystyle ('r') on its event loop, so
+only a searching --ai (such as 'mr' or 'ma') has its moves picked in the
+server's pool of workers, and shows how the rooms are served while searches
+are running.
+
+With --spawn, a server is started (and stopped at the end) on --port on this
+machine. Otherwise a2_match_server.py must already be running there.
+"""
+from typing import Dict, List, Tuple
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from a2_game import CHARACTER_CLASSES
+
+
+class Connection:
+    """
+    One client connection to a match server, playing p1 in many rooms.
+
+    reader, writer - the connection's streams.
+    ai - the key of the playstyle the server plays p2 with.
+    think - the average number of seconds to wait before each move.
+    rng - picks each room's characters, p1's moves, and how long to wait
+          before them.
+    latencies - the latency of every answered move since the last report,
+                in seconds.
+    ai_latencies - the latency of every AI move since the last report, in
+                   seconds.
+    games - the number of games finished since the last report.
+    _sent - when the move now waiting for an answer was sent, by room.
+    _waiting - when it became p2's turn, by the rooms waiting for an AI move.
+    """
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    ai: str
+    think: float
+    rng: random.Random
+    latencies: List[float]
+    ai_latencies: List[float]
+    games: int
+    _sent: Dict[int, float]
+    _waiting: Dict[int, float]
+
+    def __init__(self, reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter, ai: str, think: float,
+                 seed: int) -> None:
+        """
+        Initialize this Connection, which is not in any rooms yet.
+        """
+        self.reader = reader
+        self.writer = writer
+        self.ai = ai
+        self.think = think
+        self.rng = random.Random(seed)
+        self.latencies = []
+        self.ai_latencies = []
+        self.games = 0
+        self._sent = {}
+        self._waiting = {}
+
+    def send(self, message: dict) -> None:
+        """
+        Send message to the server.
+        """
+        self.writer.write(json.dumps(message).encode() + b'\n')
+
+    def new_room(self) -> None:
+        """
+        Ask the server for a new room.
+        """
+        keys = list(CHARACTER_CLASSES)
+        self.send({'type': 'new', 'p1': self.rng.choice(keys),
+                   'p2': self.rng.choice(keys), 'ps1': 'm', 'ps2': self.ai,
+                   'seed': self.rng.randrange(1 << 30), 'player': 0})
+
+    async def play(self) -> None:
+        """
+        Answer the states the server sends until the connection is closed:
+        pick p1's moves, time the answers to them and the AI's moves, and
+        replace the rooms whose games are over.
+        """
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                return
+            message = json.loads(line)
+            if message['type'] == 'error':
+                raise RuntimeError(message['message'])
+
+            room_id = message['room']
+            now = time.perf_counter()
+            sent = self._sent.pop(room_id, None)
+            if sent is not None:
+                self.latencies.append(now - sent)
+            waiting = self._waiting.pop(room_id, None)
+            if waiting is not None:
+                self.ai_latencies.append(now - waiting)
+            if message['over']:
+                self.games += 1
+                self.new_room()
+            elif message['next'] == 0:
+                move = self.rng.choice(message['actions'])
+                if self.think > 0:
+                    asyncio.get_running_loop().call_later(
+                        self.rng.uniform(0, 2 * self.think), self.move,
+                        room_id, move)
+                else:
+                    self.move(room_id, move)
+            else:
+                self._waiting[room_id] = now
+
+    def move(self, room_id: int, move: str) -> None:
+        """
+        Send move for p1 in the room numbered room_id, and start timing the
+        answer. Nothing is sent once the connection is closed.
+        """
+        if self.writer.is_closing():
+            return
+        self._sent[room_id] = time.perf_counter()
+        self.send({'type': 'move', 'room': room_id, 'move': move})
+
+
+def get_percentile(values: List[float], percentile: float) -> float:
+    """
+    Return the value percentile percent of the way through sorted values.
+
+    >>> get_percentile([1, 2, 3, 4, 5], 50)
+    3
+    >>> get_percentile([1, 2, 3, 4, 5], 99)
+    5
+    """
+    return values[min(len(values) - 1, int(len(values) * percentile / 100))]
+
+
+def format_latencies(latencies: List[float]) -> str:
+    """
+    Return the p50, p99 and max of sorted latencies (in seconds) in
+    milliseconds, in columns.
+
+    >>> format_latencies([0.001, 0.002, 0.004])
+    '    2.00     4.00     4.00'
+    >>> format_latencies([])
+    '       -        -        -'
+    """
+    if not latencies:
+        return '{:>8} {:>8} {:>8}'.format('-', '-', '-')
+    return '{:>8.2f} {:>8.2f} {:>8.2f}'.format(
+        get_percentile(latencies, 50) * 1000,
+        get_percentile(latencies, 99) * 1000, latencies[-1] * 1000)
+
+
+async def report(connections: List[Connection], duration: float) \
+        -> Tuple[List[float], List[float]]:
+    """
+    Print what connections have done once a second for duration seconds,
+    and return all of the latencies of moves and of AI moves, sorted.
+    """
+    print('{:>4} {:>8} {:>6} {:>6} {:>8} {:>8} {:>8} {:>8} {:>8} {:>8}'.format(
+        'time', 'moves/s', 'games', 'ai', 'p50 ms', 'p99 ms', 'max ms',
+        'ai p50', 'ai p99', 'ai max'))
+    every_latency = []
+    every_ai_latency = []
+    start = time.perf_counter()
+    for second in range(1, int(duration) + 1):
+        await asyncio.sleep(start + second - time.perf_counter())
+        latencies = sorted(latency for connection in connections
+                           for latency in connection.latencies)
+        ai_latencies = sorted(latency for connection in connections
+                              for latency in connection.ai_latencies)
+        games = sum(connection.games for connection in connections)
+        waiting = sum(len(connection._waiting) for connection in connections)
+        for connection in connections:
+            connection.latencies = []
+            connection.ai_latencies = []
+            connection.games = 0
+        every_latency.extend(latencies)
+        every_ai_latency.extend(ai_latencies)
+        print('{:>4} {:>8} {:>6} {:>6} {} {}'.format(
+            second, len(latencies), games, waiting,
+            format_latencies(latencies), format_latencies(ai_latencies)))
+    return sorted(every_latency), sorted(every_ai_latency)
+
+
+async def connect(host: str, port: int, timeout: float) \
+        -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """
+    Return the streams of a connection to host and port, trying again until
+    timeout seconds have passed (while a spawned server starts up).
+    """
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            return await asyncio.open_connection(host, port)
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def run(args: argparse.Namespace) -> None:
+    """
+    Run the load test described by args.
+    """
+    connections = []
+    for index in range(args.connections):
+        reader, writer = await connect(args.host, args.port, 10)
+        connections.append(Connection(reader, writer, args.ai, args.think,
+                                      args.seed + index))
+    for index in range(args.rooms):
+        connections[index % len(connections)].new_room()
+
+    tasks = [asyncio.ensure_future(connection.play())
+             for connection in connections]
+    latencies, ai_latencies = await report(connections, args.duration)
+    for task in tasks:
+        if task.done():
+            task.result()
+        task.cancel()
+    for connection in connections:
+        connection.writer.close()
+
+    for name, values in [('moves', latencies), ('AI moves', ai_latencies)]:
+        if values:
+            print('{} rooms: {} {} answered, p50 {:.2f} ms, p99 {:.2f} ms, '
+                  'max {:.2f} ms'.format(
+                      args.rooms, len(values), name,
+                      get_percentile(values, 50) * 1000,
+                      get_percentile(values, 99) * 1000,
+                      values[-1] * 1000))
+
+
+def main() -> None:
+    """
+    Run the load test with the options from the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description='Play many rooms at once against a match server.')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='the address of the server')
+    parser.add_argument('--port', type=int, default=8765,
+                        help='the port of the server')
+    parser.add_argument('--rooms', type=int, default=2000,
+                        help='the number of rooms to keep playing')
+    parser.add_argument('--connections', type=int, default=20,
+                        help='the number of connections to share them')
+    parser.add_argument('--duration', type=float, default=30,
+                        help='how many seconds to run for')
+    parser.add_argument('--think', type=float, default=1,
+                        help='the average seconds to wait before each move '
+                             '(0 to move as soon as possible)')
+    parser.add_argument('--ai', default='r',
+                        help="the key of p2's playstyle (a searching one, "
+                             "such as 'mr' or 'ma', to test the workers)")
+    parser.add_argument('--seed', type=int, default=0,
+                        help='the seed of the random moves and characters')
+    parser.add_argument('--spawn', action='store_true',
+                        help='start a server on this machine to test')
+    parser.add_argument('--workers', type=int, default=4,
+                        help="the spawned server's number of workers")
+    parser.add_argument('--threads', action='store_true',
+                        help='have the spawned server use threads rather '
+                             'than processes as its workers')
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        command = [sys.executable, 'a2_match_server.py', '--host', args.host,
+                   '--port', str(args.port), '--workers', str(args.workers)]
+        if args.threads:
+            command.append('--threads')
+        server = subprocess.Popen(command)
+    try:
+        asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,511 @@
+"""
+A server that hosts many A2 matches at once, for human or bot clients
+connected over TCP.
+
+    python a2_match_server.py --host 127.0.0.1 --port 8765 --workers 4
+
+Every room holds its own Match, and so its own BattleQueue and characters,
+rather than the globals in a2_game. Clients and the server send each other
+JSON objects, one per line. A client sends:
+
+    {"type": "new", "p1": "m", "p2": "r", "ps1": "m", "ps2": "ma",
+     "queue": "n", "seed": 0, "player": 0}
+        Make a room for a match between characters of the classes p1 and p2
+        using the playstyles ps1 and ps2 (keys of CHARACTER_CLASSES and
+        PLAYSTYLE_CLASSES), in a battle queue of the class queue (a key of
+        BATTLE_QUEUE_CLASSES, 'n' by default). RandomPlaystyles are seeded
+        with seed. The client picks the moves of p1 (player 0) or p2
+        (player 1) if their playstyle is manual, or both without player.
+        ps1 and ps2 are 'm' by default.
+    {"type": "join", "room": 3, "player": 1}
+        Join room 3 to pick the moves of p2, or to watch without player.
+    {"type": "move", "room": 3, "move": "A"}
+        Perform 'A' or 'S' for the next character in room 3.
+    {"type": "leave", "room": 3}
+        Stop picking moves in (and watching) room 3.
+
+The server sends the state of a room to every client in it when the room is
+made or joined and after every move, and an error for a request it cannot
+carry out:
+
+    {"type": "state", "room": 3, "turn": 5, "last": "A", "next": 1,
+     "actions": ["A", "S"], "hp": [80, 72], "sp": [55, 100], "over": false,
+     "winner": null}
+    {"type": "error", "room": 3, "message": "It is not your turn"}
+
+The first state of each new room is sent before the replies to any later
+requests from that client, so a client can tell its rooms apart by the order
+it asked for them. next and winner are 0 for p1 and 1 for p2 (next is null
+once the game is over, and so is winner for a tie). A room is closed once its
+game is over, or once every client in it has left.
+
+Moves of the non-manual playstyles that search (all but QUICK_PLAYSTYLES)
+are picked on a copy of the room's BattleQueue in an executor, so that the
+event loop keeps serving the other rooms while they are searched. serve
+picks them in a pool of processes by default, so that --workers searches run
+at once rather than taking turns holding the GIL. With --threads, a pool of
+threads (as a MoveWorker uses) is used instead, which can answer more moves
+when there are fewer cores than workers. Either way, each worker searches
+with its own transposition table, which it keeps between the searches it
+runs (a TranspositionTable must not be used by two threads at once).
+"""
+from typing import Any, Dict, List, Optional, Set
+import argparse
+import asyncio
+import json
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from a2_game import CHARACTER_CLASSES, PLAYSTYLE_CLASSES, \
+    BATTLE_QUEUE_CLASSES
+from a2_match import Match
+from a2_playstyle import RandomPlaystyle
+from a2_transposition_table import TranspositionTable
+
+# The playstyles that pick their moves without searching. Their moves are
+# picked on the event loop, since handing them to the executor would take
+# longer than picking them.
+QUICK_PLAYSTYLES = (RandomPlaystyle,)
+
+# The transposition table of each worker thread (or process), as table.
+_WORKER = threading.local()
+
+# The most bytes that may be waiting to be sent to a client. A client that
+# stops reading its states is disconnected once this many have piled up.
+MAX_WRITE_BUFFER = 1 << 20
+
+
+class Room:
+    """
+    A match hosted by a MatchServer, and the clients in it.
+
+    room_id - the number the clients know this room by.
+    match - the game played in this room.
+    turn - the number of moves performed so far.
+    last - the last move performed, or None before the first one.
+    clients - the clients in this room.
+    players - the client that picks the moves of p1 (0) and of p2 (1), if
+              their playstyles are manual.
+    task - the task picking and performing the moves of non-manual
+           playstyles, while there is one.
+    """
+    room_id: int
+    match: Match
+    turn: int
+    last: Optional[str]
+    clients: Set[asyncio.StreamWriter]
+    players: Dict[int, asyncio.StreamWriter]
+    task: Optional[asyncio.Task]
+
+    def __init__(self, room_id: int, match: Match) -> None:
+        """
+        Initialize this Room, with no clients, for match.
+        """
+        self.room_id = room_id
+        self.match = match
+        self.turn = 0
+        self.last = None
+        self.clients = set()
+        self.players = {}
+        self.task = None
+
+    def get_next_player(self) -> Optional[int]:
+        """
+        Return 0 if p1 acts next, 1 if p2 does, or None if the game is over.
+        """
+        if self.match.is_over():
+            return None
+        return 0 if self.match.battle_queue.peek() is self.match.p1 else 1
+
+    def perform(self, move: str) -> bool:
+        """
+        Have the next character perform move, and return whether they could.
+        """
+        if not self.match.perform(move):
+            return False
+        self.turn += 1
+        self.last = move
+        return True
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Return the message with the state of this Room.
+        """
+        match = self.match
+        next_player = self.get_next_player()
+        return {'type': 'state', 'room': self.room_id, 'turn': self.turn,
+                'last': self.last, 'next': next_player,
+                'actions': [] if next_player is None else
+                match.battle_queue.peek().get_available_actions(),
+                'hp': [match.p1.get_hp(), match.p2.get_hp()],
+                'sp': [match.p1.get_sp(), match.p2.get_sp()],
+                'over': next_player is None, 'winner': match.get_winner()}
+
+
+class MatchServer:
+    """
+    Hosts any number of rooms, each with its own match, for the clients
+    connected to it.
+
+    executor - where the moves of non-manual playstyles are picked, or None
+               for the event loop's default executor.
+    rooms - the open rooms, by their numbers.
+    clients - the numbers of the rooms each connected client is in.
+    _outbox - the lines waiting to be sent to each client. They are sent
+              together once the event loop has run everything that is
+              ready, so that a client in many rooms gets one write (rather
+              than one for each state) per pass of the loop.
+    """
+    executor: Any
+    rooms: Dict[int, Room]
+    clients: Dict[asyncio.StreamWriter, Set[int]]
+    _outbox: Dict[asyncio.StreamWriter, List[bytes]]
+    _next_room_id: int
+
+    def __init__(self, executor: Any = None) -> None:
+        """
+        Initialize this MatchServer, with no rooms.
+        """
+        self.executor = executor
+        self.rooms = {}
+        self.clients = {}
+        self._outbox = {}
+        self._next_room_id = 0
+
+    async def start(self, host: str = '127.0.0.1',
+                    port: int = 0) -> asyncio.AbstractServer:
+        """
+        Start serving clients on host and port (any free port for 0), and
+        return the asyncio server.
+        """
+        return await asyncio.start_server(self.handle_client, host, port)
+
+    async def handle_client(self, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+        """
+        Carry out the requests of a client until it disconnects, and then
+        take it out of its rooms.
+        """
+        self.clients[writer] = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._handle_line(writer, line)
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            # ValueError is raised for a line longer than the reader's limit
+            pass
+        finally:
+            for room_id in list(self.clients.pop(writer)):
+                self._leave(writer, room_id)
+            writer.close()
+
+    def _handle_line(self, writer: asyncio.StreamWriter, line: bytes) -> None:
+        """
+        Carry out the request in line from the client that writes to writer,
+        or send it an error if the request cannot be.
+        """
+        room_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('A request must be a JSON object')
+            room_id = request.get('room')
+            kind = request.get('type')
+            if kind == 'new':
+                room_id = None
+                self._new(writer, request)
+            elif kind == 'join':
+                self._join(writer, self._get_room(room_id),
+                           request.get('player'))
+            elif kind == 'move':
+                self._move(writer, self._get_room(room_id),
+                           request.get('move'))
+            elif kind == 'leave':
+                self._leave(writer, room_id)
+            else:
+                raise ValueError('Unknown request type: {}'.format(kind))
+        except ValueError as error:
+            self._send(writer, {'type': 'error', 'room': room_id,
+                                'message': str(error)})
+
+    def _get_room(self, room_id: Any) -> Room:
+        """
+        Return the open room numbered room_id.
+
+        Raise ValueError if there is no such room.
+        """
+        room = self.rooms.get(room_id) if isinstance(room_id, int) else None
+        if room is None:
+            raise ValueError('No room {}'.format(room_id))
+        return room
+
+    def _new(self, writer: asyncio.StreamWriter,
+             request: Dict[str, Any]) -> None:
+        """
+        Make a room for the match in request, and have the client that
+        writes to writer join it.
+        """
+        try:
+            match = Match(CHARACTER_CLASSES[request.get('p1')],
+                          CHARACTER_CLASSES[request.get('p2')],
+                          PLAYSTYLE_CLASSES[request.get('ps1', 'm')],
+                          PLAYSTYLE_CLASSES[request.get('ps2', 'm')],
+                          BATTLE_QUEUE_CLASSES[request.get('queue', 'n')],
+                          request.get('seed'))
+        except (KeyError, TypeError) as error:
+            raise ValueError('Unknown key: {}'.format(error))
+
+        room = Room(self._next_room_id, match)
+        self._next_room_id += 1
+        self.rooms[room.room_id] = room
+        self._join(writer, room, request.get('player'), [0, 1])
+
+    def _join(self, writer: asyncio.StreamWriter, room: Room, player: Any,
+              players: list = None) -> None:
+        """
+        Have the client that writes to writer join room to pick the moves of
+        player (or of players if player is None), and send it the room's
+        state.
+
+        Raise ValueError if player is taken by another client.
+        """
+        if player is not None:
+            if player not in [0, 1]:
+                raise ValueError('player must be 0 or 1')
+            other = room.players.get(player)
+            if other is not None and other is not writer:
+                raise ValueError('Player {} is taken'.format(player))
+            players = [player]
+        for index in players or []:
+            room.players[index] = writer
+        room.clients.add(writer)
+        self.clients[writer].add(room.room_id)
+        self._send(writer, room.get_state())
+        self._play_non_manual(room)
+
+    def _move(self, writer: asyncio.StreamWriter, room: Room,
+              move: Any) -> None:
+        """
+        Have the next character in room perform move for the client that
+        writes to writer, and send every client in room the new state.
+
+        Raise ValueError if that character is not the client's to move, or
+        cannot perform move.
+        """
+        next_player = room.get_next_player()
+        if next_player is None:
+            raise ValueError('The game is over')
+        if room.players.get(next_player) is not writer or \
+                not room.match.battle_queue.peek().playstyle.is_manual:
+            raise ValueError('It is not your turn')
+        if not isinstance(move, str) or not room.perform(move):
+            raise ValueError('Invalid move: {}'.format(move))
+        self._push(room)
+        self._play_non_manual(room)
+
+    def _leave(self, writer: asyncio.StreamWriter, room_id: Any) -> None:
+        """
+        Take the client that writes to writer out of room_id, and close the
+        room if no clients are left in it.
+        """
+        self.clients.get(writer, set()).discard(room_id)
+        room = self.rooms.get(room_id) if isinstance(room_id, int) else None
+        if room is None:
+            return
+        room.clients.discard(writer)
+        for player, client in list(room.players.items()):
+            if client is writer:
+                del room.players[player]
+        if not room.clients:
+            self._close(room)
+
+    def _close(self, room: Room) -> None:
+        """
+        Close room, and stop picking moves for it.
+        """
+        self.rooms.pop(room.room_id, None)
+        for writer in room.clients:
+            self.clients.get(writer, set()).discard(room.room_id)
+        if room.task is not None:
+            room.task.cancel()
+            room.task = None
+
+    def _push(self, room: Room) -> None:
+        """
+        Send the state of room to every client in it, and close the room if
+        its game is over.
+        """
+        line = _encode(room.get_state())
+        for writer in list(room.clients):
+            self._write(writer, line)
+        if room.match.is_over():
+            self._close(room)
+
+    def _play_non_manual(self, room: Room) -> None:
+        """
+        Start picking the moves of room's non-manual playstyles, unless the
+        next one to move is manual or they are already being picked.
+        """
+        if room.task is None and room.room_id in self.rooms and \
+                not room.match.is_over() and \
+                not room.match.battle_queue.peek().playstyle.is_manual:
+            room.task = asyncio.ensure_future(self._play_turns(room))
+
+    async def _play_turns(self, room: Room) -> None:
+        """
+        Pick and perform moves for room's non-manual playstyles (in the
+        executor, unless they are QUICK_PLAYSTYLES) until a manual one is
+        next or the game is over. If picking
+        a move fails, the clients are sent the error and room is closed.
+
+        A playstyle that picks an action its character cannot perform has
+        its character perform their first available action instead, as in
+        Match.play.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while not room.match.is_over():
+                character = room.match.battle_queue.peek()
+                if character.playstyle.is_manual:
+                    break
+                if isinstance(character.playstyle, QUICK_PLAYSTYLES):
+                    move = character.playstyle.select_attack()
+                else:
+                    move = await loop.run_in_executor(
+                        self.executor, _pick_move,
+                        room.match.battle_queue.copy())
+                if not room.perform(move):
+                    room.perform(character.get_available_actions()[0])
+                self._push(room)
+        except Exception as error:
+            for writer in list(room.clients):
+                self._send(writer, {
+                    'type': 'error', 'room': room.room_id,
+                    'message': 'Picking a move failed: {}'.format(error)})
+            self._close(room)
+        finally:
+            if room.task is asyncio.current_task():
+                room.task = None
+
+    def _send(self, writer: asyncio.StreamWriter,
+              message: Dict[str, Any]) -> None:
+        """
+        Send message to the client that writes to writer.
+        """
+        self._write(writer, _encode(message))
+
+    def _write(self, writer: asyncio.StreamWriter, line: bytes) -> None:
+        """
+        Send line to the client that writes to writer, along with the other
+        lines for it from this pass of the event loop.
+        """
+        if not self._outbox:
+            asyncio.get_running_loop().call_soon(self._flush)
+        self._outbox.setdefault(writer, []).append(line)
+
+    def _flush(self) -> None:
+        """
+        Write the lines waiting to be sent to each client, or disconnect a
+        client if too much is already waiting to be sent to it.
+        """
+        outbox, self._outbox = self._outbox, {}
+        for writer, lines in outbox.items():
+            transport = writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                transport.abort()
+                continue
+            writer.write(b''.join(lines))
+
+
+def _pick_move(battle_queue: 'BattleQueue') -> str:
+    """
+    Return the move the next character in battle_queue picks with its
+    playstyle, searching with the transposition table of the worker this
+    runs in rather than the one the playstyle was sent with.
+
+    This runs in a MatchServer's executor.
+    """
+    playstyle = battle_queue.peek().playstyle
+    if hasattr(playstyle, 'transposition_table'):
+        playstyle.transposition_table = _get_worker_table()
+    return playstyle.select_attack()
+
+
+def _get_worker_table() -> TranspositionTable:
+    """
+    Return the transposition table of the worker thread (or process) this
+    runs in, making it the first time.
+    """
+    table = getattr(_WORKER, 'table', None)
+    if table is None:
+        table = _WORKER.table = TranspositionTable()
+    return table
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    """
+    Return message as a line of JSON.
+
+    >>> _encode({'type': 'error', 'room': None, 'message': 'No room 3'})
+    b'{"type":"error","room":null,"message":"No room 3"}\\n'
+    """
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+
+async def serve(host: str, port: int, workers: int,
+                threads: bool = False) -> None:
+    """
+    Serve matches on host and port until stopped (by Ctrl-C, or by SIGTERM
+    where there are signals), picking moves in workers processes (or
+    threads, if threads). The workers are shut down before returning.
+    """
+    stopped = asyncio.Event()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM,
+                                                      stopped.set)
+    except NotImplementedError:
+        # Signals cannot be handled by an event loop on Windows
+        pass
+
+    pool = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    with pool(workers) as executor:
+        server = await MatchServer(executor).start(host, port)
+        for socket in server.sockets:
+            print('Serving matches on {}:{}'.format(
+                *socket.getsockname()[:2]), flush=True)
+        try:
+            async with server:
+                await stopped.wait()
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+
+def main() -> None:
+    """
+    Run a MatchServer until it is stopped with Ctrl-C.
+    """
+    parser = argparse.ArgumentParser(
+        description='Host A2 matches for clients over TCP.')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='the address to listen on')
+    parser.add_argument('--port', type=int, default=8765,
+                        help='the port to listen on')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='the number of processes that pick AI moves')
+    parser.add_argument('--threads', action='store_true',
+                        help='pick AI moves in threads rather than '
+                             'processes')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.threads))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""
+Unittests for the MatchServer in a2_match_server.
+
+A MatchServer must play each room's game the same way a Match does, send
+every client in a room its states, refuse requests it cannot carry out, and
+keep serving the other rooms while a move is being searched for.
+"""
+import asyncio
+import json
+import threading
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest import mock
+
+import a2_match_server
+from a2_characters import Mage, Rogue, Sorcerer
+from a2_match import Match
+from a2_playstyle import Playstyle, ManualPlaystyle, RandomPlaystyle, \
+    MinimaxAlphaBeta
+from a2_match_server import MatchServer, _pick_move, _get_worker_table
+
+
+class WaitingPlaystyle(Playstyle):
+    """
+    A Playstyle that picks 'A' once GO_ON is set.
+    """
+    GO_ON = threading.Event()
+
+    def __init__(self, battle_queue):
+        super().__init__(battle_queue)
+        self.is_manual = False
+
+    def select_attack(self, parameter=None):
+        WaitingPlaystyle.GO_ON.wait(5)
+        return 'A'
+
+    def copy(self, new_battle_queue):
+        return WaitingPlaystyle(new_battle_queue)
+
+
+class Client:
+    """
+    A connection to a MatchServer that sends and receives JSON lines.
+    """
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, message):
+        self.writer.write(json.dumps(message).encode() + b'\n')
+        await self.writer.drain()
+
+    async def receive(self):
+        line = await asyncio.wait_for(self.reader.readline(), 5)
+        return json.loads(line)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class MatchServerUnitTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        """
+        Start a MatchServer on a free port.
+        """
+        self.server = MatchServer()
+        self.asyncio_server = await self.server.start()
+        self.port = self.asyncio_server.sockets[0].getsockname()[1]
+        self.clients = []
+
+    async def asyncTearDown(self):
+        """
+        Disconnect the clients and stop the server.
+        """
+        for client in self.clients:
+            await client.close()
+        self.asyncio_server.close()
+        await self.asyncio_server.wait_closed()
+
+    async def connect(self):
+        """
+        Return a new Client connected to the server.
+        """
+        client = Client(*await asyncio.open_connection('127.0.0.1',
+                                                       self.port))
+        self.clients.append(client)
+        return client
+
+    async def test_game_against_ai(self):
+        """
+        Test that a game against a RandomPlaystyle is played to the end the
+        same way a Match plays it, and that its room is closed.
+        """
+        client = await self.connect()
+        await client.send({'type': 'new', 'p1': 'm', 'p2': 'r', 'ps1': 'm',
+                           'ps2': 'r', 'seed': 3})
+        state = await client.receive()
+        self.assertEqual(state['hp'], [100, 100])
+
+        moves = []
+        while not state['over']:
+            if state['next'] == 0:
+                await client.send({'type': 'move', 'room': state['room'],
+                                   'move': state['actions'][-1]})
+            state = await client.receive()
+            moves.append(state['last'])
+
+        match = Match(Mage, Rogue, ManualPlaystyle, RandomPlaystyle, seed=3)
+        for move in moves:
+            self.assertEqual(match.play_turn(move), move)
+        self.assertTrue(match.is_over())
+        self.assertEqual(state['winner'], match.get_winner())
+        self.assertEqual(state['turn'], len(moves))
+        self.assertEqual(self.server.rooms, {})
+
+    async def test_searches_in_processes(self):
+        """
+        Test that a searching playstyle can pick its moves in a pool of
+        processes, even for a Sorcerer that has already attacked, and that
+        it picks the same moves as in a Match.
+        """
+        with ProcessPoolExecutor(2) as executor:
+            self.server.executor = executor
+            client = await self.connect()
+            await client.send({'type': 'new', 'p1': 'm', 'p2': 's',
+                               'ps1': 'm', 'ps2': 'ma', 'player': 0})
+            state = await client.receive()
+            moves = []
+            while not state['over']:
+                if state['next'] == 0:
+                    await client.send({'type': 'move', 'room': state['room'],
+                                       'move': state['actions'][0]})
+                state = await client.receive()
+                moves.append(state['last'])
+
+        match = Match(Mage, Sorcerer, ManualPlaystyle, MinimaxAlphaBeta)
+        for move in moves:
+            self.assertEqual(match.play_turn(move), move)
+        self.assertTrue(match.is_over())
+        self.assertEqual(state['winner'], match.get_winner())
+
+    async def test_two_players(self):
+        """
+        Test that two clients can play against each other in one room, and
+        that both are sent every state.
+        """
+        p1, p2 = await self.connect(), await self.connect()
+        await p1.send({'type': 'new', 'p1': 'v', 'p2': 's', 'player': 0})
+        room = (await p1.receive())['room']
+        await p2.send({'type': 'join', 'room': room, 'player': 1})
+        self.assertEqual((await p2.receive())['next'], 0)
+
+        for client, move in [(p1, 'A'), (p2, 'S')]:
+            await client.send({'type': 'move', 'room': room, 'move': move})
+            first, second = await p1.receive(), await p2.receive()
+            self.assertEqual(first, second)
+            self.assertEqual(first['last'], move)
+
+    async def test_errors(self):
+        """
+        Test that requests that cannot be carried out are answered with
+        errors, and change nothing.
+        """
+        p1, p2 = await self.connect(), await self.connect()
+        await p1.send({'type': 'new', 'p1': 'm', 'p2': 'r', 'player': 0})
+        room = (await p1.receive())['room']
+        await p2.send({'type': 'join', 'room': room})
+        await p2.receive()
+
+        for client, request, message in [
+                (p1, {'type': 'new', 'p1': 'm', 'p2': 'x'}, "Unknown key"),
+                (p1, {'type': 'move', 'room': 7, 'move': 'A'}, 'No room 7'),
+                (p1, {'type': 'move', 'room': room, 'move': 'X'},
+                 'Invalid move'),
+                (p2, {'type': 'move', 'room': room, 'move': 'A'},
+                 'It is not your turn'),
+                (p2, {'type': 'join', 'room': room, 'player': 0},
+                 'Player 0 is taken'),
+                (p1, {'type': 'dance'}, 'Unknown request type'),
+                (p1, [], 'A request must be a JSON object')]:
+            await client.send(request)
+            reply = await client.receive()
+            self.assertEqual(reply['type'], 'error')
+            self.assertIn(message, reply['message'])
+
+        p1.writer.write(b'{not json\n')
+        self.assertEqual((await p1.receive())['type'], 'error')
+        self.assertEqual(self.server.rooms[room].turn, 0)
+
+    async def test_disconnect_closes_rooms(self):
+        """
+        Test that a room is closed once every client in it has gone.
+        """
+        p1, p2 = await self.connect(), await self.connect()
+        await p1.send({'type': 'new', 'p1': 'm', 'p2': 'r'})
+        room = (await p1.receive())['room']
+        await p2.send({'type': 'join', 'room': room})
+        await p2.receive()
+
+        await p1.close()
+        self.clients.remove(p1)
+        await p2.send({'type': 'leave', 'room': room})
+        await p2.send({'type': 'join', 'room': room})
+        self.assertEqual((await p2.receive())['message'],
+                         'No room {}'.format(room))
+        self.assertEqual(self.server.rooms, {})
+
+    async def test_searches_do_not_block(self):
+        """
+        Test that other rooms are served while a move is being picked.
+        """
+        WaitingPlaystyle.GO_ON.clear()
+        playstyles = dict(a2_match_server.PLAYSTYLE_CLASSES,
+                          w=WaitingPlaystyle)
+        client = await self.connect()
+        with mock.patch.object(a2_match_server, 'PLAYSTYLE_CLASSES',
+                               playstyles):
+            await client.send({'type': 'new', 'p1': 'm', 'p2': 'r',
+                               'ps1': 'w', 'ps2': 'm'})
+            waiting = await client.receive()
+            await client.send({'type': 'new', 'p1': 'm', 'p2': 'r'})
+            other = await client.receive()
+            await client.send({'type': 'move', 'room': other['room'],
+                               'move': 'A'})
+            self.assertEqual((await client.receive())['room'], other['room'])
+
+            WaitingPlaystyle.GO_ON.set()
+            state = await client.receive()
+            self.assertEqual((state['room'], state['last']),
+                             (waiting['room'], 'A'))
+
+
+class WorkerTableUnitTests(unittest.TestCase):
+    def test_each_worker_has_its_own_table(self):
+        """
+        Test that moves picked in a pool of threads are searched with a
+        table for each thread, rather than with the playstyle's table.
+        """
+        match = Match(Mage, Rogue, MinimaxAlphaBeta, MinimaxAlphaBeta)
+        playstyle_table = match.battle_queue.peek().playstyle \
+            .transposition_table
+        size = len(playstyle_table)
+        tables = []
+        with ThreadPoolExecutor(2) as executor:
+            for _ in range(6):
+                copy = match.battle_queue.copy()
+                executor.submit(_pick_move, copy).result()
+                tables.append(copy.peek().playstyle.transposition_table)
+        self.assertNotIn(playstyle_table, tables)
+        self.assertLessEqual(len(set(map(id, tables))), 2)
+        self.assertEqual(len(playstyle_table), size)
+
+    def test_processes_keep_their_tables(self):
+        """
+        Test that a worker process keeps its table between the moves it
+        picks.
+        """
+        match = Match(Mage, Rogue, MinimaxAlphaBeta, MinimaxAlphaBeta)
+        with ProcessPoolExecutor(1) as executor:
+            executor.submit(_pick_move, match.battle_queue.copy()).result()
+            size = len(executor.submit(_get_worker_table).result())
+            self.assertGreater(size, 0)
+            executor.submit(_pick_move, match.battle_queue.copy()).result()
+            self.assertEqual(
+                len(executor.submit(_get_worker_table).result()), size)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,97 @@
+"""
+Unittests for the headless Match and simulate in A2.
+"""
+import unittest
+
+from a2_game import CHARACTER_CLASSES, PLAYSTYLE_CLASSES, \
+    BATTLE_QUEUE_CLASSES
+from a2_match import Match, simulate
+Random = PLAYSTYLE_CLASSES['r']
+Manual = PLAYSTYLE_CLASSES['m']
+
+
+class MatchUnitTests(unittest.TestCase):
+    def test_every_matchup_finishes(self):
+        """
+        Test that random games finish for every matchup and kind of
+        BattleQueue, with results that agree with their traces.
+        """
+        for p1_class in CHARACTER_CLASSES.values():
+            for p2_class in CHARACTER_CLASSES.values():
+                for battle_queue_class in BATTLE_QUEUE_CLASSES.values():
+                    for seed in range(5):
+                        result = simulate(p1_class, p2_class, Random, Random,
+                                          battle_queue_class, seed)
+                        self.assert_consistent(result)
+
+    def assert_consistent(self, result):
+        """
+        Assert that the winner, turns and trace of result agree.
+        """
+        self.assertEqual(len(result.trace), result.turns + 1)
+        self.assertEqual(len(result.moves), result.turns)
+        self.assertEqual(len(result.players), result.turns)
+        self.assertEqual(result.invalid_moves, 0)
+
+        p1_hp, _, p2_hp, _ = result.trace[-1]
+        if result.winner == 0:
+            self.assertEqual(p2_hp, 0)
+        elif result.winner == 1:
+            self.assertEqual(p1_hp, 0)
+        else:
+            self.assertTrue(p1_hp > 0 and p2_hp > 0)
+
+    def test_seeds_repeat(self):
+        """
+        Test that the same seed plays the same game, and that different seeds
+        play different games.
+        """
+        args = (CHARACTER_CLASSES['v'], CHARACTER_CLASSES['s'], Random,
+                Random, BATTLE_QUEUE_CLASSES['n'])
+        self.assertEqual(simulate(*args, seed=3), simulate(*args, seed=3))
+        games = {simulate(*args, seed=seed).moves for seed in range(20)}
+        self.assertGreater(len(games), 1)
+
+    def test_many_matches_in_one_process(self):
+        """
+        Test that matches do not share state with each other.
+        """
+        first = Match(CHARACTER_CLASSES['m'], CHARACTER_CLASSES['r'], Random,
+                      Random, seed=7)
+        second = Match(CHARACTER_CLASSES['m'], CHARACTER_CLASSES['r'], Random,
+                       Random, seed=7)
+        first.play_turn()
+        self.assertEqual(second.get_result().turns, 0)
+        self.assertEqual(first.play(), second.play())
+
+    def test_minimax_against_random(self):
+        """
+        Test that a Minimax playstyle can play a whole match.
+        """
+        result = simulate(CHARACTER_CLASSES['r'], CHARACTER_CLASSES['m'],
+                          PLAYSTYLE_CLASSES['ma'], Random, seed=0)
+        self.assert_consistent(result)
+
+    def test_manual_needs_keys(self):
+        """
+        Test that a manual character acts on keys given to play_turn, and
+        that play cannot continue without keys.
+        """
+        match = Match(CHARACTER_CLASSES['m'], CHARACTER_CLASSES['r'], Manual,
+                      Random, seed=0)
+        self.assertIsNone(match.play_turn())
+        self.assertEqual(match.play_turn('A'), 'A')
+        self.assertEqual(match.get_result().moves, 'A')
+        self.assertRaises(ValueError, match.play)
+
+    def test_same_names(self):
+        """
+        Test that characters with the same name are not allowed.
+        """
+        self.assertRaises(ValueError, Match, CHARACTER_CLASSES['m'],
+                          CHARACTER_CLASSES['r'], Random, Random,
+                          names=('a', 'a'))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
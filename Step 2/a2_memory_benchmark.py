@@ -0,0 +1,73 @@
+"""
+A benchmark of how much memory A2's Characters and BattleQueue copies take.
+
+Run this file to print, for each class in CHARACTER_CLASSES, the bytes taken
+by one Character and by one copy of a BattleQueue holding two of them, and
+how much a search that keeps a copy for every node would need.
+
+    python a2_memory_benchmark.py --count 10000 --nodes 1000000
+
+Memory is measured with tracemalloc, so it counts every allocation made while
+the objects are built (including their dicts, skills and decision trees).
+"""
+from typing import Callable
+import argparse
+import tracemalloc
+from a2_game import CHARACTER_CLASSES
+from a2_playstyle import ManualPlaystyle
+from a2_alpha_beta_benchmark import set_up_matchup
+
+
+def measure(make: Callable[[], object], count: int) -> float:
+    """
+    Return the average number of bytes allocated by each of count calls to
+    make, keeping every result alive until they have all been measured.
+    """
+    tracemalloc.start()
+    objects = [make() for _ in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return size / count
+
+
+def benchmark_class(key: str, count: int) -> dict:
+    """
+    Return the bytes per Character of the class for key, and per copy of a
+    BattleQueue where two of them fight.
+    """
+    bq = set_up_matchup(key, key, 100)
+    playstyle = ManualPlaystyle(bq)
+    character_class = CHARACTER_CLASSES[key]
+
+    return {'character': measure(lambda: character_class('c', bq, playstyle),
+                                 count),
+            'copy': measure(bq.copy, count)}
+
+
+def main() -> None:
+    """
+    Run the benchmark for every class and print a table of the results.
+    """
+    parser = argparse.ArgumentParser(
+        description='Measure the memory taken by Characters and copies.')
+    parser.add_argument('--count', type=int, default=10000,
+                        help='the number of objects to average over')
+    parser.add_argument('--nodes', type=int, default=1000000,
+                        help='the number of search nodes to estimate the '
+                             'memory of')
+    args = parser.parse_args()
+
+    print("{:>5} {:>14} {:>10} {:>16}".format(
+        'class', 'character (B)', 'copy (B)',
+        '{} copies (MB)'.format(args.nodes)))
+
+    for key in CHARACTER_CLASSES:
+        result = benchmark_class(key, args.count)
+        print("{:>5} {:>14.0f} {:>10.0f} {:>16.0f}".format(
+            key, result['character'], result['copy'],
+            result['copy'] * args.nodes / 1e6))
+
+
+if __name__ == '__main__':
+    main()
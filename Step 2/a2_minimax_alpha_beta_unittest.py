@@ -0,0 +1,148 @@
+"""
+Unittests for the alpha-beta pruning Minimax Playstyle for A2.
+
+The alpha-beta searches must give exactly the same scores (and so the same
+moves) as get_state_score, while visiting fewer states.
+"""
+import unittest
+
+from a2_game import CHARACTER_CLASSES, PLAYSTYLE_CLASSES
+from a2_playstyle import get_state_score, get_state_score_alpha_beta, \
+    get_state_score_alpha_beta_iterative, ManualPlaystyle, SearchStats
+from a2_battle_queue import BattleQueue, RestrictedBattleQueue
+from a2_transposition_table import TranspositionTable
+MageConstructor = CHARACTER_CLASSES['m']
+RogueConstructor = CHARACTER_CLASSES['r']
+Minimax = PLAYSTYLE_CLASSES['mr']
+AlphaBeta = PLAYSTYLE_CLASSES['ma']
+
+
+class AlphaBetaMinimaxUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Sets up a Battle Queue containing a Rogue and a Mage for all of the
+        unittests.
+        """
+        self.battle_queue = BattleQueue()
+        playstyle = ManualPlaystyle(self.battle_queue)
+
+        self.p1 = RogueConstructor("R", self.battle_queue, playstyle)
+        self.p2 = MageConstructor("M", self.battle_queue, playstyle)
+
+        self.p1.enemy = self.p2
+        self.p2.enemy = self.p1
+
+        self.battle_queue.add(self.p1)
+        self.battle_queue.add(self.p2)
+
+    def tearDown(self):
+        """
+        Delete the attributes that were created in setUp.
+        """
+        del self.battle_queue
+        del self.p1
+        del self.p2
+
+    def assert_same_scores(self, battle_queue):
+        """
+        Assert that every search gives the same score for battle_queue.
+        """
+        bq = repr(battle_queue)
+        expected = get_state_score(battle_queue, None)
+
+        for function in [get_state_score_alpha_beta,
+                         get_state_score_alpha_beta_iterative]:
+            actual = function(battle_queue, None)
+            self.assertEqual(expected, actual,
+                             ("Calling {} on a BattleQueue that looks " +
+                              "like:\n{}\nShould return the score {} " +
+                              "but got {} instead.").format(
+                                  function.__name__, bq, expected, actual))
+
+    def test_docstring_examples(self):
+        """
+        Test the alpha-beta searches on the get_state_score docstring
+        examples.
+        """
+        self.p2.set_hp(3)
+        self.assert_same_scores(self.battle_queue)
+        self.p1.set_hp(40)
+        self.assert_same_scores(self.battle_queue)
+        self.battle_queue.remove()
+        self.battle_queue.add(self.p1)
+        self.assert_same_scores(self.battle_queue)
+
+    def test_same_scores_every_matchup(self):
+        """
+        Test that alpha-beta gives the same score as get_state_score for
+        every matchup.
+        """
+        for p1_key in CHARACTER_CLASSES:
+            for p2_key in CHARACTER_CLASSES:
+                for battle_queue_class in [BattleQueue, RestrictedBattleQueue]:
+                    bq = battle_queue_class()
+                    p1 = CHARACTER_CLASSES[p1_key]("a", bq,
+                                                   ManualPlaystyle(bq))
+                    p2 = CHARACTER_CLASSES[p2_key]("b", bq,
+                                                   ManualPlaystyle(bq))
+                    p1.enemy = p2
+                    p2.enemy = p1
+                    p1.set_hp(35)
+                    p2.set_hp(30)
+                    bq.add(p1)
+                    bq.add(p2)
+                    self.assert_same_scores(bq)
+
+    def test_visits_fewer_states(self):
+        """
+        Test that alpha-beta visits fewer states than get_state_score.
+        """
+        self.p1.set_hp(40)
+        self.p2.set_hp(40)
+        minimax_stats, alpha_beta_stats = SearchStats(), SearchStats()
+        iterative_stats = SearchStats()
+
+        get_state_score(self.battle_queue, None, minimax_stats)
+        get_state_score_alpha_beta(self.battle_queue, None, alpha_beta_stats)
+        get_state_score_alpha_beta_iterative(self.battle_queue, None,
+                                             iterative_stats)
+
+        self.assertLess(alpha_beta_stats.nodes, minimax_stats.nodes)
+        self.assertGreater(alpha_beta_stats.cutoffs, 0)
+        self.assertEqual(alpha_beta_stats.nodes, iterative_stats.nodes)
+
+    def test_shares_table_with_minimax(self):
+        """
+        Test that scores stored by alpha-beta can be used by get_state_score.
+        """
+        self.p1.set_hp(40)
+        self.p2.set_hp(40)
+        table = TranspositionTable()
+        expected = get_state_score(self.battle_queue, None)
+
+        get_state_score_alpha_beta(self.battle_queue, table)
+        self.assertEqual(get_state_score(self.battle_queue, table), expected)
+
+    def test_select_attack_same_as_minimax(self):
+        """
+        Test that the alpha-beta playstyle picks the same moves as the
+        recursive Minimax playstyle.
+        """
+        for hp, sp in [(40, 100), (40, 10), (20, 60), (60, 35)]:
+            self.p1.set_hp(hp)
+            self.p1.set_sp(sp)
+            expected = Minimax(self.battle_queue).select_attack()
+            actual = AlphaBeta(self.battle_queue).select_attack()
+            self.assertEqual(expected, actual)
+
+    def test_select_attack_one_attack(self):
+        """
+        Test to make sure calling select_attack when only one attack is
+        available returns that attack.
+        """
+        self.p1.set_sp(5)
+        self.assertEqual("A", AlphaBeta(self.battle_queue).select_attack())
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,95 @@
+"""
+Unittests for the time-bounded Minimax Playstyle for A2.
+"""
+import time
+import unittest
+
+from a2_game import CHARACTER_CLASSES, PLAYSTYLE_CLASSES
+from a2_alpha_beta_benchmark import set_up_matchup
+from a2_playstyle import get_state_score, \
+    get_state_score_depth_limited
+from a2_battle_queue import BattleQueue, RestrictedBattleQueue
+from a2_transposition_table import TranspositionTable
+Timed = PLAYSTYLE_CLASSES['mt']
+Minimax = PLAYSTYLE_CLASSES['mr']
+
+
+
+class MinimaxTimedUnitTests(unittest.TestCase):
+    def test_deep_search_is_exact(self):
+        """
+        Test that searching deep enough gives the same score as
+        get_state_score.
+        """
+        for battle_queue_class in [BattleQueue, RestrictedBattleQueue]:
+            bq = set_up_matchup('v', 's', 30, battle_queue_class)
+            expected = get_state_score(bq, None)
+            self.assertEqual(get_state_score_depth_limited(bq, 100,
+                                                           table=None),
+                             (expected, True))
+
+    def test_even_estimates_count(self):
+        """
+        Test that an estimate of 0 (both characters with the same HP) is
+        used as a score, rather than dropped as if the move could not be
+        made.
+        """
+        for key in ['m', 'r', 'v', 's']:
+            bq = set_up_matchup(key, key)
+            # After both characters attack, their HP is the same again
+            self.assertEqual(get_state_score_depth_limited(bq, 2, table=None),
+                             (0, False))
+
+    def test_same_moves_as_minimax(self):
+        """
+        Test that with enough time, the timed playstyle picks the same move
+        as the recursive Minimax playstyle, for every matchup.
+        """
+        for p1_key in CHARACTER_CLASSES:
+            for p2_key in CHARACTER_CLASSES:
+                bq = set_up_matchup(p1_key, p2_key, 35)
+                timed = Timed(bq, 60000)
+                timed.transposition_table = TranspositionTable()
+                self.assertEqual(timed.select_attack(),
+                                 Minimax(bq).select_attack())
+                self.assertGreater(timed.depth_reached, 0)
+
+    def test_stays_within_budget(self):
+        """
+        Test that select_attack returns a valid move soon after its budget
+        runs out, and leaves the BattleQueue unchanged.
+        """
+        bq = set_up_matchup('v', 'v')
+        before = bq.get_state_key()
+        timed = Timed(bq, 50)
+        timed.transposition_table = TranspositionTable()
+
+        start = time.perf_counter()
+        move = timed.select_attack()
+        elapsed = time.perf_counter() - start
+
+        self.assertIn(move, ['A', 'S'])
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(bq.get_state_key(), before)
+
+    def test_no_time(self):
+        """
+        Test that the first available action is returned when there is no
+        time to search.
+        """
+        bq = set_up_matchup('r', 'm')
+        timed = Timed(bq, 0)
+        self.assertEqual(timed.select_attack(), 'A')
+        self.assertEqual(timed.depth_reached, 0)
+
+    def test_one_attack(self):
+        """
+        Test that the only available attack is returned.
+        """
+        bq = set_up_matchup('r', 'm')
+        bq.peek().set_sp(5)
+        self.assertEqual(Timed(bq).select_attack(), 'A')
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,120 @@
+"""
+Picking AI moves on a background thread, for a2_ui.
+
+A Minimax Playstyle can take seconds to pick a move. A MoveWorker lets the
+UI keep drawing frames and handling events meanwhile: submit hands it the
+BattleQueue, and it picks the next character's move on a copy of that
+BattleQueue, on its own thread. The move comes back through a
+concurrent.futures.Future, and get_move returns it once it is ready.
+
+The worker's thread is a daemon thread, so quitting never waits for a
+search to finish. A move picked for a state that has since changed (or after
+cancel) is thrown away.
+
+A thread (rather than a process) is used so that the search shares the
+module-level transposition table with later searches, and Playstyles (such
+as RandomPlaystyle with its rng) do not need to be sent anywhere. The UI
+only holds the GIL briefly for each frame, so the search still gets most of
+the CPU.
+"""
+from typing import Optional
+from concurrent.futures import Future
+import threading
+
+
+class MoveWorker:
+    """
+    Picks the moves of non-manual Playstyles away from the UI's thread.
+
+    >>> from a2_alpha_beta_benchmark import set_up_matchup
+    >>> from a2_playstyle import MinimaxRecursive
+    >>> bq = set_up_matchup('m', 'r', 30)
+    >>> bq.peek().playstyle = MinimaxRecursive(bq)
+    >>> worker = MoveWorker()
+    >>> worker.submit(bq).result()
+    'S'
+    >>> worker.get_move(bq)
+    'S'
+    >>> worker.is_thinking()
+    False
+    """
+    _future: Optional[Future]
+    _state_key: Optional[tuple]
+
+    def __init__(self) -> None:
+        """
+        Initialize this MoveWorker, with no move being picked.
+        """
+        self._future = None
+        self._state_key = None
+
+    def is_thinking(self) -> bool:
+        """
+        Return whether a move has been submitted and not yet returned by
+        get_move (or cancelled).
+        """
+        return self._future is not None
+
+    def submit(self, battle_queue: 'BattleQueue') -> Future:
+        """
+        Start picking a move for the next character in battle_queue with its
+        Playstyle, and return the Future of the move.
+
+        The move is picked on a copy of battle_queue, so battle_queue can
+        still be read (and changed) while it is picked. Any move that was
+        being picked before is cancelled.
+        """
+        self.cancel()
+        future = Future()
+        copy = battle_queue.copy()
+        thread = threading.Thread(target=_pick_move, args=(copy, future),
+                                  daemon=True)
+        self._future = future
+        self._state_key = battle_queue.get_state_key()
+        thread.start()
+        return future
+
+    def get_move(self, battle_queue: 'BattleQueue') -> Optional[str]:
+        """
+        Return the move picked for battle_queue, or None if it is not ready
+        yet or nothing was submitted.
+
+        If battle_queue has changed since the move was submitted, the move
+        is thrown away, and None is returned. If picking the move raised an
+        exception, it is raised here.
+        """
+        future = self._future
+        if future is None or not future.done():
+            return None
+
+        self._future = None
+        if battle_queue.get_state_key() != self._state_key:
+            return None
+        return future.result()
+
+    def cancel(self) -> None:
+        """
+        Stop waiting for the move being picked, if there is one. Its thread
+        is left to finish on its own, and its move is thrown away.
+        """
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+
+
+def _pick_move(battle_queue: 'BattleQueue', future: Future) -> None:
+    """
+    Set the result of future to the move the next character in battle_queue
+    picks with its Playstyle, unless future has been cancelled.
+    """
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        future.set_result(battle_queue.peek().playstyle.select_attack())
+    except Exception as error:
+        future.set_exception(error)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
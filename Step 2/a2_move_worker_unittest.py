@@ -0,0 +1,121 @@
+"""
+Unittests for the MoveWorker used by a2_ui.
+
+A MoveWorker must pick the same moves as the Playstyles would on the UI's
+thread, without changing the BattleQueue it was given, and must throw away
+moves that were cancelled or picked for a state that has since changed.
+"""
+import threading
+import unittest
+from concurrent.futures import wait
+
+from a2_alpha_beta_benchmark import set_up_matchup
+from a2_playstyle import Playstyle, MinimaxRecursive
+from a2_move_worker import MoveWorker
+
+
+class WaitingPlaystyle(Playstyle):
+    """
+    A Playstyle that picks 'A' once it is told to go on, or raises error if
+    it has one.
+    """
+    def __init__(self, battle_queue, go_on, error=None):
+        super().__init__(battle_queue)
+        self.is_manual = False
+        self.go_on = go_on
+        self.error = error
+
+    def select_attack(self, parameter=None):
+        self.go_on.wait(5)
+        if self.error is not None:
+            raise self.error
+        return 'A'
+
+    def copy(self, new_battle_queue):
+        return WaitingPlaystyle(new_battle_queue, self.go_on, self.error)
+
+
+def set_up_waiting(error=None):
+    """
+    Return a BattleQueue whose first character has a WaitingPlaystyle, and
+    the Event that lets it go on.
+    """
+    bq = set_up_matchup('m', 'r', 100)
+    go_on = threading.Event()
+    bq.peek().playstyle = WaitingPlaystyle(bq, go_on, error)
+    return bq, go_on
+
+
+class MoveWorkerUnitTests(unittest.TestCase):
+    def test_same_moves(self):
+        """
+        Test that the worker picks the same moves as the Playstyles, and
+        leaves the BattleQueue as it was.
+        """
+        worker = MoveWorker()
+        for p1_key, p2_key in [('m', 'r'), ('v', 's'), ('s', 'm')]:
+            for hp in [10, 30]:
+                bq = set_up_matchup(p1_key, p2_key, hp)
+                bq.peek().playstyle = MinimaxRecursive(bq)
+                key = bq.get_state_key()
+                worker.submit(bq).result(30)
+                self.assertEqual(bq.get_state_key(), key)
+                self.assertEqual(worker.get_move(bq),
+                                 bq.peek().playstyle.select_attack())
+
+    def test_thinking(self):
+        """
+        Test that no move is returned until it has been picked.
+        """
+        bq, go_on = set_up_waiting()
+        worker = MoveWorker()
+        future = worker.submit(bq)
+        self.assertTrue(worker.is_thinking())
+        self.assertIsNone(worker.get_move(bq))
+        go_on.set()
+        future.result(5)
+        self.assertEqual(worker.get_move(bq), 'A')
+        self.assertFalse(worker.is_thinking())
+        self.assertIsNone(worker.get_move(bq))
+
+    def test_changed_state(self):
+        """
+        Test that a move picked for a state that has changed is thrown away.
+        """
+        bq, go_on = set_up_waiting()
+        worker = MoveWorker()
+        future = worker.submit(bq)
+        bq.make_move('A')
+        go_on.set()
+        future.result(5)
+        self.assertIsNone(worker.get_move(bq))
+        self.assertFalse(worker.is_thinking())
+
+    def test_cancel(self):
+        """
+        Test that a cancelled move is never returned.
+        """
+        bq, go_on = set_up_waiting()
+        worker = MoveWorker()
+        future = worker.submit(bq)
+        worker.cancel()
+        self.assertFalse(worker.is_thinking())
+        go_on.set()
+        wait([future], 5)
+        self.assertIsNone(worker.get_move(bq))
+
+    def test_error(self):
+        """
+        Test that an error raised while picking a move is raised by
+        get_move.
+        """
+        bq, go_on = set_up_waiting(ValueError('no move'))
+        go_on.set()
+        worker = MoveWorker()
+        worker.submit(bq).exception(5)
+        with self.assertRaises(ValueError):
+            worker.get_move(bq)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,88 @@
+"""
+A benchmark of the parallel mode of the Minimax Playstyles for A2.
+
+Run this file to time select_attack at the start of every matchup of the
+classes in CHARACTER_CLASSES, once on this process and once shared between
+worker processes.
+
+    python a2_parallel_benchmark.py --hp 100 --workers 16 --split-depth 3
+
+Each timing starts with empty transposition tables, so neither search gets
+answers left over from the other.
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from a2_game import CHARACTER_CLASSES, PLAYSTYLE_CLASSES
+from a2_transposition_table import TranspositionTable
+from a2_alpha_beta_benchmark import set_up_matchup
+
+
+def time_select_attack(minimax: 'Minimax') -> tuple:
+    """
+    Return the move minimax picks with an empty transposition table, and
+    how long it took in seconds.
+    """
+    minimax.transposition_table = TranspositionTable()
+    start = time.perf_counter()
+    move = minimax.select_attack()
+    return move, time.perf_counter() - start
+
+
+def benchmark_matchup(p1_key: str, p2_key: str, args: argparse.Namespace) \
+        -> dict:
+    """
+    Return the moves and times of the serial and parallel searches for one
+    matchup.
+    """
+    bq = set_up_matchup(p1_key, p2_key, args.hp)
+    playstyle_class = PLAYSTYLE_CLASSES[args.playstyle]
+    serial_move, serial_time = time_select_attack(playstyle_class(bq))
+
+    # A new pool for each matchup, so its workers' tables start empty.
+    with ProcessPoolExecutor(args.workers) as executor:
+        minimax = playstyle_class(bq, executor, args.split_depth)
+        parallel_move, parallel_time = time_select_attack(minimax)
+
+    if serial_move != parallel_move:
+        raise AssertionError("Moves differ for {} vs {}: {} != {}".format(
+            p1_key, p2_key, serial_move, parallel_move))
+
+    return {'move': serial_move,
+            'serial_time': serial_time,
+            'parallel_time': parallel_time,
+            'speedup': serial_time / parallel_time}
+
+
+def main() -> None:
+    """
+    Run the benchmark for every matchup and print a table of the results.
+    """
+    parser = argparse.ArgumentParser(
+        description='Compare Minimax on one process and in parallel.')
+    parser.add_argument('--hp', type=int, default=100,
+                        help='the HP both characters start with')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='the number of worker processes (default: one '
+                             'per CPU)')
+    parser.add_argument('--split-depth', type=int, default=3,
+                        help='how many plies below the root moves to expand '
+                             'before handing states to the workers')
+    parser.add_argument('--playstyle', choices=['mr', 'mi', 'ma'],
+                        default='mr', help='the Minimax playstyle to time')
+    args = parser.parse_args()
+
+    print("{:>5} {:>4} {:>10} {:>10} {:>8}".format(
+        'match', 'move', 'serial (s)', 'para (s)', 'speedup'))
+
+    for p1_key in CHARACTER_CLASSES:
+        for p2_key in CHARACTER_CLASSES:
+            result = benchmark_matchup(p1_key, p2_key, args)
+            print("{:>5} {:>4} {:>10.3f} {:>10.3f} {:>7.2f}x".format(
+                '{}v{}'.format(p1_key, p2_key), result['move'],
+                result['serial_time'], result['parallel_time'],
+                result['speedup']))
+
+
+if __name__ == '__main__':
+    main()
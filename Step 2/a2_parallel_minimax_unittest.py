@@ -0,0 +1,121 @@
+"""
+Unittests for the parallel mode of the Minimax Playstyles for A2.
+
+Sharing the search between worker processes must pick exactly the same moves
+as searching on one process.
+"""
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+from a2_game import CHARACTER_CLASSES, PLAYSTYLE_CLASSES
+from a2_alpha_beta_benchmark import set_up_matchup
+import a2_playstyle
+from a2_playstyle import ManualPlaystyle
+from a2_skill_decision_tree import SkillDecisionTree
+from a2_skills import MageSpecial
+from a2_battle_queue import BattleQueue, RestrictedBattleQueue
+
+
+class ParallelMinimaxUnitTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """
+        Start the worker processes shared by all of the unittests.
+        """
+        cls.executor = ProcessPoolExecutor(2)
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Shut down the worker processes.
+        """
+        cls.executor.shutdown()
+
+    def test_same_moves_as_serial(self):
+        """
+        Test that every Minimax playstyle picks the same move in parallel as
+        on one process, for every matchup.
+        """
+        for key in ['mr', 'mi', 'ma']:
+            for p1_key in CHARACTER_CLASSES:
+                for p2_key in CHARACTER_CLASSES:
+                    for battle_queue_class in [BattleQueue,
+                                               RestrictedBattleQueue]:
+                        bq = set_up_matchup(p1_key, p2_key, 30,
+                                            battle_queue_class)
+                        bq.peek().set_sp(40)
+                        expected = PLAYSTYLE_CLASSES[key](bq).select_attack()
+                        actual = PLAYSTYLE_CLASSES[key](
+                            bq, self.executor, 1).select_attack()
+                        self.assertEqual(expected, actual)
+
+    def test_split_depths(self):
+        """
+        Test that splitting the search further down picks the same move and
+        leaves the BattleQueue unchanged.
+        """
+        bq = set_up_matchup('v', 's', 45)
+        before = bq.get_state_key()
+        expected = PLAYSTYLE_CLASSES['mr'](bq).select_attack()
+
+        for split_depth in range(4):
+            minimax = PLAYSTYLE_CLASSES['mr'](bq, self.executor, split_depth)
+            self.assertEqual(minimax.select_attack(), expected)
+            self.assertEqual(bq.get_state_key(), before)
+
+    def test_one_attack(self):
+        """
+        Test that the only available attack is picked in parallel.
+        """
+        bq = set_up_matchup('r', 'm', 30)
+        bq.peek().set_sp(5)
+        minimax = PLAYSTYLE_CLASSES['ma'](bq, self.executor)
+        self.assertEqual(minimax.select_attack(), 'A')
+
+    def get_scores(self, bq, executor):
+        """
+        Return the scores that a MinimaxRecursive using executor chooses
+        its move for bq from.
+        """
+        with mock.patch.object(a2_playstyle, '_choose_action',
+                               wraps=a2_playstyle._choose_action) as choose:
+            PLAYSTYLE_CLASSES['mr'](bq, executor, 1).select_attack()
+        return choose.call_args[0]
+
+    def test_queues_battle_states_cannot_stand_for(self):
+        """
+        Test that a Sorcerer with its own tree, and characters that share a
+        name, are scored the same way in parallel as on one process, even
+        though BattleStates cannot stand for them.
+        """
+        bq = set_up_matchup('s', 'm', 40)
+        bq.peek().set_skill_decision_tree(
+            SkillDecisionTree(MageSpecial(), lambda _, __: True, 1))
+        self.assertEqual(self.get_scores(bq, self.executor),
+                         self.get_scores(bq, None))
+
+        bq = BattleQueue()
+        p1 = CHARACTER_CLASSES['r']("x", bq, ManualPlaystyle(bq))
+        p2 = CHARACTER_CLASSES['r']("x", bq, ManualPlaystyle(bq))
+        p1.enemy = p2
+        p2.enemy = p1
+        for character in [p1, p2]:
+            character.set_hp(20)
+            bq.add(character)
+        self.assertEqual(self.get_scores(bq, self.executor),
+                         self.get_scores(bq, None))
+
+    def test_copy_keeps_executor(self):
+        """
+        Test that a copy of a parallel Minimax shares its executor.
+        """
+        bq = set_up_matchup('r', 'm', 30)
+        minimax = PLAYSTYLE_CLASSES['mi'](bq, self.executor, 2)
+        copy = minimax.copy(bq.copy())
+        self.assertIs(copy.executor, self.executor)
+        self.assertEqual(copy.split_depth, 2)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,141 @@
+"""
+Unittests for the PersistentBattleQueues in A2.
+
+A PersistentBattleQueue must behave exactly like the BattleQueue it stands in
+for, and its copies must not affect it, even though they share its queue.
+"""
+import random
+import unittest
+
+from a2_game import CHARACTER_CLASSES
+from a2_alpha_beta_benchmark import set_up_matchup
+from a2_playstyle import get_state_score
+from a2_battle_queue import BattleQueue, RestrictedBattleQueue, \
+    PersistentBattleQueue, PersistentRestrictedBattleQueue
+from a2_persistent_deque import PersistentDeque
+
+# Each kind of BattleQueue, with the PersistentBattleQueue that stands in
+# for it.
+PAIRS = [(BattleQueue, PersistentBattleQueue),
+         (RestrictedBattleQueue, PersistentRestrictedBattleQueue)]
+
+
+
+class PersistentBattleQueueUnitTests(unittest.TestCase):
+    def assert_same(self, bq, persistent_bq):
+        """
+        Assert that bq and persistent_bq are in the same state.
+        """
+        self.assertEqual(bq.get_state_key()[1:],
+                         persistent_bq.get_state_key()[1:])
+        self.assertEqual(repr(bq), repr(persistent_bq))
+        self.assertEqual(bq.is_over(), persistent_bq.is_over())
+
+    def test_same_games(self):
+        """
+        Test that random games, and undoing them, go the same way in a
+        BattleQueue and a PersistentBattleQueue.
+        """
+        rng = random.Random(0)
+        for battle_queue_class, persistent_class in PAIRS:
+            for p1_key in CHARACTER_CLASSES:
+                for p2_key in CHARACTER_CLASSES:
+                    bq = set_up_matchup(p1_key, p2_key, 100,
+                                        battle_queue_class)
+                    persistent_bq = set_up_matchup(p1_key, p2_key, 100,
+                                                   persistent_class)
+                    made = 0
+                    while not bq.is_over():
+                        action = rng.choice(
+                            bq.peek().get_available_actions())
+                        bq.make_move(action)
+                        persistent_bq.make_move(action)
+                        made += 1
+                        self.assert_same(bq, persistent_bq)
+                    for _ in range(made):
+                        bq.unmake_move()
+                        persistent_bq.unmake_move()
+                        self.assert_same(bq, persistent_bq)
+
+    def test_copies_are_independent(self):
+        """
+        Test that moves made in a copy and in the original do not affect
+        each other.
+        """
+        rng = random.Random(1)
+        for _, persistent_class in PAIRS:
+            bq = set_up_matchup('v', 's', battle_queue_class=persistent_class)
+            for _ in range(5):
+                bq.make_move(rng.choice(bq.peek().get_available_actions()))
+            key = bq.get_state_key()
+
+            copies = []
+            for _ in range(3):
+                copy = bq.copy()
+                self.assertEqual(copy.get_state_key(), key)
+                while not copy.is_over():
+                    copy.make_move(rng.choice(
+                        copy.peek().get_available_actions()))
+                copies.append(copy)
+                self.assertEqual(bq.get_state_key(), key)
+
+            bq.make_move(bq.peek().get_available_actions()[0])
+            for copy in copies:
+                self.assertTrue(copy.is_over())
+
+    def test_restricted_copy_keeps_flags(self):
+        """
+        Test that a copy of a PersistentRestrictedBattleQueue has the same
+        restriction flags, counts and seen characters as the original.
+        """
+        bq = set_up_matchup('r', 'm',
+                            battle_queue_class=PersistentRestrictedBattleQueue)
+        bq.set_content(bq.peek(), bq.peek().enemy, [0, 0, 1, 0],
+                       ['Y', 'N', 'Y', 'N'], (True, False))
+        copy = bq.copy()
+        self.assertEqual(copy.get_state_key(), bq.get_state_key())
+
+        p1 = copy.peek()
+        copy.add(p1)
+        self.assertEqual(copy._counts[p1], 4)
+        self.assertEqual(list(bq._restriction_lst), ['Y', 'N', 'Y', 'N'])
+
+    def test_ends_after_appends(self):
+        """
+        Test that the ends of a PersistentDeque built only by appending (or
+        only by appending to the front) are found without going through it
+        each time, and that finding them does not change its copies.
+        """
+        for add in [PersistentDeque.append, PersistentDeque.appendleft]:
+            queue = PersistentDeque()
+            for item in range(1000):
+                add(queue, item)
+            copy = queue.copy()
+            first, last = (0, 999) if add is PersistentDeque.append \
+                else (999, 0)
+            self.assertEqual((queue[0], queue[-1]), (first, last))
+            self.assertIsNotNone(queue._front)
+            self.assertIsNotNone(queue._back)
+            self.assertEqual(list(copy), list(queue))
+
+            queue.popleft()
+            queue.pop()
+            self.assertEqual(list(queue), list(copy)[1:-1])
+            self.assertEqual(len(copy), 1000)
+
+    def test_same_scores(self):
+        """
+        Test that searching a PersistentBattleQueue gives the same score as
+        searching the BattleQueue it stands in for.
+        """
+        for battle_queue_class, persistent_class in PAIRS:
+            for p1_key, p2_key in [('m', 'r'), ('v', 's'), ('s', 'm')]:
+                bq = set_up_matchup(p1_key, p2_key, 20, battle_queue_class)
+                persistent_bq = set_up_matchup(p1_key, p2_key, 20,
+                                               persistent_class)
+                self.assertEqual(get_state_score(bq, None),
+                                 get_state_score(persistent_bq, None))
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,224 @@
+"""
+A deque whose copies share their contents, for A2's PersistentBattleQueues.
+
+A PersistentDeque keeps its items in two immutable linked lists (a banker's
+queue): the front of the deque in order, and the back of the deque in
+reverse. Adding or removing an item only changes which cells the deque
+points to, and never changes a cell, so copy can share every cell with
+the original and takes constant time.
+
+When one end runs out, the other list is reversed into new cells. Each item
+is moved at most once by a deque that is only used from one end, so every
+operation takes constant time on average. When an end that has run out is
+only looked at, the items are split between the two lists instead, so that
+both ends can be found until one of them runs out again.
+"""
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+# A linked list is either None (empty) or a pair (item, rest of the list).
+_Cells = Optional[Tuple[Any, Any]]
+
+
+def _reverse(cells: _Cells) -> _Cells:
+    """
+    Return new cells holding the items of cells in reverse order.
+
+    >>> _reverse((1, (2, (3, None))))
+    (3, (2, (1, None)))
+    """
+    reversed_cells = None
+    while cells is not None:
+        reversed_cells = (cells[0], reversed_cells)
+        cells = cells[1]
+    return reversed_cells
+
+
+def _iterate(cells: _Cells) -> Iterator[Any]:
+    """
+    Yield the items of cells in order.
+    """
+    while cells is not None:
+        yield cells[0]
+        cells = cells[1]
+
+
+class PersistentDeque:
+    """
+    A double-ended queue with the same methods as collections.deque that
+    BattleQueues use, and a copy that takes constant time.
+
+    >>> queue = PersistentDeque([1, 2])
+    >>> queue.append(3)
+    >>> copy = queue.copy()
+    >>> queue.popleft()
+    1
+    >>> copy.appendleft(0)
+    >>> queue
+    PersistentDeque([2, 3])
+    >>> copy
+    PersistentDeque([0, 1, 2, 3])
+    """
+    __slots__ = ['_front', '_back', '_length']
+    _front: _Cells
+    _back: _Cells
+    _length: int
+
+    def __init__(self, items: Iterable[Any] = ()) -> None:
+        """
+        Initialize this PersistentDeque with items, from front to back.
+        """
+        self._front = None
+        self._back = None
+        self._length = 0
+        for item in items:
+            self.append(item)
+
+    def append(self, item: Any) -> None:
+        """
+        Add item to the back of this PersistentDeque.
+        """
+        self._back = (item, self._back)
+        self._length += 1
+
+    def appendleft(self, item: Any) -> None:
+        """
+        Add item to the front of this PersistentDeque.
+        """
+        self._front = (item, self._front)
+        self._length += 1
+
+    def popleft(self) -> Any:
+        """
+        Remove and return the item at the front of this PersistentDeque.
+
+        Raise IndexError if it is empty.
+
+        >>> queue = PersistentDeque([1, 2])
+        >>> queue.popleft()
+        1
+        >>> queue.popleft()
+        2
+        >>> queue.popleft()
+        Traceback (most recent call last):
+        ...
+        IndexError: pop from an empty deque
+        """
+        if self._front is None:
+            self._front, self._back = _reverse(self._back), None
+        if self._front is None:
+            raise IndexError('pop from an empty deque')
+        item, self._front = self._front
+        self._length -= 1
+        return item
+
+    def pop(self) -> Any:
+        """
+        Remove and return the item at the back of this PersistentDeque.
+
+        Raise IndexError if it is empty.
+
+        >>> queue = PersistentDeque([1, 2])
+        >>> queue.appendleft(0)
+        >>> queue.pop()
+        2
+        >>> queue
+        PersistentDeque([0, 1])
+        """
+        if self._back is None:
+            self._back, self._front = _reverse(self._front), None
+        if self._back is None:
+            raise IndexError('pop from an empty deque')
+        item, self._back = self._back
+        self._length -= 1
+        return item
+
+    def _split(self) -> None:
+        """
+        Move the items of this PersistentDeque into new cells, with the
+        first half (and the middle item) in the front and the rest in the
+        back, so that neither end is empty if there are two or more items.
+
+        >>> queue = PersistentDeque([1, 2, 3])
+        >>> queue._split()
+        >>> queue._front, queue._back
+        ((1, (2, None)), (3, None))
+        """
+        items = list(self)
+        middle = (len(items) + 1) // 2
+        self._front = None
+        for item in reversed(items[:middle]):
+            self._front = (item, self._front)
+        self._back = None
+        for item in items[middle:]:
+            self._back = (item, self._back)
+
+    def copy(self) -> 'PersistentDeque':
+        """
+        Return a copy of this PersistentDeque, which shares all of its
+        items' cells.
+        """
+        other = PersistentDeque()
+        other._front = self._front
+        other._back = self._back
+        other._length = self._length
+        return other
+
+    def count(self, item: Any) -> int:
+        """
+        Return the number of items in this PersistentDeque equal to item.
+
+        >>> PersistentDeque([1, 2, 1]).count(1)
+        2
+        """
+        return sum(1 for other in self if other == item)
+
+    def __getitem__(self, index: int) -> Any:
+        """
+        Return the item at index. The items at either end take constant
+        time to find on average.
+
+        >>> queue = PersistentDeque([1, 2, 3])
+        >>> queue[0], queue[1], queue[-1]
+        (1, 2, 3)
+        """
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('deque index out of range')
+
+        if index == 0 or index == self._length - 1:
+            if self._front is None or \
+                    (self._back is None and self._length > 1):
+                self._split()
+            if index == 0:
+                return self._front[0]
+            return self._back[0]
+        for i, item in enumerate(self):
+            if i == index:
+                return item
+        raise IndexError('deque index out of range')
+
+    def __iter__(self) -> Iterator[Any]:
+        """
+        Return an iterator over the items of this PersistentDeque, from
+        front to back.
+        """
+        yield from _iterate(self._front)
+        yield from reversed(list(_iterate(self._back)))
+
+    def __len__(self) -> int:
+        """
+        Return the number of items in this PersistentDeque.
+        """
+        return self._length
+
+    def __repr__(self) -> str:
+        """
+        Return a representation of this PersistentDeque.
+        """
+        return 'PersistentDeque({})'.format(list(self))
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
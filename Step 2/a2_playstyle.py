@@ -7,7 +7,25 @@ creating classes for both Iterative Minimax and Recursive Minimax.
 """
 from typing import Any
 import random
+import time
 from a2_state_stack import StateStack
+from a2_transposition_table import TranspositionTable
+from a2_battle_state import BattleState, apply_move, acts_again, \
+    get_battle_state_score
+from a2_tablebase import DEFAULT_DIRECTORY, find_tablebase
+
+# The TranspositionTable shared by get_state_score, get_state_score_iterative
+# and the Minimax playstyles.
+TRANSPOSITION_TABLE = TranspositionTable()
+
+# Returned by TranspositionTable.get when a state has not been scored yet.
+# (A stored score may itself be None.)
+_MISSING = object()
+
+_INFINITY = float('inf')
+
+# The default number of milliseconds MinimaxTimed may think about a move.
+DEFAULT_TIME_BUDGET = 500
 
 class Playstyle:
     """
@@ -72,13 +90,18 @@ class ManualPlaystyle(Playstyle):
 class RandomPlaystyle(Playstyle):
     """
     The Random playstyle. Inherits from Playstyle.
+
+    rng - The random number generator attacks are picked with (by default,
+          the random module).
     """
-    def __init__(self, battle_queue: 'BattleQueue') -> None:
+    def __init__(self, battle_queue: 'BattleQueue',
+                 rng: random.Random = None) -> None:
         """
         Initialize this RandomPlaystyle with BattleQueue as its battle queue.
         """
         super().__init__(battle_queue)
         self.is_manual = False
+        self.rng = random if rng is None else rng
     
     def select_attack(self, parameter: Any = None) -> str:
         """
@@ -92,21 +115,53 @@ class RandomPlaystyle(Playstyle):
         if not actions:
             return 'X'
         
-        return random.choice(actions)
+        return self.rng.choice(actions)
     
     def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
         """
         Return a copy of this RandomPlaystyle which uses the 
         BattleQueue new_battle_queue.
         """
-        return RandomPlaystyle(new_battle_queue)
+        return RandomPlaystyle(new_battle_queue, self.rng)
 
 
-def get_state_score(battle_queue: 'BattleQueue') -> int:
+class SearchStats:
+    """
+    Counters describing the work done by a search.
+
+    nodes - the number of states visited.
+    cutoffs - the number of subtrees that were skipped by alpha-beta pruning.
+    """
+    nodes: int
+    cutoffs: int
+
+    def __init__(self) -> None:
+        """
+        Initialize this SearchStats with all counters at 0.
+        """
+        self.nodes = 0
+        self.cutoffs = 0
+
+    def __repr__(self) -> str:
+        """
+        Return a representation of this SearchStats.
+        """
+        return 'SearchStats(nodes: {}, cutoffs: {})'.format(self.nodes,
+                                                           self.cutoffs)
+
+
+def get_state_score(battle_queue: 'BattleQueue',
+                    table: TranspositionTable = TRANSPOSITION_TABLE,
+                    stats: SearchStats = None) -> int:
     """
     Return an int corresponding to the highest score that the next player in
     battle_queue can guarantee.
 
+    Scores of states that have already been searched are looked up in table,
+    and the scores of newly searched states are stored in it. If table is
+    None, every state is searched. If stats is given, the states visited are
+    counted in it.
+
     For a state that's over, the score is the HP of the character who still has
     HP if the next player who was supposed to act is the winner. If the next
     player who was supposed to act is the loser, then the score is -1 * the
@@ -136,36 +191,54 @@ def get_state_score(battle_queue: 'BattleQueue') -> int:
     >>> get_state_score(bq)
     -10
     """
+    if stats is not None:
+        stats.nodes += 1
+
     if battle_queue.is_over():
         return get_score_when_is_over(battle_queue)
-    else:
-        score_1, score_2 = None, None
-        curr_player = battle_queue.peek()
-        actions = curr_player.get_available_actions()
-        bq1, bq2 = battle_queue.copy(), battle_queue.copy()
-        curr_player1, curr_player2 = bq1.remove(), bq2.remove()
 
-        if 'A' in actions:
-            curr_player1.attack()
-            score_1 = get_state_score(bq1)
-        if 'S' in actions:
-            curr_player2.special_attack()
-            score_2 = get_state_score(bq2)
+    key = None
+    if table is not None:
+        key = battle_queue.get_state_key()
+        score = table.get(key, _MISSING)
+        if score is not _MISSING:
+            return score
 
-        max_ = True if curr_player1.get_name() == bq1.peek().get_name() else False
-        if max_:
-            if score_1 and score_2:
-                return max(score_1, score_2)
-            else:
-                return score_1 if score_1 else score_2 if score_2 else None
+    score_1, score_2 = None, None
+    curr_player = battle_queue.peek()
+    actions = curr_player.get_available_actions()
+
+    curr_player1 = battle_queue.make_move('A' if 'A' in actions else 'X')
+    if 'A' in actions:
+        score_1 = get_state_score(battle_queue, table, stats)
+    max_ = True if curr_player1.get_name() == battle_queue.peek().get_name() else False
+    battle_queue.unmake_move()
+
+    if 'S' in actions:
+        battle_queue.make_move('S')
+        score_2 = get_state_score(battle_queue, table, stats)
+        battle_queue.unmake_move()
+
+    if max_:
+        if score_1 and score_2:
+            score = max(score_1, score_2)
         else:
-            if score_1 and score_2:
-                return -min(score_1, score_2)
-            else:
-                return -score_1 if score_1 else -score_2 if score_2 else None
+            score = score_1 if score_1 else score_2 if score_2 else None
+    else:
+        if score_1 and score_2:
+            score = -min(score_1, score_2)
+        else:
+            score = -score_1 if score_1 else -score_2 if score_2 else None
+
+    if table is not None:
+        table.put(key, score)
 
+    return score
 
-def get_state_score_iterative(battle_queue: 'BattleQueue') -> int:
+
+def get_state_score_iterative(battle_queue: 'BattleQueue',
+                              table: TranspositionTable = TRANSPOSITION_TABLE,
+                              stats: SearchStats = None) -> int:
     """
     Same as get_state_score but without recursion.
 
@@ -193,51 +266,61 @@ def get_state_score_iterative(battle_queue: 'BattleQueue') -> int:
     -10
     """
     if battle_queue.is_over():
+        if stats is not None:
+            stats.nodes += 1
         return get_score_when_is_over(battle_queue)
 
     s = StateStack()
     count = 1
-    parent_state = State(1, battle_queue.copy())
+    parent_state = State(1, battle_queue)
     s.add(parent_state)
 
     while not s.is_empty():
         parent_state = s.remove()
         battle_queue = parent_state.bq
 
-        if battle_queue.is_over():
-            score = get_score_when_is_over(battle_queue)
-            parent_state.score = score
-        elif parent_state.children:
+        if parent_state.children:
             scores = [child.score for child in parent_state.children if child.score]
             score = None
-            max_ = True if battle_queue.peek().get_name() == parent_state.children[0].bq.peek().get_name() else False
             if scores:
-                if max_:
+                if parent_state.max_:
                     score = max(scores)
                 else:
                     score = -min(scores)
             parent_state.score = score
-        else:
-            s.add(parent_state)
-            curr_player = battle_queue.peek()
-            actions = curr_player.get_available_actions()
-            if 'A' in actions:
-                bq1 = battle_queue.copy()
-                curr_player1 = bq1.remove()
-                curr_player1.attack()
-                count += 1
-                child_state1 = State(count, bq1)
-                parent_state.children.append(child_state1)
-                s.add(child_state1)
-
-            if 'S' in actions:
-                bq2 = battle_queue.copy()
-                curr_player2 = bq2.remove()
-                curr_player2.special_attack()
+            if table is not None:
+                table.put(parent_state.get_key(), score)
+            parent_state.unmake_move()
+            continue
+
+        parent_state.make_move()
+        if stats is not None:
+            stats.nodes += 1
+
+        score = _MISSING
+        if battle_queue.is_over():
+            score = get_score_when_is_over(battle_queue)
+        elif table is not None:
+            score = table.get(parent_state.get_key(), _MISSING)
+        if score is not _MISSING:
+            parent_state.score = score
+            parent_state.unmake_move()
+            continue
+
+        s.add(parent_state)
+        curr_player = battle_queue.peek()
+        actions = curr_player.get_available_actions()
+
+        battle_queue.make_move('A' if 'A' in actions else 'S')
+        parent_state.max_ = True if curr_player.get_name() == battle_queue.peek().get_name() else False
+        battle_queue.unmake_move()
+
+        for action in ['A', 'S']:
+            if action in actions:
                 count += 1
-                child_state2 = State(count, bq2)
-                parent_state.children.append(child_state2)
-                s.add(child_state2)
+                child_state = State(count, battle_queue, move=action)
+                parent_state.children.append(child_state)
+                s.add(child_state)
 
     return parent_state.score
 
@@ -258,48 +341,681 @@ def get_score_when_is_over(battle_queue):
 
 
 class State:
-    def __init__(self, num, bq, score=None) -> None:
+    def __init__(self, num, bq, score=None, move=None) -> None:
         self.num = num
         self.bq = bq
         self.score = score
         self.children = []
+        self.move = move
+        self.max_ = None
+        self._key = None
+
+    def make_move(self) -> None:
+        """
+        Make the move that leads from this State's parent to this State in
+        bq. The root State has no move.
+        """
+        if self.move is not None:
+            self.bq.make_move(self.move)
+
+    def unmake_move(self) -> None:
+        """
+        Revert the move made by make_move.
+        """
+        if self.move is not None:
+            self.bq.unmake_move()
+
+    def get_key(self) -> tuple:
+        """
+        Return the state key of this State's BattleQueue.
+        """
+        if self._key is None:
+            self._key = self.bq.get_state_key()
+        return self._key
 
     def __repr__(self):
         return 'State: {}, Score: {}'.format(self.num, self.score)
 
 
+def _expand(battle_queue: 'BattleQueue') -> tuple:
+    """
+    Return a tuple (max_, actions) for the next player in battle_queue, where
+    actions are the moves that player can make and max_ is whether that
+    player acts again after attacking (or after only leaving the queue, if
+    they cannot attack).
+
+    This makes the same choice of max_ as get_state_score. Special attacks
+    are listed first since they usually score best, which lets alpha-beta
+    pruning skip more of the tree.
+    """
+    actions = battle_queue.peek().get_available_actions()
+    curr_player = battle_queue.make_move('A' if 'A' in actions else 'X')
+    max_ = curr_player.get_name() == battle_queue.peek().get_name()
+    battle_queue.unmake_move()
+
+    return max_, [action for action in ['S', 'A'] if action in actions]
+
+
+def get_state_score_alpha_beta(battle_queue: 'BattleQueue',
+                               table: TranspositionTable = TRANSPOSITION_TABLE,
+                               stats: SearchStats = None) -> int:
+    """
+    Return the same score as get_state_score, using alpha-beta pruning to skip
+    moves that cannot change the score.
+
+    Only exact scores are stored in table, so it can be shared with
+    get_state_score. If stats is given, the states visited and the subtrees
+    skipped are counted in it.
+
+    >>> from a2_battle_queue import BattleQueue
+    >>> from a2_characters import Rogue, Mage
+    >>> bq = BattleQueue()
+    >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+    >>> m = Mage("m", bq, ManualPlaystyle(bq))
+    >>> r.enemy = m
+    >>> m.enemy = r
+    >>> bq.add(r)
+    >>> bq.add(m)
+    >>> m.set_hp(3)
+    >>> get_state_score_alpha_beta(bq)
+    100
+    >>> r.set_hp(40)
+    >>> get_state_score_alpha_beta(bq)
+    40
+    >>> bq.remove()
+    r (Rogue): 40/100
+    >>> bq.add(r)
+    >>> get_state_score_alpha_beta(bq)
+    -10
+    """
+    return _alpha_beta(battle_queue, -_INFINITY, _INFINITY, table, stats)[0]
+
+
+def _alpha_beta(battle_queue: 'BattleQueue', alpha: float, beta: float,
+                table: TranspositionTable, stats: SearchStats) -> tuple:
+    """
+    Return a tuple (score, maybe_tie) for battle_queue searched with the
+    window alpha to beta.
+
+    Like get_state_score, a score of 0 or None (a tie) is ignored whenever
+    another move has a score. That makes a tie the worst score for whoever
+    picks, so a result outside the window is reported as follows:
+        - score >= beta: the real score is at least score.
+        - score <= alpha: the real score is at most score.
+        - maybe_tie is True: the real score is at most alpha, or a tie.
+    Otherwise, score is exact.
+    """
+    if stats is not None:
+        stats.nodes += 1
+
+    if battle_queue.is_over():
+        return get_score_when_is_over(battle_queue), False
+
+    key = None
+    if table is not None:
+        key = battle_queue.get_state_key()
+        score = table.get(key, _MISSING)
+        if score is not _MISSING:
+            return score, False
+
+    max_, actions = _expand(battle_queue)
+    best, maybe_tie, lower = None, False, alpha
+
+    for i, action in enumerate(actions):
+        battle_queue.make_move(action)
+        if max_:
+            score, child_maybe_tie = _alpha_beta(battle_queue, lower, beta,
+                                                 table, stats)
+        else:
+            score, child_maybe_tie = _alpha_beta(battle_queue, -beta, -lower,
+                                                 table, stats)
+            if child_maybe_tie:
+                # A tie would be ignored but a low score would be a cutoff,
+                # so the exact score is needed.
+                score = _alpha_beta(battle_queue, -_INFINITY, _INFINITY,
+                                    table, stats)[0]
+                child_maybe_tie = False
+            score = -score if score else score
+        battle_queue.unmake_move()
+
+        if child_maybe_tie:
+            maybe_tie = True
+            continue
+        if not score:
+            continue
+
+        if best is None or score > best:
+            best = score
+        if best >= beta:
+            if stats is not None:
+                stats.cutoffs += len(actions) - i - 1
+            return best, False
+        lower = max(lower, best)
+
+    if best is None and maybe_tie:
+        return alpha, True
+
+    if best is None or alpha < best < beta:
+        if table is not None:
+            table.put(key, best)
+
+    return best, False
+
+
+def get_state_score_alpha_beta_iterative(
+        battle_queue: 'BattleQueue',
+        table: TranspositionTable = TRANSPOSITION_TABLE,
+        stats: SearchStats = None) -> int:
+    """
+    Same as get_state_score_alpha_beta but without recursion.
+
+    >>> from a2_battle_queue import BattleQueue
+    >>> from a2_characters import Rogue, Mage
+    >>> bq = BattleQueue()
+    >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+    >>> m = Mage("m", bq, ManualPlaystyle(bq))
+    >>> r.enemy = m
+    >>> m.enemy = r
+    >>> bq.add(r)
+    >>> bq.add(m)
+    >>> m.set_hp(3)
+    >>> get_state_score_alpha_beta_iterative(bq)
+    100
+    >>> r.set_hp(40)
+    >>> get_state_score_alpha_beta_iterative(bq)
+    40
+    >>> bq.remove()
+    r (Rogue): 40/100
+    >>> bq.add(r)
+    >>> get_state_score_alpha_beta_iterative(bq)
+    -10
+    """
+    s = StateStack()
+    count = 1
+    s.add(AlphaBetaState(count, battle_queue, -_INFINITY, _INFINITY))
+    result = None
+
+    while not s.is_empty():
+        state = s.remove()
+
+        if state.actions is None:
+            state.make_move()
+            if stats is not None:
+                stats.nodes += 1
+
+            score = _MISSING
+            if battle_queue.is_over():
+                score = get_score_when_is_over(battle_queue)
+            elif table is not None:
+                score = table.get(state.get_key(), _MISSING)
+            if score is not _MISSING:
+                result = (score, False)
+                state.unmake_move()
+                continue
+
+            state.expand()
+        else:
+            score, child_maybe_tie = result
+
+            if not state.max_ and child_maybe_tie:
+                # Search the same child again for its exact score.
+                s.add(state)
+                count += 1
+                s.add(AlphaBetaState(count, battle_queue, -_INFINITY,
+                                     _INFINITY, state.actions[state.index]))
+                continue
+
+            if state.update(score, child_maybe_tie):
+                if stats is not None:
+                    stats.cutoffs += len(state.actions) - state.index - 1
+                result = (state.best, False)
+                state.unmake_move()
+                continue
+
+            state.index += 1
+
+        if state.index < len(state.actions):
+            s.add(state)
+            count += 1
+            lower, upper = state.next_window()
+            s.add(AlphaBetaState(count, battle_queue, lower, upper,
+                                 state.actions[state.index]))
+        else:
+            result = state.finish(table)
+            state.unmake_move()
+
+    return result[0]
+
+
+class AlphaBetaState:
+    """
+    A state of get_state_score_alpha_beta_iterative: a BattleQueue being
+    searched with the window alpha to beta, and the progress of that search.
+    """
+    def __init__(self, num, bq, alpha, beta, move=None) -> None:
+        self.num = num
+        self.bq = bq
+        self.alpha = alpha
+        self.beta = beta
+        self.move = move
+        self.max_ = None
+        self.actions = None
+        self.index = 0
+        self.best = None
+        self.maybe_tie = False
+        self.lower = alpha
+        self._key = None
+
+    def make_move(self) -> None:
+        """
+        Make the move that leads from this AlphaBetaState's parent to this
+        AlphaBetaState in bq. The root has no move.
+        """
+        if self.move is not None:
+            self.bq.make_move(self.move)
+
+    def unmake_move(self) -> None:
+        """
+        Revert the move made by make_move.
+        """
+        if self.move is not None:
+            self.bq.unmake_move()
+
+    def get_key(self) -> tuple:
+        """
+        Return the state key of this AlphaBetaState's BattleQueue.
+        """
+        if self._key is None:
+            self._key = self.bq.get_state_key()
+        return self._key
+
+    def expand(self) -> None:
+        """
+        Find the moves that can be made from this AlphaBetaState.
+        """
+        self.max_, self.actions = _expand(self.bq)
+
+    def next_window(self) -> tuple:
+        """
+        Return the window that the next child should be searched with.
+        """
+        if self.max_:
+            return self.lower, self.beta
+        return -self.beta, -self.lower
+
+    def update(self, score, child_maybe_tie) -> bool:
+        """
+        Update this AlphaBetaState with the result of searching the child at
+        index. Return whether the remaining children can be skipped.
+        """
+        if child_maybe_tie:
+            self.maybe_tie = True
+            return False
+
+        if not self.max_ and score:
+            score = -score
+        if not score:
+            return False
+
+        if self.best is None or score > self.best:
+            self.best = score
+        if self.best >= self.beta:
+            return True
+        self.lower = max(self.lower, self.best)
+        return False
+
+    def finish(self, table: TranspositionTable) -> tuple:
+        """
+        Return the (score, maybe_tie) result of this AlphaBetaState once all
+        of its children have been searched, storing exact scores in table.
+        """
+        if self.best is None and self.maybe_tie:
+            return self.alpha, True
+
+        if self.best is None or self.alpha < self.best < self.beta:
+            if table is not None:
+                table.put(self.get_key(), self.best)
+
+        return self.best, False
+
+    def __repr__(self):
+        return 'AlphaBetaState: {}, Window: ({}, {})'.format(self.num,
+                                                            self.alpha,
+                                                            self.beta)
+
+
+def _combine_scores(max_: bool, score_1: int, score_2: int,
+                    estimated: bool = False) -> int:
+    """
+    Return the score of a state whose children scored score_1 (after 'A')
+    and score_2 (after 'S'), the same way get_state_score does, where a
+    score of 0 or None is missing.
+
+    If estimated, the scores may be estimates from get_state_heuristic, for
+    which 0 is a score like any other, so only None is missing.
+
+    >>> _combine_scores(True, 0, -50)
+    -50
+    >>> _combine_scores(True, 0, -50, True)
+    0
+    """
+    if estimated:
+        scores = [score for score in [score_1, score_2] if score is not None]
+        if not scores:
+            return None
+        return max(scores) if max_ else -min(scores)
+    if max_:
+        if score_1 and score_2:
+            return max(score_1, score_2)
+        return score_1 if score_1 else score_2 if score_2 else None
+    if score_1 and score_2:
+        return -min(score_1, score_2)
+    return -score_1 if score_1 else -score_2 if score_2 else None
+
+
+def _choose_action(max_: bool, score_1: int, score_2: int,
+                   estimated: bool = False) -> str:
+    """
+    Return the action ('A' or 'S') a Minimax playstyle picks when the states
+    after 'A' and 'S' scored score_1 and score_2, and max_ is whether the
+    current player also acts next after 'A'. Scores that are missing are
+    as in _combine_scores.
+
+    >>> _choose_action(True, 0, -50)
+    'S'
+    >>> _choose_action(True, 0, -50, True)
+    'A'
+    """
+    if estimated:
+        if score_1 is None or score_2 is None:
+            return 'S' if score_1 is None else 'A'
+        if max_:
+            return 'A' if score_1 > score_2 else 'S'
+        return 'A' if score_1 < score_2 else 'S'
+    if max_:
+        if score_1 and score_2:
+            return 'A' if score_1 > score_2 else 'S'
+        return 'A' if score_1 else 'S'
+    if score_1 and score_2:
+        return 'A' if score_1 < score_2 else 'S'
+    return 'A' if score_1 else 'S'
+
+
+def _split(battle_queue: 'BattleQueue', depth: int, snapshots: dict) -> tuple:
+    """
+    Return a plan for scoring battle_queue by expanding it depth more plies
+    and adding the BattleStates left to score to snapshots, which maps each
+    BattleState to its index in the results.
+
+    A plan is one of:
+        ('score', score) - the game is over and scored score.
+        ('leaf', index) - the score is the result at index.
+        ('node', max_, plan_1, plan_2) - combine the plans for 'A' and 'S'
+                                        (None if not available).
+    """
+    if battle_queue.is_over():
+        return 'score', get_score_when_is_over(battle_queue)
+
+    if depth == 0:
+        state = BattleState.from_battle_queue(battle_queue)
+        if state not in snapshots:
+            snapshots[state] = len(snapshots)
+        return 'leaf', snapshots[state]
+
+    plan_1, plan_2 = None, None
+    actions = battle_queue.peek().get_available_actions()
+
+    curr_player = battle_queue.make_move('A' if 'A' in actions else 'X')
+    if 'A' in actions:
+        plan_1 = _split(battle_queue, depth - 1, snapshots)
+    max_ = curr_player.get_name() == battle_queue.peek().get_name()
+    battle_queue.unmake_move()
+
+    if 'S' in actions:
+        battle_queue.make_move('S')
+        plan_2 = _split(battle_queue, depth - 1, snapshots)
+        battle_queue.unmake_move()
+
+    return 'node', max_, plan_1, plan_2
+
+
+def _can_split(battle_queue: 'BattleQueue') -> bool:
+    """
+    Return whether the states of battle_queue can be scored as BattleStates,
+    which name the characters p1 and p2 and give Sorcerers the default tree:
+    the characters' names are different (since the searches tell the players
+    apart by name), and any Sorcerers use the default tree.
+
+    >>> from a2_battle_queue import BattleQueue
+    >>> from a2_characters import Rogue, Mage
+    >>> bq = BattleQueue()
+    >>> r = Rogue("x", bq, ManualPlaystyle(bq))
+    >>> m = Mage("x", bq, ManualPlaystyle(bq))
+    >>> r.enemy = m
+    >>> m.enemy = r
+    >>> bq.add(r)
+    >>> bq.add(m)
+    >>> _can_split(bq)
+    False
+    """
+    key = battle_queue.get_state_key()
+    return len(key[1]) == 4 and len(key[2]) == 4 and key[1][1] != key[2][1]
+
+
+def _merge(plan: tuple, results: list) -> int:
+    """
+    Return the score of plan given the results of its BattleStates.
+    """
+    if plan is None:
+        return None
+    if plan[0] == 'score':
+        return plan[1]
+    if plan[0] == 'leaf':
+        return results[plan[1]]
+    return _combine_scores(plan[1], _merge(plan[2], results),
+                           _merge(plan[3], results))
+
+
+def _score_battle_state(get_state_score_function: Any,
+                        state: BattleState) -> int:
+    """
+    Return the score of state given by get_state_score_function, using the
+    TRANSPOSITION_TABLE of the process this runs in.
+
+    This runs in the worker processes of a Minimax's executor.
+    """
+    return get_state_score_function(state.to_battle_queue(),
+                                    TRANSPOSITION_TABLE)
+
+
+class SearchTimeout(Exception):
+    """
+    Raised by get_state_score_depth_limited when it runs past its deadline.
+    """
+    pass
+
+
+def get_state_heuristic(battle_queue: 'BattleQueue') -> int:
+    """
+    Return an estimate of the score of battle_queue for a game that is not
+    over: the next player's HP minus their enemy's HP.
+
+    >>> from a2_battle_queue import BattleQueue
+    >>> from a2_characters import Rogue, Vampire
+    >>> bq = BattleQueue()
+    >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+    >>> v = Vampire("v", bq, ManualPlaystyle(bq))
+    >>> r.enemy = v
+    >>> v.enemy = r
+    >>> bq.add(v)
+    >>> bq.add(r)
+    >>> r.set_hp(70)
+    >>> get_state_heuristic(bq)
+    30
+    """
+    curr_player = battle_queue.peek()
+    return curr_player.get_hp() - curr_player.enemy.get_hp()
+
+
+def get_state_score_depth_limited(battle_queue: 'BattleQueue', depth: int,
+                                  deadline: float = _INFINITY,
+                                  table: TranspositionTable =
+                                  TRANSPOSITION_TABLE,
+                                  cache: dict = None,
+                                  stats: SearchStats = None) -> tuple:
+    """
+    Return a tuple (score, exact) where score is the score of battle_queue
+    found by searching depth moves ahead, and exact is whether every state
+    searched was over (so score is the same as get_state_score's).
+
+    States depth moves ahead that are not over are scored with
+    get_state_heuristic. Exact scores are looked up in and stored in table,
+    and estimated scores in cache (if given), by state and depth.
+
+    Raise SearchTimeout if time.perf_counter() passes deadline. battle_queue
+    is left unchanged either way.
+
+    >>> from a2_battle_queue import BattleQueue
+    >>> from a2_characters import Rogue, Mage
+    >>> bq = BattleQueue()
+    >>> r = Rogue("r", bq, ManualPlaystyle(bq))
+    >>> m = Mage("m", bq, ManualPlaystyle(bq))
+    >>> r.enemy = m
+    >>> m.enemy = r
+    >>> bq.add(r)
+    >>> bq.add(m)
+    >>> get_state_score_depth_limited(bq, 2, table=None)
+    (-18, False)
+    >>> r.set_hp(40)
+    >>> m.set_hp(3)
+    >>> get_state_score_depth_limited(bq, 2, table=None)
+    (40, True)
+    """
+    if stats is not None:
+        stats.nodes += 1
+    if time.perf_counter() > deadline:
+        raise SearchTimeout
+
+    if battle_queue.is_over():
+        return get_score_when_is_over(battle_queue), True
+
+    key = battle_queue.get_state_key()
+    if table is not None:
+        score = table.get(key, _MISSING)
+        if score is not _MISSING:
+            return score, True
+
+    if depth == 0:
+        return get_state_heuristic(battle_queue), False
+    if cache is not None and (key, depth) in cache:
+        return cache[(key, depth)], False
+
+    score_1, score_2 = None, None
+    exact_1, exact_2 = True, True
+    actions = battle_queue.peek().get_available_actions()
+
+    curr_player1 = battle_queue.make_move('A' if 'A' in actions else 'X')
+    try:
+        if 'A' in actions:
+            score_1, exact_1 = get_state_score_depth_limited(
+                battle_queue, depth - 1, deadline, table, cache, stats)
+        max_ = curr_player1.get_name() == battle_queue.peek().get_name()
+    finally:
+        battle_queue.unmake_move()
+
+    if 'S' in actions:
+        battle_queue.make_move('S')
+        try:
+            score_2, exact_2 = get_state_score_depth_limited(
+                battle_queue, depth - 1, deadline, table, cache, stats)
+        finally:
+            battle_queue.unmake_move()
+
+    # Exact scores are combined as get_state_score combines them, so that
+    # they match its scores, and estimates so that a score of 0 counts.
+    exact = exact_1 and exact_2
+    score = _combine_scores(max_, score_1, score_2, not exact)
+    if exact:
+        if table is not None:
+            table.put(key, score)
+        return score, True
+
+    if cache is not None:
+        cache[(key, depth)] = score
+    return score, False
+
+
 class Minimax(Playstyle):
-    def __init__(self, battle_queue):
+    """
+    The Minimax Playstyle superclass.
+
+    executor - None to search on this process, or a
+               concurrent.futures.ProcessPoolExecutor to share the search
+               between its workers.
+    split_depth - How many plies below each of the current player's moves
+                  to expand before handing the states left to the executor.
+    """
+    def __init__(self, battle_queue, executor: Any = None,
+                 split_depth: int = 0):
         super().__init__(battle_queue)
         self.is_manual = False
         self.get_state_score_function = None
+        self.transposition_table = TRANSPOSITION_TABLE
+        self.executor = executor
+        self.split_depth = split_depth
 
     def select_attack(self, parameter: Any = None):
         curr_player = self.battle_queue.peek()
 
         score_1, score_2 = None, None
         actions = curr_player.get_available_actions()
-        bq1, bq2 = self.battle_queue.copy(), self.battle_queue.copy()
-        curr_player1, curr_player2 = bq1.remove(), bq2.remove()
+        bq = self.battle_queue
+        parallel = self.executor is not None and _can_split(bq)
+        if parallel:
+            score_1, score_2 = self._score_in_parallel(actions)
 
-        if 'A' in actions:
-            curr_player1.attack()
-            score_1 = self.get_state_score_function(bq1)
-        if 'S' in actions:
-            curr_player2.special_attack()
-            score_2 = self.get_state_score_function(bq2)
+        bq.make_move('A' if 'A' in actions else 'X')
+        if 'A' in actions and not parallel:
+            score_1 = self.get_state_score_function(bq,
+                                                    self.transposition_table)
+        max_ = True if curr_player == bq.peek() else False
+        bq.unmake_move()
 
-        max_ = True if curr_player1 == bq1.peek() else False
-        if max_:
-            if score_1 and score_2:
-                return 'A' if score_1 > score_2 else 'S'
-            else:
-                return 'A' if score_1 else 'S'
-        else:
-            if score_1 and score_2:
-                return 'A' if score_1 < score_2 else 'S'
+        if 'S' in actions and not parallel:
+            bq.make_move('S')
+            score_2 = self.get_state_score_function(bq,
+                                                    self.transposition_table)
+            bq.unmake_move()
+        return _choose_action(max_, score_1, score_2)
+
+    def _score_in_parallel(self, actions: list) -> tuple:
+        """
+        Return the scores of the states after the current player performs
+        'A' and 'S' (None for an action not in actions), scoring the states
+        split_depth plies below them in self.executor.
+
+        Every state is sent as a BattleState, and the results are merged in
+        the order the states were found, so the scores do not depend on
+        which worker finishes first. select_attack only calls this when
+        _can_split, so the BattleStates are scored the same way as the
+        BattleQueue.
+        """
+        bq = self.battle_queue
+        snapshots = {}
+        plans = []
+        for action in ['A', 'S']:
+            if action in actions:
+                bq.make_move(action)
+                plans.append(_split(bq, self.split_depth, snapshots))
+                bq.unmake_move()
             else:
-                return 'A' if score_1 else 'S'
+                plans.append(None)
+
+        futures = [self.executor.submit(_score_battle_state,
+                                        self.get_state_score_function, state)
+                   for state in snapshots]
+        results = [future.result() for future in futures]
+        return _merge(plans[0], results), _merge(plans[1], results)
 
     def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
         """
@@ -310,8 +1026,9 @@ class Minimax(Playstyle):
 
 
 class MinimaxRecursive(Minimax):
-    def __init__(self, battle_queue):
-        super().__init__(battle_queue)
+    def __init__(self, battle_queue, executor: Any = None,
+                 split_depth: int = 0):
+        super().__init__(battle_queue, executor, split_depth)
         self.get_state_score_function = get_state_score
 
     def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
@@ -319,12 +1036,14 @@ class MinimaxRecursive(Minimax):
         Return a copy of this MinimaxRecursive Playstyle which uses the
         BattleQueue new_battle_queue.
         """
-        return MinimaxRecursive(new_battle_queue)
+        return MinimaxRecursive(new_battle_queue, self.executor,
+                                self.split_depth)
 
 
 class MinimaxIterative(Minimax):
-    def __init__(self, battle_queue):
-        super().__init__(battle_queue)
+    def __init__(self, battle_queue, executor: Any = None,
+                 split_depth: int = 0):
+        super().__init__(battle_queue, executor, split_depth)
         self.get_state_score_function = get_state_score_iterative
 
     def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
@@ -332,7 +1051,147 @@ class MinimaxIterative(Minimax):
         Return a copy of this MinimaxIterative Playstyle which uses the
         BattleQueue new_battle_queue.
         """
-        return MinimaxIterative(new_battle_queue)
+        return MinimaxIterative(new_battle_queue, self.executor,
+                                self.split_depth)
+
+
+class MinimaxAlphaBeta(Minimax):
+    def __init__(self, battle_queue, executor: Any = None,
+                 split_depth: int = 0):
+        super().__init__(battle_queue, executor, split_depth)
+        self.get_state_score_function = get_state_score_alpha_beta
+
+    def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
+        """
+        Return a copy of this MinimaxAlphaBeta Playstyle which uses the
+        BattleQueue new_battle_queue.
+        """
+        return MinimaxAlphaBeta(new_battle_queue, self.executor,
+                                self.split_depth)
+
+
+class MinimaxTimed(Minimax):
+    """
+    A Minimax Playstyle that searches deeper and deeper (iterative
+    deepening) until it either reaches the end of the game or runs out of
+    time.
+
+    time_budget - The number of milliseconds select_attack may take.
+    """
+    def __init__(self, battle_queue, time_budget: int = DEFAULT_TIME_BUDGET):
+        super().__init__(battle_queue)
+        self.get_state_score_function = get_state_score
+        self.time_budget = time_budget
+        self.depth_reached = 0
+
+    def select_attack(self, parameter: Any = None):
+        """
+        Return the move picked by the deepest search that finished within
+        time_budget. If even the shallowest search did not finish, return
+        the first available action.
+        """
+        deadline = time.perf_counter() + self.time_budget / 1000
+        actions = self.battle_queue.peek().get_available_actions()
+        move = actions[0]
+        self.depth_reached = 0
+        if len(actions) == 1:
+            return move
+
+        cache = {}
+        depth = 0
+        while True:
+            try:
+                max_, score_1, score_2, exact = self._search(depth, deadline,
+                                                             cache)
+            except SearchTimeout:
+                return move
+
+            move = _choose_action(max_, score_1, score_2, not exact)
+            self.depth_reached = depth + 1
+            if exact:
+                return move
+            depth += 1
+
+    def _search(self, depth: int, deadline: float, cache: dict) -> tuple:
+        """
+        Return (max_, score_1, score_2, exact) for the states after the
+        current player performs 'A' and 'S', each searched depth moves ahead.
+        """
+        bq = self.battle_queue
+        table = self.transposition_table
+
+        curr_player = bq.make_move('A')
+        try:
+            score_1, exact_1 = get_state_score_depth_limited(
+                bq, depth, deadline, table, cache)
+            max_ = curr_player == bq.peek()
+        finally:
+            bq.unmake_move()
+
+        bq.make_move('S')
+        try:
+            score_2, exact_2 = get_state_score_depth_limited(
+                bq, depth, deadline, table, cache)
+        finally:
+            bq.unmake_move()
+
+        return max_, score_1, score_2, exact_1 and exact_2
+
+    def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
+        """
+        Return a copy of this MinimaxTimed Playstyle which uses the
+        BattleQueue new_battle_queue.
+        """
+        return MinimaxTimed(new_battle_queue, self.time_budget)
+
+
+class TablebasePlaystyle(Playstyle):
+    """
+    A Playstyle that looks up the scores of its moves in a tablebase
+    generated by a2_tablebase instead of searching.
+
+    States that are not in a tablebase (for example, because the game did
+    not start with the tablebase's HP, or the tablebase has not been
+    generated) are scored with get_battle_state_score instead. Tablebases
+    and BattleStates only model Sorcerers with the default tree, so a game
+    with a Sorcerer given another tree is searched as MinimaxAlphaBeta
+    searches it.
+
+    directory - The directory to look for tablebases in.
+    """
+    def __init__(self, battle_queue, directory: str = DEFAULT_DIRECTORY):
+        super().__init__(battle_queue)
+        self.is_manual = False
+        self.directory = directory
+
+    def select_attack(self, parameter: Any = None):
+        try:
+            state = BattleState.from_battle_queue(self.battle_queue)
+        except ValueError:
+            return MinimaxAlphaBeta(self.battle_queue).select_attack()
+        tablebase = find_tablebase(state, self.directory)
+        actions = self.battle_queue.peek().get_available_actions()
+
+        scores = []
+        for action in ['A', 'S']:
+            if action not in actions:
+                scores.append(None)
+                continue
+            child = apply_move(state, action)
+            child_score = _MISSING if tablebase is None else \
+                tablebase.get(child, _MISSING)
+            if child_score is _MISSING:
+                child_score = get_battle_state_score(child)
+            scores.append(child_score)
+
+        return _choose_action(acts_again(state), scores[0], scores[1])
+
+    def copy(self, new_battle_queue: 'BattleQueue') -> 'Playstyle':
+        """
+        Return a copy of this TablebasePlaystyle which uses the
+        BattleQueue new_battle_queue.
+        """
+        return TablebasePlaystyle(new_battle_queue, self.directory)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,385 @@
+"""
+Compact binary replays of A2 games, which can be seeked to any turn.
+
+    python a2_replay.py record --archive games.a2rp --games 1000
+    python a2_replay.py show --archive games.a2rp --game 3 --turn 12
+
+A ReplayWriter records a game as a Match plays it. A replay is only ever
+appended to, so replays can be written one after another into one archive
+file. Each replay is:
+
+    a header: magic (4s), version (B), the snapshot interval K (H), whether
+        the queue is a RestrictedBattleQueue (B), and the kinds of p1 and p2
+        (B, B), as in BattleState
+    the body: one byte for each turn, 'A' or 'S' for p1's moves and 'a' or
+        's' for p2's. At the start of the game and after every K turns, it
+        is followed by a snapshot of the state: '#', the HP and SP of p1 and
+        p2 (H each), the length of the queue (B) and each player in it (B),
+        and, for a RestrictedBattleQueue, the number of restriction flags
+        (B), each flag (B) and the characters that have been added (B)
+    the footer: the offset of each snapshot from the start of the replay
+        (H each), and then the number of turns (H), the winner (b: 0 for
+        p1, 1 for p2, -1 for none), the length of the whole replay (H) and
+        an end magic (4s)
+
+A Replay reads a replay from its footer, so the replays in an archive are
+found by going back from its end. The state at any turn is rebuilt from the
+snapshot at or before it, by having the characters of a BattleQueue in that
+state perform the (at most K - 1) moves after it, the same way a Match does.
+"""
+from typing import BinaryIO, List, Optional, Tuple
+import argparse
+import io
+import random
+import struct
+from array import array
+from a2_battle_state import BattleState
+from a2_game import CHARACTER_CLASSES, PLAYSTYLE_CLASSES, \
+    BATTLE_QUEUE_CLASSES
+from a2_match import Match, perform_move
+
+REPLAY_MAGIC = b'A2RP'
+END_MAGIC = b'A2RE'
+VERSION = 1
+HEADER = struct.Struct('<4sBHBBB')
+SNAPSHOT = struct.Struct('<cHHHHB')
+TRAILER = struct.Struct('<HbH4s')
+SNAPSHOT_MARKER = b'#'
+
+# The byte for each (player, action), and the other way around.
+ACTION_BYTES = {(0, 'A'): b'A', (0, 'S'): b'S', (1, 'A'): b'a',
+                (1, 'S'): b's'}
+ACTIONS = {ord(byte): key for key, byte in ACTION_BYTES.items()}
+
+# The default number of turns between snapshots.
+DEFAULT_INTERVAL = 8
+
+# The longest a replay can be, since its offsets are stored in two bytes.
+MAX_REPLAY_SIZE = 0xFFFF
+
+
+class ReplayWriter:
+    """
+    Writes the replay of a game as it is played.
+
+    file - the binary file the replay is appended to.
+    interval - the number of turns between snapshots.
+    turns - the number of turns recorded so far.
+    """
+    file: BinaryIO
+    interval: int
+    turns: int
+    _restricted: bool
+    _size: int
+    _snapshots: array
+
+    def __init__(self, file: BinaryIO, battle_queue: 'BattleQueue',
+                 interval: int = DEFAULT_INTERVAL) -> None:
+        """
+        Initialize this ReplayWriter, and write the start of the replay of
+        the game in battle_queue, which has not started yet, to file.
+        """
+        if interval < 1:
+            raise ValueError('The interval must be at least 1')
+        self.file = file
+        self.interval = interval
+        self.turns = 0
+        self._size = 0
+        self._snapshots = array('H')
+
+        state = BattleState.from_battle_queue(battle_queue)
+        self._restricted = state.flags is not None
+        self._write(HEADER.pack(REPLAY_MAGIC, VERSION, interval,
+                                self._restricted, state.p1_kind,
+                                state.p2_kind))
+        self._write_snapshot(state)
+
+    def _write(self, data: bytes) -> None:
+        """
+        Append data to the replay.
+        """
+        if self._size + len(data) > MAX_REPLAY_SIZE:
+            raise ValueError('The game is too long to record')
+        self.file.write(data)
+        self._size += len(data)
+
+    def _write_snapshot(self, state: BattleState) -> None:
+        """
+        Append a snapshot of state to the replay.
+        """
+        self._snapshots.append(self._size)
+        data = [SNAPSHOT.pack(SNAPSHOT_MARKER, state.p1_hp, state.p1_sp,
+                              state.p2_hp, state.p2_sp, len(state.queue)),
+                bytes(state.queue)]
+        if self._restricted:
+            data.append(bytes([len(state.flags)] + list(state.flags) +
+                              [state.seen]))
+        self._write(b''.join(data))
+
+    def record(self, player: int, action: str,
+               battle_queue: 'BattleQueue') -> None:
+        """
+        Record that player (0 for p1, 1 for p2) performed action, leaving the
+        game in battle_queue.
+        """
+        self._write(ACTION_BYTES[(player, action)])
+        self.turns += 1
+        if self.turns % self.interval == 0:
+            self._write_snapshot(BattleState.from_battle_queue(battle_queue))
+
+    def close(self, winner: Optional[int]) -> None:
+        """
+        Write the footer of the replay of the game that winner (0 for p1, 1
+        for p2, or None) won. Nothing more can be recorded after this.
+        """
+        index = self._snapshots.tobytes()
+        self._write(index + TRAILER.pack(
+            self.turns, -1 if winner is None else winner,
+            self._size + len(index) + TRAILER.size, END_MAGIC))
+
+
+class Replay:
+    """
+    A replay of a game, read from the bytes a ReplayWriter wrote.
+
+    interval - the number of turns between snapshots.
+    restricted - whether the game was played in a RestrictedBattleQueue.
+    p1_kind, p2_kind - the kinds of the characters, as in BattleState.
+    turns - the number of turns in the game.
+    winner - 0 if p1 won, 1 if p2 won, or None for a tie (or a game that
+             was not finished).
+    """
+    interval: int
+    restricted: bool
+    p1_kind: int
+    p2_kind: int
+    turns: int
+    winner: Optional[int]
+    _data: memoryview
+    _snapshots: array
+
+    def __init__(self, data: bytes, end: int = None) -> None:
+        """
+        Initialize this Replay from the replay in data that ends at end (by
+        default, the end of data).
+
+        Raise ValueError if there is no replay there.
+        """
+        data = memoryview(data)
+        if end is None:
+            end = len(data)
+        if end < TRAILER.size:
+            raise ValueError('No replay ends at {}'.format(end))
+        turns, winner, size, magic = TRAILER.unpack_from(data,
+                                                         end - TRAILER.size)
+        start = end - size
+        if magic != END_MAGIC or start < 0:
+            raise ValueError('No replay ends at {}'.format(end))
+        self._data = data[start:end]
+
+        magic, version, self.interval, restricted, self.p1_kind, \
+            self.p2_kind = HEADER.unpack_from(self._data)
+        if magic != REPLAY_MAGIC or version != VERSION:
+            raise ValueError('Unknown replay format')
+        self.restricted = bool(restricted)
+        self.turns = turns
+        self.winner = None if winner == -1 else winner
+
+        count = turns // self.interval + 1
+        index_start = size - TRAILER.size - 2 * count
+        self._snapshots = array('H')
+        self._snapshots.frombytes(self._data[index_start:index_start +
+                                             2 * count])
+
+    def get_size(self) -> int:
+        """
+        Return the number of bytes this replay takes.
+        """
+        return len(self._data)
+
+    def _read_snapshot(self, offset: int) -> Tuple[BattleState, int]:
+        """
+        Return the state in the snapshot at offset, and the offset of the
+        byte after it.
+        """
+        marker, p1_hp, p1_sp, p2_hp, p2_sp, length = \
+            SNAPSHOT.unpack_from(self._data, offset)
+        if marker != SNAPSHOT_MARKER:
+            raise ValueError('No snapshot at {}'.format(offset))
+        offset += SNAPSHOT.size
+        queue = tuple(self._data[offset:offset + length])
+        offset += length
+
+        flags, seen = None, 0
+        if self.restricted:
+            length = self._data[offset]
+            flags = tuple(self._data[offset + 1:offset + 1 + length])
+            seen = self._data[offset + 1 + length]
+            offset += length + 2
+        return BattleState(self.p1_kind, p1_hp, p1_sp, self.p2_kind, p2_hp,
+                           p2_sp, queue, flags, seen), offset
+
+    def get_moves(self) -> List[tuple]:
+        """
+        Return (player, action) for every turn in the game, in order.
+        """
+        moves = []
+        for offset in self._snapshots:
+            _, offset = self._read_snapshot(offset)
+            for turn in range(self.interval):
+                if len(moves) == self.turns:
+                    return moves
+                moves.append(ACTIONS[self._data[offset + turn]])
+        return moves
+
+    def get_battle_queue(self, turn: int) -> 'BattleQueue':
+        """
+        Return a new BattleQueue in the state the game was in after turn
+        turns, with characters named p1 and p2 that use ManualPlaystyle.
+
+        Raise ValueError if the game did not have that many turns, or the
+        replay does not match the game.
+        """
+        if not 0 <= turn <= self.turns:
+            raise ValueError('No turn {} in a game of {} turns'.format(
+                turn, self.turns))
+        state, offset = self._read_snapshot(
+            self._snapshots[turn // self.interval])
+        battle_queue = state.to_battle_queue()
+        for byte in self._data[offset:offset + turn % self.interval]:
+            player, action = ACTIONS.get(byte, (None, None))
+            character = battle_queue.peek()
+            if player is None or \
+                    character.get_name() != ('p1', 'p2')[player] or \
+                    not character.is_valid_action(action):
+                raise ValueError('The replay does not match the game')
+            perform_move(battle_queue, action)
+        return battle_queue
+
+    def get_state(self, turn: int) -> BattleState:
+        """
+        Return the state the game was in after turn turns.
+        """
+        return BattleState.from_battle_queue(self.get_battle_queue(turn))
+
+
+def read_replays(data: bytes) -> List[Replay]:
+    """
+    Return the replays in data (an archive of replays written one after
+    another), in the order they were written.
+    """
+    replays = []
+    end = len(data)
+    while end > 0:
+        replay = Replay(data, end)
+        replays.append(replay)
+        end -= replay.get_size()
+    replays.reverse()
+    return replays
+
+
+def record_match(match: Match, file: BinaryIO,
+                 interval: int = DEFAULT_INTERVAL) -> 'MatchResult':
+    """
+    Play match until it is over, append its replay to file, and return its
+    result.
+
+    The replay is only appended once the game is over, in one write, so an
+    archive never holds part of a replay.
+    """
+    buffer = io.BytesIO()
+    writer = ReplayWriter(buffer, match.battle_queue, interval)
+    match.recorder = writer
+    result = match.play()
+    writer.close(result.winner)
+    file.write(buffer.getvalue())
+    return result
+
+
+def record_archive(args: argparse.Namespace) -> None:
+    """
+    Record seeded games between random characters into an archive, and
+    print how much space they take.
+    """
+    rng = random.Random(args.seed)
+    games, turns, skipped = 0, 0, 0
+    with open(args.archive, 'ab') as file:
+        start = file.tell()
+        for _ in range(args.games):
+            match = Match(
+                CHARACTER_CLASSES[rng.choice(list(CHARACTER_CLASSES))],
+                CHARACTER_CLASSES[rng.choice(list(CHARACTER_CLASSES))],
+                PLAYSTYLE_CLASSES[args.playstyle],
+                PLAYSTYLE_CLASSES[args.playstyle],
+                BATTLE_QUEUE_CLASSES[rng.choice(list(BATTLE_QUEUE_CLASSES))],
+                rng.randrange(1 << 30))
+            try:
+                turns += record_match(match, file, args.interval).turns
+                games += 1
+            except IndexError:
+                # A few games in a RestrictedBattleQueue empty the queue in
+                # the middle of a turn, and BattleQueue.remove raises
+                # IndexError (as it does in a2_game)
+                skipped += 1
+        size = file.tell() - start
+    print('Recorded {} games ({} turns) in {} bytes, {:.1f} bytes a '
+          'game'.format(games, turns, size, size / max(games, 1)))
+    if skipped:
+        print('Skipped {} games that could not be played'.format(skipped))
+
+
+def show_game(args: argparse.Namespace) -> None:
+    """
+    Print the moves of a game in an archive up to a turn, and the state
+    after it.
+    """
+    with open(args.archive, 'rb') as file:
+        replays = read_replays(file.read())
+    replay = replays[args.game]
+    turn = replay.turns if args.turn is None else args.turn
+    battle_queue = replay.get_battle_queue(turn)
+    print('Game {} of {}: {} turns, winner {}'.format(
+        args.game, len(replays), replay.turns,
+        {None: 'none', 0: 'p1', 1: 'p2'}[replay.winner]))
+    moves = replay.get_moves()[:turn]
+    print('Moves: ' + ' '.join('p{}:{}'.format(player + 1, action)
+                               for player, action in moves))
+    print('After turn {}: {}'.format(turn, battle_queue))
+
+
+def main() -> None:
+    """
+    Record games into an archive, or show a turn of a game in one.
+    """
+    parser = argparse.ArgumentParser(
+        description='Record and seek through replays of A2 games.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    record_parser = commands.add_parser('record', help='record games')
+    record_parser.add_argument('--archive', required=True,
+                               help='the archive to append the replays to')
+    record_parser.add_argument('--games', type=int, default=1000,
+                               help='the number of games to record')
+    record_parser.add_argument('--playstyle', default='r',
+                               help='the key of the playstyle both use')
+    record_parser.add_argument('--interval', type=int,
+                               default=DEFAULT_INTERVAL,
+                               help='the number of turns between snapshots')
+    record_parser.add_argument('--seed', type=int, default=0,
+                               help='the seed of the games')
+    show_parser = commands.add_parser('show', help='show a turn of a game')
+    show_parser.add_argument('--archive', required=True,
+                             help='the archive the game is in')
+    show_parser.add_argument('--game', type=int, default=0,
+                             help='the number of the game in the archive')
+    show_parser.add_argument('--turn', type=int, default=None,
+                             help='the turn to show (by default, the last)')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record_archive(args)
+    else:
+        show_game(args)
+
+
+if __name__ == '__main__':
+    main()
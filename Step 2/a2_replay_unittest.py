@@ -0,0 +1,137 @@
+"""
+Unittests for the replays in a2_replay.
+
+A Replay must give back every move of the game a ReplayWriter recorded, and
+the state the game was in after any turn, rebuilt from no more than the
+snapshot interval's worth of moves. Replays written one after another must
+be read back in order.
+"""
+import io
+import random
+import unittest
+from unittest import mock
+
+import a2_replay
+from a2_battle_queue import BattleQueue, RestrictedBattleQueue
+from a2_battle_state import BattleState
+from a2_characters import Mage, Rogue, Vampire, Sorcerer
+from a2_match import Match
+from a2_playstyle import RandomPlaystyle
+from a2_replay import Replay, ReplayWriter, read_replays, record_match
+
+CHARACTERS = [Mage, Rogue, Vampire, Sorcerer]
+
+
+def play_recorded(seed, interval):
+    """
+    Return the replay of a random game with seed, recorded with interval,
+    and the states the game was in after each turn. Return None for a game
+    that cannot be played to the end.
+    """
+    rng = random.Random(seed)
+    match = Match(rng.choice(CHARACTERS), rng.choice(CHARACTERS),
+                  RandomPlaystyle, RandomPlaystyle,
+                  rng.choice([BattleQueue, RestrictedBattleQueue]), seed)
+    file = io.BytesIO()
+    writer = ReplayWriter(file, match.battle_queue, interval)
+    match.recorder = writer
+    states = [BattleState.from_battle_queue(match.battle_queue)]
+    try:
+        while not match.is_over():
+            match.play_turn()
+            states.append(BattleState.from_battle_queue(match.battle_queue))
+    except IndexError:
+        return None
+    writer.close(match.get_winner())
+    return file.getvalue(), states, match.get_result()
+
+
+class ReplayUnitTests(unittest.TestCase):
+    def test_every_turn(self):
+        """
+        Test that the moves of random games, and the state after every turn,
+        are read back the same as they were played.
+        """
+        for seed in range(150):
+            interval = [1, 3, 8][seed % 3]
+            played = play_recorded(seed, interval)
+            if played is None:
+                continue
+            data, states, result = played
+            replay = Replay(data)
+            self.assertEqual((replay.turns, replay.winner, replay.interval),
+                             (result.turns, result.winner, interval))
+            self.assertEqual(replay.get_moves(),
+                             list(zip(result.players, result.moves)))
+            for turn, state in enumerate(states):
+                self.assertEqual(replay.get_state(turn), state)
+
+    def test_seeking_replays_at_most_interval_moves(self):
+        """
+        Test that rebuilding any turn performs fewer moves than the
+        interval.
+        """
+        data, states, _ = play_recorded(4, 4)
+        replay = Replay(data)
+        perform_move = a2_replay.perform_move
+        for turn in range(len(states)):
+            with mock.patch.object(a2_replay, 'perform_move',
+                                   side_effect=perform_move) as performed:
+                replay.get_battle_queue(turn)
+            self.assertEqual(performed.call_count, turn % 4)
+
+    def test_archive(self):
+        """
+        Test that replays written one after another into an archive are read
+        back in order, and that a game that could not be finished leaves
+        nothing in the archive.
+        """
+        archive = io.BytesIO()
+        results = []
+        for seed in range(20):
+            match = Match(Vampire, Sorcerer, RandomPlaystyle,
+                          RandomPlaystyle, RestrictedBattleQueue, seed)
+            results.append(record_match(match, archive, 5))
+
+        match = Match(Mage, Rogue, RandomPlaystyle, RandomPlaystyle)
+        size = archive.tell()
+        with mock.patch.object(match, 'get_result',
+                               side_effect=RuntimeError('stopped')):
+            with self.assertRaises(RuntimeError):
+                record_match(match, archive)
+        self.assertEqual(archive.tell(), size)
+
+        replays = read_replays(archive.getvalue())
+        self.assertEqual([replay.get_moves() for replay in replays],
+                         [list(zip(result.players, result.moves))
+                          for result in results])
+        self.assertEqual([replay.winner for replay in replays],
+                         [result.winner for result in results])
+
+    def test_errors(self):
+        """
+        Test that a replay that was not written by a ReplayWriter, or does
+        not match its game, raises ValueError.
+        """
+        file = io.BytesIO()
+        result = record_match(Match(Mage, Rogue, RandomPlaystyle,
+                                    RandomPlaystyle, BattleQueue, 1), file)
+        data = file.getvalue()
+        with self.assertRaises(ValueError):
+            Replay(data[:-1])
+        with self.assertRaises(ValueError):
+            Replay(data).get_state(result.turns + 1)
+
+        # The first move is after the header and the first snapshot, of a
+        # queue of two
+        moves = Replay(data).get_moves()
+        offset = a2_replay.HEADER.size + a2_replay.SNAPSHOT.size + 2
+        player, action = moves[0]
+        wrong = a2_replay.ACTION_BYTES[(1 - player, action)]
+        corrupt = data[:offset] + wrong + data[offset + 1:]
+        with self.assertRaises(ValueError):
+            Replay(corrupt).get_state(1)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
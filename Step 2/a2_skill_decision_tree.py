@@ -8,7 +8,9 @@ a2.pdf.
 This tree will be used during the gameplay of a2_game, but we may test your
 SkillDecisionTree with other examples.
 """
-from typing import Callable, List, Union
+from typing import Callable, List, Optional, Tuple, Union
+from functools import lru_cache
+from itertools import product
 from a2_skills import RogueAttack, RogueSpecial, MageAttack, MageSpecial
 
 class SkillDecisionTree:
@@ -21,11 +23,15 @@ class SkillDecisionTree:
                You may assume priority numbers are unique (i.e. no two
                SkillDecisionTrees will have the same number.)
     children - the subtrees of this SkillDecisionTree.
+
+    A Sorcerer's copies share its SkillDecisionTree rather than copying it,
+    so a tree must not be changed once it has been given to a Sorcerer.
     """
     value: 'Skill'
     condition: Callable[['Character', 'Character'], bool]
     priority: int
     children: List['SkillDecisionTree']
+    _compiled: Optional['CompiledSkillDecisionTree']
     
     def __init__(self, value: 'Skill', 
                  condition: Callable[['Character', 'Character'], bool],
@@ -49,6 +55,7 @@ class SkillDecisionTree:
         self.condition = condition
         self.priority = priority
         self.children = children[:] if children else []
+        self._compiled = None
 
     def __repr__(self) -> str:
         """
@@ -122,71 +129,441 @@ class SkillDecisionTree:
             result += child.get_satisfied_sdt(caster, target)
         return result
 
+    def compile(self) -> 'CompiledSkillDecisionTree':
+        """
+        Return a CompiledSkillDecisionTree that picks the same skills as this
+        SkillDecisionTree. It is only built the first time this is called,
+        so this tree must not be changed afterwards.
 
-def create_default_tree() -> SkillDecisionTree:
+        >>> sdt = create_default_tree()
+        >>> sdt.compile() is sdt.compile()
+        True
+        """
+        if self._compiled is None:
+            self._compiled = CompiledSkillDecisionTree(self)
+        return self._compiled
+
+    def __getstate__(self) -> dict:
+        """
+        Return the state of this SkillDecisionTree to pickle, without its
+        compiled tree, whose generated pick_skill cannot be pickled. It is
+        compiled again when it is next needed.
+
+        >>> import pickle
+        >>> sdt = create_default_tree()
+        >>> _ = sdt.compile()
+        >>> pickle.loads(pickle.dumps(sdt))._compiled is None
+        True
+        """
+        state = self.__dict__.copy()
+        state['_compiled'] = None
+        return state
+
+    def __reduce_ex__(self, protocol: int) -> tuple:
+        """
+        Return how to pickle this SkillDecisionTree. The default tree is
+        unpickled as the default tree of the process it is unpickled in, so
+        that the Sorcerers sent to other processes still use it.
+
+        >>> import pickle
+        >>> tree = get_default_tree()
+        >>> pickle.loads(pickle.dumps(tree)) is tree
+        True
+        """
+        if self is get_default_tree():
+            return get_default_tree, ()
+        return super().__reduce_ex__(protocol)
+
+
+# A node of a CompiledSkillDecisionTree: its skill, the indices (in the
+# CompiledSkillDecisionTree's nodes) of the nodes above it from the root
+# down, and whether it is a leaf.
+_Node = Tuple['Skill', Tuple[int, ...], bool]
+
+# The stats that a pure condition can depend on.
+STATS = ('caster_hp', 'caster_sp', 'target_hp', 'target_sp')
+
+# The values of each stat that a pure tree's table covers. Picks for other
+# values are worked out when they are needed.
+TABLE_VALUES = range(0, 201)
+
+# The number of picks remembered for pure trees whose conditions depend on
+# more than one stat each.
+MEMO_SIZE = 4096
+
+# Trees with more conditions than this are picked from by going through their
+# nodes in a loop, since the generated function can double in size with each
+# condition.
+MAX_GENERATED_CONDITIONS = 12
+
+
+class CompiledSkillDecisionTree:
     """
-    Return a SkillDecisionTree that matches the one described in a2.pdf.
+    A SkillDecisionTree flattened for picking skills quickly.
 
-    >>> sdt = create_default_tree()
-    >>> from a2_battle_queue import BattleQueue
-    >>> bq = BattleQueue()
-    >>> from a2_playstyle import ManualPlaystyle
-    >>> from a2_characters import Rogue, Mage, Vampire, Sorcerer
-    >>> caster = Vampire("Caster", bq, ManualPlaystyle(bq))
-    >>> target = Vampire("Target", bq, ManualPlaystyle(bq))
-    >>> caster.set_hp(80)
-    >>> caster.set_sp(40)
-    >>> target.set_hp(20)
-    >>> target.set_sp(50)
-    >>> sdt.get_satisfied_sdt(caster, target)
-    [SDT(6, RogueAttack), SDT(8, RogueAttack), SDT(1, RogueAttack)]
-    >>> sdt.pick_skill(caster, target).__class__.__name__
-    'RogueAttack'
+    pick_skill picks the satisfied node with the lowest priority number,
+    where a node is satisfied if the conditions of every node above it are
+    True, and it is a leaf or its own condition is False. So the nodes are
+    kept in order of priority, and the skill picked is that of the first
+    satisfied one.
+
+    pick_skill is a function generated from the nodes, made of nested ifs
+    that check each condition at most once, and only while the pick still
+    depends on it. It allocates nothing. Since conditions that cannot change
+    the pick are never checked, they must not have side effects.
+
+    If every condition that can be checked is declared with pure_condition,
+    pick_skill_by_stats picks the same skill given just the HP and SP of the
+    caster and target, by looking it up (otherwise it is None). When each
+    condition depends on one stat, every pick is worked out in advance, so
+    that a lookup only takes indexing a table.
+
+    >>> sdt = create_default_tree().compile()
+    >>> [(node[0].__class__.__name__, node[1], node[2])
+    ...  for node in sdt._nodes][:5]
+    [('RogueAttack', (4,), False), ('MageSpecial', (4,), False), \
+('MageAttack', (4,), False), ('RogueSpecial', (4, 2), False), \
+('MageAttack', (), False)]
+    """
+    __slots__ = ['_nodes', '_conditions', 'pick_skill', 'pick_skill_by_stats']
+    _nodes: List[_Node]
+    _conditions: List[Callable[['Character', 'Character'], bool]]
+    pick_skill: Callable[['Character', 'Character'], Union['Skill', None]]
+    pick_skill_by_stats: Optional[Callable[[int, int, int, int],
+                                           Union['Skill', None]]]
+
+    def __init__(self, tree: SkillDecisionTree) -> None:
+        """
+        Initialize this CompiledSkillDecisionTree from the nodes of tree.
+        """
+        # Number the nodes in the order get_satisfied_sdt lists them, so
+        # that nodes with the same priority are picked in the same order.
+        order = []
+        stack = [(tree, None)]
+        while stack:
+            node, parent = stack.pop()
+            order.append((node, parent))
+            for child in reversed(node.children):
+                stack.append((child, len(order) - 1))
+
+        ranks = sorted(range(len(order)),
+                       key=lambda i: (order[i][0].priority, i))
+        index_of = {number: index for index, number in enumerate(ranks)}
+        above = []
+        for node, parent in order:
+            above.append(() if parent is None
+                         else above[parent] + (index_of[parent],))
+
+        self._nodes = [(order[i][0].value, above[i], not order[i][0].children)
+                       for i in ranks]
+        self._conditions = [order[i][0].condition for i in ranks]
+
+        if sum(not leaf for _, _, leaf in self._nodes) \
+                <= MAX_GENERATED_CONDITIONS:
+            self.pick_skill = self._generate()
+        else:
+            self.pick_skill = self._pick_skill_in_loop
+
+        checked = [self._conditions[index]
+                   for index, (_, _, leaf) in enumerate(self._nodes)
+                   if not leaf]
+        if all(hasattr(condition, 'stats') for condition in checked):
+            self.pick_skill_by_stats = _memoize(self.pick_skill, checked)
+        else:
+            self.pick_skill_by_stats = None
+
+    def _generate(self) -> Callable[['Character', 'Character'],
+                                    Union['Skill', None]]:
+        """
+        Return a function that picks a skill the same way as
+        _pick_skill_in_loop, with the loop unrolled into nested ifs.
+        """
+        namespace = {}
+        for index, (skill, _, _) in enumerate(self._nodes):
+            namespace['s{}'.format(index)] = skill
+            namespace['c{}'.format(index)] = self._conditions[index]
+        exec(_generate_source(self._nodes), namespace)
+        return namespace['pick_skill']
+
+    def _pick_skill_in_loop(self, caster: 'Character',
+                            target: 'Character') -> Union['Skill', None]:
+        """
+        Return the skill of the first satisfied node, checking the
+        conditions of the nodes in turn.
+        """
+        conditions = self._conditions
+        for index, (skill, above, leaf) in enumerate(self._nodes):
+            for index_above in above:
+                if not conditions[index_above](caster, target):
+                    break
+            else:
+                if leaf or not conditions[index](caster, target):
+                    return skill
+        return None
+
+
+class _Stats:
     """
-    def caster_hp_gt_90(caster, _):
+    The HP and SP of one character, for the conditions of a
+    SkillDecisionTree.
+    """
+    __slots__ = ['_hp', '_sp']
+
+    def __init__(self, hp: int, sp: int) -> None:
+        """
+        Initialize this _Stats with the HP hp and SP sp.
+        """
+        self._hp = hp
+        self._sp = sp
+
+    def get_hp(self) -> int:
         """
-        Return True if the caster's HP is > 90
+        Return the HP of this _Stats.
         """
-        return caster.get_hp() > 90
+        return self._hp
 
-    def target_sp_gt_40(_, target):
+    def get_sp(self) -> int:
         """
-        Return True if the target's SP is >40
+        Return the SP of this _Stats.
         """
-        return target.get_sp() > 40
+        return self._sp
+
+
+def pure_condition(*stats: str) -> Callable:
+    """
+    Return a decorator that declares a condition pure: it has no side
+    effects, and only depends on stats (some of STATS), which it gets by
+    calling get_hp and get_sp on the caster and target.
 
-    def caster_sp_gt_20(caster, _):
+    >>> @pure_condition('caster_hp')
+    ... def f(caster, _):
+    ...     return caster.get_hp() > 50
+    >>> f.stats
+    ('caster_hp',)
+    >>> pure_condition('caster_name')
+    Traceback (most recent call last):
+    ...
+    ValueError: caster_name is not one of STATS
+    """
+    for stat in stats:
+        if stat not in STATS:
+            raise ValueError('{} is not one of STATS'.format(stat))
+
+    def declare(condition: Callable) -> Callable:
         """
-        Return True if the caster's SP is > 20
+        Declare condition pure, and return it.
         """
-        return caster.get_sp() > 20
+        condition.stats = stats
+        return condition
+    return declare
+
 
-    def target_hp_lt_30(_, target):
+def _memoize(pick_skill: Callable, conditions: List[Callable]) \
+        -> Callable[[int, int, int, int], Union['Skill', None]]:
+    """
+    Return a function of the caster's HP and SP and the target's HP and SP
+    that returns what pick_skill would pick, where conditions are the pure
+    conditions it can check.
+    """
+    def pick_skill_from_stats(caster_hp: int, caster_sp: int, target_hp: int,
+                              target_sp: int) -> Union['Skill', None]:
         """
-        Return True if the target's HP is < 30
+        Return what pick_skill picks for a caster and target with these
+        stats.
         """
-        return target.get_hp() < 30
+        return pick_skill(_Stats(caster_hp, caster_sp),
+                          _Stats(target_hp, target_sp))
+
+    if any(len(condition.stats) > 1 for condition in conditions):
+        return lru_cache(maxsize=MEMO_SIZE)(pick_skill_from_stats)
+    return _tabulate(pick_skill_from_stats, conditions)
+
+
+def _tabulate(pick_skill_from_stats: Callable, conditions: List[Callable]) \
+        -> Callable[[int, int, int, int], Union['Skill', None]]:
+    """
+    Return a function that returns the same as pick_skill_from_stats by
+    looking it up in a table, where each of conditions depends on at most one
+    stat.
 
-    def caster_hp_gt_50(caster, _):
+    For each stat, the values in TABLE_VALUES are grouped by the results of
+    the conditions that depend on it, since values in the same group always
+    get the same pick. The table has a pick for each combination of groups.
+
+    >>> pick = get_default_tree().compile().pick_skill_by_stats
+    >>> pick(100, 40, 50, 30).__class__.__name__
+    'MageSpecial'
+    >>> pick(300, 40, 50, 30).__class__.__name__
+    'MageSpecial'
+    """
+    offsets = []
+    values_of_groups = []
+    for stat in STATS:
+        depending = [condition for condition in conditions
+                     if stat in condition.stats]
+        groups = {}
+        offsets.append({})
+        values_of_groups.append([])
+        for value in TABLE_VALUES:
+            stats = [value if other == stat else 0 for other in STATS]
+            caster = _Stats(stats[0], stats[1])
+            target = _Stats(stats[2], stats[3])
+            results = tuple(condition(caster, target)
+                            for condition in depending)
+            if results not in groups:
+                groups[results] = len(groups)
+                values_of_groups[-1].append(value)
+            offsets[-1][value] = groups[results]
+
+    # Number the combinations of groups in the order product lists them.
+    size = 1
+    for offset, values in reversed(list(zip(offsets, values_of_groups))):
+        for value in offset:
+            offset[value] *= size
+        size *= len(values)
+    table = [pick_skill_from_stats(*stats)
+             for stats in product(*values_of_groups)]
+    caster_hp_offset, caster_sp_offset, target_hp_offset, target_sp_offset = \
+        offsets
+
+    def pick_skill_by_stats(caster_hp: int, caster_sp: int, target_hp: int,
+                            target_sp: int) -> Union['Skill', None]:
         """
-        Return True if the caster's HP is > 50
+        Return the pick for these stats from the table, or work it out if
+        any of them are outside of TABLE_VALUES.
         """
-        return caster.get_hp() > 50
+        try:
+            return table[caster_hp_offset[caster_hp]
+                         + caster_sp_offset[caster_sp]
+                         + target_hp_offset[target_hp]
+                         + target_sp_offset[target_sp]]
+        except KeyError:
+            return pick_skill_from_stats(caster_hp, caster_sp, target_hp,
+                                         target_sp)
+    return pick_skill_by_stats
+
+
+def _generate_source(nodes: List[_Node]) -> str:
+    """
+    Return the source of a pick_skill function for a CompiledSkillDecisionTree
+    with nodes, where the skill of node i is s<i> and its condition is c<i>.
+
+    >>> from a2_skills import MageAttack, RogueAttack
+    >>> root = SkillDecisionTree(MageAttack(), _caster_hp_gt_90, 2,
+    ...                          [SkillDecisionTree(RogueAttack(),
+    ...                                             _no_condition, 1)])
+    >>> print(_generate_source(root.compile()._nodes))
+    def pick_skill(caster, target):
+        if c1(caster, target):
+            return s0
+        return s1
+    <BLANKLINE>
+    """
+    lines = ['def pick_skill(caster, target):']
 
-    def no_condition(_, __):
+    def generate(start: int, known: dict, indent: str) -> None:
         """
-        By default, return True.
+        Add the lines that pick a skill from the nodes from start on, given
+        the conditions in known are known to be True or False.
         """
-        return True
+        for index in range(start, len(nodes)):
+            _, above, leaf = nodes[index]
+            if any(known.get(index_above) is False for index_above in above):
+                continue
+            unknown = [index_above for index_above in above
+                       if index_above not in known]
+            if not unknown and (leaf or known.get(index) is False):
+                lines.append('{}return s{}'.format(indent, index))
+                return
+            if unknown or index not in known:
+                checked = unknown[0] if unknown else index
+                lines.append('{}if c{}(caster, target):'.format(indent,
+                                                                 checked))
+                generate(index, {**known, checked: True}, indent + '    ')
+                generate(index, {**known, checked: False}, indent)
+                return
+        lines.append('{}return None'.format(indent))
+
+    generate(0, {}, '    ')
+    return '\n'.join(lines) + '\n'
+
+
+@pure_condition('caster_hp')
+def _caster_hp_gt_90(caster, _):
+    """
+    Return True if the caster's HP is > 90
+    """
+    return caster.get_hp() > 90
+
+
+@pure_condition('target_sp')
+def _target_sp_gt_40(_, target):
+    """
+    Return True if the target's SP is >40
+    """
+    return target.get_sp() > 40
+
+
+@pure_condition('caster_sp')
+def _caster_sp_gt_20(caster, _):
+    """
+    Return True if the caster's SP is > 20
+    """
+    return caster.get_sp() > 20
+
+
+@pure_condition('target_hp')
+def _target_hp_lt_30(_, target):
+    """
+    Return True if the target's HP is < 30
+    """
+    return target.get_hp() < 30
 
-    priority_1 = SkillDecisionTree(RogueAttack(), caster_hp_gt_90, 1)
-    priority_2 = SkillDecisionTree(MageSpecial(), target_sp_gt_40, 2)
-    priority_3 = SkillDecisionTree(MageAttack(), caster_sp_gt_20, 3)
-    priority_4 = SkillDecisionTree(RogueSpecial(), target_hp_lt_30, 4)
-    priority_5 = SkillDecisionTree(MageAttack(), caster_hp_gt_50, 5)
-    priority_6 = SkillDecisionTree(RogueAttack(), no_condition, 6)
-    priority_7 = SkillDecisionTree(RogueSpecial(), no_condition, 7)
-    priority_8 = SkillDecisionTree(RogueAttack(), no_condition, 8)
+
+@pure_condition('caster_hp')
+def _caster_hp_gt_50(caster, _):
+    """
+    Return True if the caster's HP is > 50
+    """
+    return caster.get_hp() > 50
+
+
+@pure_condition()
+def _no_condition(_, __):
+    """
+    By default, return True.
+    """
+    return True
+
+
+def create_default_tree() -> SkillDecisionTree:
+    """
+    Return a SkillDecisionTree that matches the one described in a2.pdf.
+
+    >>> sdt = create_default_tree()
+    >>> from a2_battle_queue import BattleQueue
+    >>> bq = BattleQueue()
+    >>> from a2_playstyle import ManualPlaystyle
+    >>> from a2_characters import Rogue, Mage, Vampire, Sorcerer
+    >>> caster = Vampire("Caster", bq, ManualPlaystyle(bq))
+    >>> target = Vampire("Target", bq, ManualPlaystyle(bq))
+    >>> caster.set_hp(80)
+    >>> caster.set_sp(40)
+    >>> target.set_hp(20)
+    >>> target.set_sp(50)
+    >>> sdt.get_satisfied_sdt(caster, target)
+    [SDT(6, RogueAttack), SDT(8, RogueAttack), SDT(1, RogueAttack)]
+    >>> sdt.pick_skill(caster, target).__class__.__name__
+    'RogueAttack'
+    """
+    priority_1 = SkillDecisionTree(RogueAttack(), _caster_hp_gt_90, 1)
+    priority_2 = SkillDecisionTree(MageSpecial(), _target_sp_gt_40, 2)
+    priority_3 = SkillDecisionTree(MageAttack(), _caster_sp_gt_20, 3)
+    priority_4 = SkillDecisionTree(RogueSpecial(), _target_hp_lt_30, 4)
+    priority_5 = SkillDecisionTree(MageAttack(), _caster_hp_gt_50, 5)
+    priority_6 = SkillDecisionTree(RogueAttack(), _no_condition, 6)
+    priority_7 = SkillDecisionTree(RogueSpecial(), _no_condition, 7)
+    priority_8 = SkillDecisionTree(RogueAttack(), _no_condition, 8)
 
     priority_4.children.append(priority_6)
     priority_3.children.append(priority_4)
@@ -197,6 +574,21 @@ def create_default_tree() -> SkillDecisionTree:
     return priority_5
 
 
+@lru_cache(maxsize=None)
+def get_default_tree() -> SkillDecisionTree:
+    """
+    Return the tree from create_default_tree that is shared by every Sorcerer
+    that has not been given another tree. It is only built once, and must
+    not be changed.
+
+    >>> get_default_tree() is get_default_tree()
+    True
+    >>> get_default_tree()
+    SDT(5, MageAttack)
+    """
+    return create_default_tree()
+
+
 if __name__ == '__main__':
     import python_ta
     python_ta.check_all(config='a2_pyta.txt')
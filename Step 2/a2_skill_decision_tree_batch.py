@@ -0,0 +1,156 @@
+"""
+Picking skills with a SkillDecisionTree for many casters and targets at once,
+using NumPy, for A2's balance analysis.
+
+pick_skill_batch takes arrays of the caster's and target's HP and SP, and
+checks each condition of the tree once, on the whole arrays, as a mask.
+Then it goes through the tree's nodes in order of priority (as a
+CompiledSkillDecisionTree does) and gives every point that is still
+undecided and satisfies the node that node's skill.
+
+Run this file to print how often the default tree picks each skill over a
+grid of HPs and SPs:
+
+    python a2_skill_decision_tree_batch.py --step 1
+"""
+from typing import Callable, List, Tuple
+import argparse
+import time
+import numpy as np
+from a2_skill_decision_tree import SkillDecisionTree, get_default_tree, \
+    _Stats
+
+
+def get_tree_skills(tree: SkillDecisionTree) -> List['Skill']:
+    """
+    Return the different Skill objects in tree, in the order that
+    get_satisfied_sdt visits their nodes. The indices returned by
+    pick_skill_batch are indices into this list.
+
+    >>> [skill.__class__.__name__ for skill in
+    ...  get_tree_skills(get_default_tree())]
+    ['MageAttack', 'MageAttack', 'RogueSpecial', 'RogueAttack', \
+'MageSpecial', 'RogueAttack', 'RogueAttack', 'RogueSpecial']
+    """
+    skills = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if not any(skill is node.value for skill in skills):
+            skills.append(node.value)
+        stack.extend(reversed(node.children))
+    return skills
+
+
+def _get_mask(condition: Callable[['Character', 'Character'], bool],
+              caster: _Stats, target: _Stats,
+              shape: Tuple[int, ...]) -> np.ndarray:
+    """
+    Return a boolean array of shape with the result of condition for each
+    point of caster and target, whose HPs and SPs are arrays.
+
+    Conditions that compare the stats they get work on arrays as they are.
+    Others (such as ones using 'and' or 'if') are called on each point.
+    """
+    try:
+        result = condition(caster, target)
+    except (TypeError, ValueError):
+        def condition_at(caster_hp, caster_sp, target_hp, target_sp):
+            """
+            Return the result of condition at one point.
+            """
+            return condition(_Stats(caster_hp, caster_sp),
+                             _Stats(target_hp, target_sp))
+        result = np.frompyfunc(condition_at, 4, 1)(
+            caster.get_hp(), caster.get_sp(), target.get_hp(),
+            target.get_sp())
+    return np.broadcast_to(np.asarray(result, dtype=bool), shape)
+
+
+def pick_skill_batch(tree: SkillDecisionTree, caster_hp: np.ndarray,
+                     caster_sp: np.ndarray, target_hp: np.ndarray,
+                     target_sp: np.ndarray) -> np.ndarray:
+    """
+    Return an array of the indices (in get_tree_skills(tree)) of the skills
+    tree picks, for the casters and targets with these HPs and SPs.
+
+    The arrays are broadcast together, so giving each one its own axis
+    covers the whole grid of their values. Every condition tree can check
+    must be declared with pure_condition, or ValueError is raised.
+
+    >>> tree = get_default_tree()
+    >>> names = [skill.__class__.__name__ for skill in get_tree_skills(tree)]
+    >>> picks = pick_skill_batch(tree, np.array([100, 100, 40]), 40,
+    ...                          np.array([50, 20, 50]),
+    ...                          np.array([30, 50, 30]))
+    >>> [names[pick] for pick in picks]
+    ['MageSpecial', 'RogueAttack', 'MageAttack']
+    >>> hp = np.arange(101)
+    >>> pick_skill_batch(tree, hp[:, None], hp[None, :], 100, 100).shape
+    (101, 101)
+    """
+    compiled = tree.compile()
+    if compiled.pick_skill_by_stats is None:
+        raise ValueError('the conditions of tree must be declared pure')
+
+    caster_hp, caster_sp, target_hp, target_sp = np.broadcast_arrays(
+        caster_hp, caster_sp, target_hp, target_sp)
+    shape = caster_hp.shape
+    caster = _Stats(caster_hp, caster_sp)
+    target = _Stats(target_hp, target_sp)
+
+    skill_indices = {id(skill): i
+                     for i, skill in enumerate(get_tree_skills(tree))}
+    masks = {}
+    picks = np.full(shape, -1, dtype=np.intp)
+    undecided = np.ones(shape, dtype=bool)
+    for index, (skill, above, leaf) in enumerate(compiled._nodes):
+        for checked in above + (() if leaf else (index,)):
+            if checked not in masks:
+                masks[checked] = _get_mask(compiled._conditions[checked],
+                                           caster, target, shape)
+        satisfied = undecided.copy()
+        for index_above in above:
+            satisfied &= masks[index_above]
+        if not leaf:
+            satisfied &= ~masks[index]
+        picks[satisfied] = skill_indices[id(skill)]
+        undecided &= ~satisfied
+        if not undecided.any():
+            break
+    return picks
+
+
+def main() -> None:
+    """
+    Print how often the default tree picks each skill over the grid of
+    HPs and SPs from 0 to 100, and how long it took.
+    """
+    parser = argparse.ArgumentParser(
+        description='Count the skills the default SkillDecisionTree picks.')
+    parser.add_argument('--step', type=int, default=1,
+                        help='the distance between the HPs and SPs tried')
+    args = parser.parse_args()
+
+    tree = get_default_tree()
+    values = np.arange(0, 101, args.step)
+    start = time.perf_counter()
+    picks = pick_skill_batch(tree, values[:, None, None, None],
+                             values[None, :, None, None],
+                             values[None, None, :, None],
+                             values[None, None, None, :])
+    elapsed = time.perf_counter() - start
+
+    counts = np.bincount(picks.ravel())
+    print("{} points in {:.3f}s".format(picks.size, elapsed))
+    totals = {}
+    for skill, count in zip(get_tree_skills(tree), counts):
+        name = skill.__class__.__name__
+        totals[name] = totals.get(name, 0) + count
+    for name, count in sorted(totals.items()):
+        print("{:>14} {:>10} {:>6.1%}".format(name, count,
+                                             count / picks.size))
+
+
+if __name__ == '__main__':
+    main()
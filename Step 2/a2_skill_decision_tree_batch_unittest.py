@@ -0,0 +1,103 @@
+"""
+Unittests for picking skills in batches with NumPy in A2.
+
+pick_skill_batch must pick the same skill at every point as pick_skill does.
+These tests are skipped if NumPy is not installed.
+"""
+import unittest
+
+from a2_skill_decision_tree import SkillDecisionTree, get_default_tree, \
+    pure_condition, _Stats
+from a2_skills import MageAttack, MageSpecial, RogueAttack
+
+try:
+    import numpy as np
+    from a2_skill_decision_tree_batch import pick_skill_batch, \
+        get_tree_skills
+except ImportError:
+    np = None
+
+# Some HPs and SPs, including those either side of the default tree's
+# thresholds.
+AMOUNTS = [0, 20, 21, 29, 30, 40, 41, 50, 51, 90, 91, 100, 150]
+
+
+@pure_condition('caster_hp', 'target_hp')
+def both_hp_gt_50(caster, target):
+    """
+    Return True if the caster's and target's HP are both greater than 50.
+    """
+    return caster.get_hp() > 50 and target.get_hp() > 50
+
+
+@pure_condition('caster_sp')
+def caster_sp_gt_30(caster, _):
+    """
+    Return True if the caster's SP is greater than 30.
+    """
+    return caster.get_sp() > 30
+
+
+@unittest.skipIf(np is None, 'NumPy is not installed')
+class PickSkillBatchUnitTests(unittest.TestCase):
+    def assert_same_picks(self, tree):
+        """
+        Assert that pick_skill_batch picks the same skills as tree over the
+        grid of AMOUNTS.
+        """
+        amounts = np.array(AMOUNTS)
+        picks = pick_skill_batch(tree, amounts[:, None, None, None],
+                                 amounts[None, :, None, None],
+                                 amounts[None, None, :, None],
+                                 amounts[None, None, None, :])
+        self.assertEqual(picks.shape, (len(AMOUNTS),) * 4)
+
+        skills = get_tree_skills(tree)
+        for index in np.ndindex(picks.shape):
+            caster_hp, caster_sp, target_hp, target_sp = \
+                [AMOUNTS[i] for i in index]
+            self.assertIs(skills[picks[index]],
+                          tree.pick_skill(_Stats(caster_hp, caster_sp),
+                                          _Stats(target_hp, target_sp)))
+
+    def test_default_tree(self):
+        """
+        Test that the default tree picks the same skills in a batch.
+        """
+        self.assert_same_picks(get_default_tree())
+
+    def test_conditions_of_several_stats(self):
+        """
+        Test that conditions that cannot be checked on whole arrays are
+        checked at each point instead.
+        """
+        tree = SkillDecisionTree(MageAttack(), both_hp_gt_50, 2, [
+            SkillDecisionTree(RogueAttack(), caster_sp_gt_30, 1, [
+                SkillDecisionTree(MageSpecial(), caster_sp_gt_30, 3)])])
+        self.assert_same_picks(tree)
+
+    def test_one_dimensional(self):
+        """
+        Test that a batch of single points picks the same skills.
+        """
+        tree = get_default_tree()
+        picks = pick_skill_batch(tree, np.array([100, 80]), np.array([40, 40]),
+                                 np.array([50, 20]), np.array([30, 50]))
+        names = [get_tree_skills(tree)[pick].__class__.__name__
+                 for pick in picks]
+        self.assertEqual(names, ['MageSpecial', 'RogueAttack'])
+
+    def test_impure_tree(self):
+        """
+        Test that a tree with conditions that are not declared pure is
+        refused.
+        """
+        tree = SkillDecisionTree(MageAttack(), lambda c, _: c.get_hp() > 50,
+                                 2, [SkillDecisionTree(RogueAttack(),
+                                                       caster_sp_gt_30, 1)])
+        with self.assertRaises(ValueError):
+            pick_skill_batch(tree, np.arange(3), 0, 0, 0)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -9,7 +9,11 @@ to PythonTA and that you include all documentation for it.
 class Skill:
     """
     An abstract superclass for all Skills.
+
+    Skills have no state besides their cost and damage, so one Skill of each
+    class is shared by every Character that uses it.
     """
+    __slots__ = ['_cost', '_damage']
     
     def __init__(self, cost: int, damage: int) -> None:
         """
@@ -25,6 +29,12 @@ class Skill:
         """
         return self._cost
     
+    def get_damage(self) -> int:
+        """
+        Return the damage this Skill deals before the target's defense.
+        """
+        return self._damage
+    
     def use(self, caster: 'Character', target: 'Character') -> None:
         """
         Makes caster use this Skill on target.
@@ -43,6 +53,7 @@ class NormalAttack(Skill):
     A class representing a NormalAttack.
     Not to be instantiated.
     """
+    __slots__ = []
     
     def use(self, caster: 'Character', target: 'Character') -> None:
         """
@@ -55,6 +66,7 @@ class MageAttack(NormalAttack):
     """
     A class representing a Mage's Attack.
     """
+    __slots__ = []
     
     def __init__(self) -> None:
         """
@@ -70,6 +82,7 @@ class MageSpecial(Skill):
     """
     A class representing a Mage's Special Attack.
     """
+    __slots__ = []
     
     def __init__(self) -> None:
         """
@@ -107,6 +120,7 @@ class RogueAttack(NormalAttack):
     """
     A class representing a Rogue's Attack.
     """
+    __slots__ = []
     
     def __init__(self) -> None:
         """
@@ -123,6 +137,7 @@ class RogueSpecial(Skill):
     """
     A class representing a Rogue's Special Attack.
     """
+    __slots__ = []
     
     def __init__(self) -> None:
         """
@@ -161,6 +176,7 @@ class VampireAttack(NormalAttack):
     """
     A class representing a Vampire's Attack.
     """
+    __slots__ = []
 
     def __init__(self) -> None:
         """
@@ -201,6 +217,7 @@ class VampireSpecial(Skill):
     """
     A class representing a Vampire's Special Attack.
     """
+    __slots__ = []
 
     def __init__(self) -> None:
         """
@@ -244,6 +261,7 @@ class SorcererAttack(NormalAttack):
     """
     A class representing a Sorcerer's Attack.
     """
+    __slots__ = []
 
     def __init__(self) -> None:
         """
@@ -271,7 +289,8 @@ class SorcererAttack(NormalAttack):
         >>> v.get_hp()
         83
         """
-        picked = caster.get_skill_decision_tree().pick_skill(caster, target)
+        picked = caster.get_skill_decision_tree().compile().pick_skill(
+            caster, target)
         picked.use(caster, target)
         caster.set_sp(caster.get_sp() + picked.get_sp_cost() - 15)
 
@@ -281,6 +300,7 @@ class SorcererSpecial(Skill):
     """
     A class representing a Sorcerer's Special Attack.
     """
+    __slots__ = []
 
     def __init__(self) -> None:
         """
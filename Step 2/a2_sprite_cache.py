@@ -0,0 +1,159 @@
+"""
+A cache of the images, font and text that a2_ui draws.
+
+a2_ui redraws the whole game every frame. A SpriteCache loads every sprite
+once (along with a copy flipped to face left, for p2), makes the font once,
+and keeps each line of text it has rendered, so that drawing a frame only
+takes blitting surfaces that already exist.
+
+If the sprites have been packed into an atlas by a2_build_atlas, only the
+atlas image is decoded, and it is flipped as a whole; each sprite (and its
+flipped copy) is then made by blitting its part of the atlas onto a clear
+surface of the sprite's size.
+"""
+from typing import Dict, Hashable, Tuple, Union
+import os
+import pygame
+from a2_build_atlas import ATLAS_IMAGE, ATLAS_INDEX, FRAME_NAME, \
+    get_sprite_names, read_index
+
+# The most rendered lines of text a SpriteCache keeps. Labels change with
+# HP and SP, so there are only a few hundred in a game.
+MAX_LABELS = 1024
+
+
+class SpriteCache:
+    """
+    The surfaces a2_ui draws, loaded or rendered once each.
+
+    directory - the folder that the sprites are loaded from.
+    font_size - the size of the font that labels are rendered in.
+    colour - the colour that labels are rendered in.
+    """
+    directory: str
+    font_size: int
+    colour: Tuple[int, int, int]
+    _sprites: Dict[Hashable, pygame.Surface]
+    _flipped: Dict[Hashable, pygame.Surface]
+    _font: pygame.font.Font
+    _labels: Dict[str, pygame.Surface]
+
+    def __init__(self, directory: str = 'sprites', font_size: int = 18,
+                 colour: Tuple[int, int, int] = (0, 0, 0)) -> None:
+        """
+        Initialize this SpriteCache, loading every sprite in directory, from
+        its atlas if it has one.
+
+        If the display has been set up, the sprites are converted to its
+        pixel format, which makes blitting them much faster.
+        """
+        self.directory = directory
+        self.font_size = font_size
+        self.colour = colour
+        self._sprites = {}
+        self._flipped = {}
+        self._labels = {}
+
+        if os.path.exists(os.path.join(directory, ATLAS_INDEX)):
+            self._load_atlas()
+
+        # Sprites added since the atlas was built are loaded on their own
+        for name in get_sprite_names(directory):
+            if name not in self._sprites:
+                self._add_sprite(name, pygame.image.load(
+                    os.path.join(directory, name + '.png')))
+
+        if not pygame.font.get_init():
+            pygame.font.init()
+        self._font = pygame.font.SysFont(pygame.font.get_default_font(),
+                                         font_size)
+
+    def _load_atlas(self) -> None:
+        """
+        Keep every sprite in this SpriteCache's atlas, taken from the atlas
+        image and from a flipped copy of it.
+        """
+        atlas = pygame.image.load(os.path.join(self.directory, ATLAS_IMAGE))
+        if pygame.display.get_surface() is not None:
+            atlas = atlas.convert_alpha()
+        flipped_atlas = pygame.transform.flip(atlas, True, False)
+
+        for key, placement in read_index(self.directory).items():
+            x, y, width, height, left, top, sprite_width, sprite_height = \
+                placement
+            sprite = pygame.Surface((sprite_width, sprite_height),
+                                    pygame.SRCALPHA, atlas)
+            sprite.blit(atlas, (left, top), (x, y, width, height))
+            flipped = pygame.Surface((sprite_width, sprite_height),
+                                     pygame.SRCALPHA, atlas)
+            flipped.blit(flipped_atlas,
+                         (sprite_width - left - width, top),
+                         (atlas.get_width() - x - width, y, width, height))
+            self._keep(_get_name(key), sprite, flipped)
+
+    def _add_sprite(self, name: str, surface: pygame.Surface) -> None:
+        """
+        Keep surface as the sprite called name, along with a flipped copy.
+        """
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        self._keep(name, surface, pygame.transform.flip(surface, True, False))
+
+    def _keep(self, name: str, surface: pygame.Surface,
+              flipped: pygame.Surface) -> None:
+        """
+        Keep surface and flipped as the sprite called name, under its name
+        and (for a character's sprite) its (character_type, state, frame).
+        """
+        self._sprites[name] = surface
+        self._flipped[name] = flipped
+        match = FRAME_NAME.match(name)
+        if match is not None:
+            key = (match.group(1), match.group(2), int(match.group(3)))
+            self._sprites[key] = surface
+            self._flipped[key] = flipped
+
+    def get_sprite(self, key: Union[str, tuple],
+                   flipped: bool = False) -> pygame.Surface:
+        """
+        Return the sprite called key (such as 'mage_idle_0' or
+        'background'), or for the character_type, state and frame in key
+        (such as ('mage', 'idle', 0)), flipped to face left if flipped.
+
+        Raise KeyError if there is no such sprite.
+        """
+        if flipped:
+            return self._flipped[key]
+        return self._sprites[key]
+
+    def get_label(self, text: str) -> pygame.Surface:
+        """
+        Return a surface with text rendered on it, rendering it the first
+        time it is asked for.
+        """
+        label = self._labels.get(text)
+        if label is None:
+            if len(self._labels) >= MAX_LABELS:
+                self._labels.clear()
+            label = self._font.render(text, True, self.colour)
+            self._labels[text] = label
+        return label
+
+
+def _get_name(key: Union[str, tuple]) -> str:
+    """
+    Return the name of the sprite for key from an atlas index.
+
+    >>> _get_name(('mage', 'idle', 0))
+    'mage_idle_0'
+    >>> _get_name('background')
+    'background'
+    """
+    if isinstance(key, tuple):
+        return '{}_{}_{}'.format(*key)
+    return key
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
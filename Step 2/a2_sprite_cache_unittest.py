@@ -0,0 +1,182 @@
+"""
+Unittests for the SpriteCache used by a2_ui.
+
+A SpriteCache must load every sprite once, and give back the same surfaces
+(and the same rendered labels) every time they are asked for. Sprites taken
+from the atlas built by a2_build_atlas must be the same as the PNGs they were
+packed from. These tests are skipped if pygame is not installed.
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+try:
+    import pygame
+    import a2_sprite_cache
+    from a2_sprite_cache import SpriteCache
+    from a2_build_atlas import build_atlas, get_sprite_names, pack, \
+        ATLAS_IMAGE, ATLAS_INDEX
+except ImportError:
+    pygame = None
+
+
+@unittest.skipIf(pygame is None, 'pygame is not installed')
+class SpriteCacheUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a display and a SpriteCache of the game's sprites.
+        """
+        pygame.init()
+        pygame.display.set_mode((240, 200))
+        self.cache = SpriteCache('sprites', 18)
+
+    def tearDown(self):
+        """
+        Shut down pygame.
+        """
+        pygame.quit()
+
+    def test_loads_every_sprite(self):
+        """
+        Test that every sprite, and the background, is loaded up front.
+        """
+        with mock.patch.object(pygame.image, 'load') as load:
+            for name in get_sprite_names('sprites'):
+                self.assertIsInstance(self.cache.get_sprite(name),
+                                      pygame.Surface)
+                self.assertIsInstance(self.cache.get_sprite(name, True),
+                                      pygame.Surface)
+            self.assertFalse(load.called)
+        with self.assertRaises(KeyError):
+            self.cache.get_sprite('wizard_idle_0')
+
+    def test_flipped_sprites(self):
+        """
+        Test that flipped sprites are mirror images that are only made once.
+        """
+        sprite = self.cache.get_sprite('mage_idle_0')
+        flipped = self.cache.get_sprite('mage_idle_0', flipped=True)
+        self.assertIs(self.cache.get_sprite('mage_idle_0', flipped=True),
+                      flipped)
+        self.assertEqual(flipped.get_size(), sprite.get_size())
+        width = sprite.get_width()
+        for x in range(0, width, 7):
+            for y in range(0, sprite.get_height(), 7):
+                self.assertEqual(flipped.get_at((width - 1 - x, y)),
+                                 sprite.get_at((x, y)))
+
+    def test_labels_are_cached(self):
+        """
+        Test that each line of text is only rendered once.
+        """
+        label = self.cache.get_label('HP: 100')
+        self.assertIs(self.cache.get_label('HP: 100'), label)
+        self.assertIsNot(self.cache.get_label('HP: 99'), label)
+
+    def test_labels_are_bounded(self):
+        """
+        Test that the cache of labels does not grow past MAX_LABELS.
+        """
+        with mock.patch.object(a2_sprite_cache, 'MAX_LABELS', 3):
+            for hp in range(10):
+                self.cache.get_label('HP: {}'.format(hp))
+                self.assertLessEqual(len(self.cache._labels), 3)
+
+
+@unittest.skipIf(pygame is None, 'pygame is not installed')
+class SpriteAtlasUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Set up a display, and a directory with a copy of the sprites but no
+        atlas.
+        """
+        pygame.init()
+        pygame.display.set_mode((240, 200))
+        self.directory = tempfile.mkdtemp()
+        for name in get_sprite_names('sprites'):
+            shutil.copy(os.path.join('sprites', name + '.png'),
+                        self.directory)
+
+    def tearDown(self):
+        """
+        Remove the copy of the sprites, and shut down pygame.
+        """
+        shutil.rmtree(self.directory)
+        pygame.quit()
+
+    def assert_same_sprites(self, cache, expected, names):
+        """
+        Assert that cache and expected have the same sprites called names,
+        both ways around. The colour of fully transparent pixels does not
+        matter.
+        """
+        for name in names:
+            for flipped in [False, True]:
+                sprite = cache.get_sprite(name, flipped)
+                expected_sprite = expected.get_sprite(name, flipped)
+                self.assertEqual(
+                    pygame.image.tobytes(sprite.premul_alpha(), 'RGBA'),
+                    pygame.image.tobytes(expected_sprite.premul_alpha(),
+                                         'RGBA'), name)
+
+    def test_atlas_matches_sprites(self):
+        """
+        Test that the sprites from the atlas in sprites/ are the same as
+        the PNGs, whether they are looked up by name or by
+        (character_type, state, frame).
+        """
+        cache = SpriteCache('sprites')
+        expected = SpriteCache(self.directory)
+        names = get_sprite_names('sprites')
+        self.assert_same_sprites(cache, expected, names)
+        self.assertIs(cache.get_sprite(('rogue', 'attack', 3), True),
+                      cache.get_sprite('rogue_attack_3', True))
+
+    def test_atlas_loads_one_image(self):
+        """
+        Test that a SpriteCache with an atlas only decodes the atlas.
+        """
+        load = pygame.image.load
+        with mock.patch.object(pygame.image, 'load',
+                               side_effect=load) as counted:
+            SpriteCache('sprites')
+        self.assertEqual(counted.call_count, 1)
+
+    def test_new_sprites_are_loaded(self):
+        """
+        Test that sprites added after the atlas was built are still loaded.
+        """
+        atlas, index = build_atlas(self.directory)
+        del index['frames']['mage']['idle'][9]
+        pygame.image.save(atlas, os.path.join(self.directory, ATLAS_IMAGE))
+        with open(os.path.join(self.directory, ATLAS_INDEX), 'w') as file:
+            json.dump(index, file)
+
+        cache = SpriteCache(self.directory)
+        os.remove(os.path.join(self.directory, ATLAS_INDEX))
+        expected = SpriteCache(self.directory)
+        self.assert_same_sprites(cache, expected,
+                                 ['mage_idle_8', 'mage_idle_9',
+                                  ('mage', 'idle', 9), 'background'])
+
+    def test_pack_does_not_overlap(self):
+        """
+        Test that packed rects fit in the image and do not overlap.
+        """
+        sizes = [(120, 120)] * 20 + [(240, 200), (30, 10), (500, 5)]
+        positions, size = pack(sizes, 400)
+        rects = [pygame.Rect(position, rect_size)
+                 for position, rect_size in zip(positions, sizes)]
+        image = pygame.Rect((0, 0), size)
+        for i, rect in enumerate(rects):
+            self.assertTrue(image.contains(rect))
+            self.assertEqual(rect.collidelistall(rects), [i])
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,120 @@
+"""
+Unittests for the incremental state hashes of A2's BattleQueues.
+
+With verify_hash on, every call to get_state_hash checks the hash it has kept
+against one worked out from scratch, so playing and undoing random games
+checks that the hash is kept up to date.
+"""
+import random
+import unittest
+
+from a2_game import CHARACTER_CLASSES
+from a2_alpha_beta_benchmark import set_up_matchup
+from a2_battle_queue import BattleQueue, RestrictedBattleQueue, \
+    PersistentBattleQueue, PersistentRestrictedBattleQueue
+
+BATTLE_QUEUE_CLASSES = [BattleQueue, RestrictedBattleQueue,
+                        PersistentBattleQueue,
+                        PersistentRestrictedBattleQueue]
+
+
+
+class StateHashUnitTests(unittest.TestCase):
+    def test_random_games(self):
+        """
+        Test that the kept hash is right after every move and every undo,
+        whether or not it was being kept when the move was made.
+        """
+        rng = random.Random(0)
+        for battle_queue_class in BATTLE_QUEUE_CLASSES:
+            for p1_key in CHARACTER_CLASSES:
+                for p2_key in CHARACTER_CLASSES:
+                    bq = set_up_matchup(p1_key, p2_key, 100,
+                                        battle_queue_class)
+                    bq.verify_hash = True
+                    hashes = [bq.get_state_hash()]
+                    while not bq.is_over():
+                        bq.make_move(rng.choice(
+                            bq.peek().get_available_actions()))
+                        # is_over removes characters who cannot act from
+                        # the front, so the state is recorded after it.
+                        bq.is_over()
+                        if rng.random() < 0.7:
+                            hashes.append(bq.get_state_hash())
+                        else:
+                            hashes.append(bq.compute_state_hash())
+                    while len(hashes) > 1:
+                        hashes.pop()
+                        bq.unmake_move()
+                        self.assertEqual(bq.get_state_hash(), hashes[-1])
+
+    def test_matches_state_key(self):
+        """
+        Test that positions have the same hash exactly when they have the
+        same state key.
+        """
+        rng = random.Random(1)
+        hashes = {}
+        for _ in range(300):
+            bq = set_up_matchup(rng.choice('mv'), rng.choice('rs'), 100,
+                                rng.choice(BATTLE_QUEUE_CLASSES))
+            bq.verify_hash = True
+            for _ in range(rng.randint(0, 6)):
+                if bq.is_over():
+                    break
+                bq.make_move(rng.choice(bq.peek().get_available_actions()))
+            hashes.setdefault(bq.get_state_hash(), set()).add(
+                bq.get_state_key())
+        for keys in hashes.values():
+            self.assertEqual(len(keys), 1)
+
+    def test_copies_and_set_content(self):
+        """
+        Test that copies and queues given the same contents have the same
+        hash as the original when they have the same state key.
+        """
+        for battle_queue_class in BATTLE_QUEUE_CLASSES:
+            bq = set_up_matchup('v', 's',
+                                battle_queue_class=battle_queue_class)
+            bq.verify_hash = True
+            bq.make_move('S')
+            bq.make_move('A')
+            # RestrictedBattleQueue.copy adds the characters again, which
+            # can change the restriction flags, so it is compared by key.
+            copy = bq.copy()
+            self.assertEqual(copy.get_state_hash() == bq.get_state_hash(),
+                             copy.get_state_key() == bq.get_state_key())
+
+            other = set_up_matchup('v', 's',
+                                   battle_queue_class=battle_queue_class)
+            other.verify_hash = True
+            p1, p2 = other.peek(), other.peek().enemy
+            state = bq.get_state_key()
+            p1.set_hp(state[1][2])
+            p1.set_sp(state[1][3])
+            p2.set_hp(state[2][2])
+            p2.set_sp(state[2][3])
+            if battle_queue_class in [BattleQueue, PersistentBattleQueue]:
+                other.set_content(p1, p2, list(state[3]))
+            else:
+                other.set_content(p1, p2, list(state[3]), list(state[4]),
+                                  state[5])
+            self.assertEqual(other.get_state_key(), state)
+            self.assertEqual(other.get_state_hash(), bq.get_state_hash())
+
+    def test_verify_finds_a_wrong_hash(self):
+        """
+        Test that verify_hash notices a kept hash that is wrong.
+        """
+        bq = set_up_matchup('m', 'r')
+        bq.verify_hash = True
+        bq.get_state_hash()
+        bq._queue_hash ^= 1
+        self.assertRaises(AssertionError, bq.get_state_hash)
+
+        bq.verify_hash = False
+        bq.get_state_hash()
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
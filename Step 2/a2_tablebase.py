@@ -0,0 +1,478 @@
+"""
+Endgame tablebases for A2: the score of every state reachable from the start
+of a game, for every matchup.
+
+A tablebase is solved by retrograde analysis. Every state reachable from the
+start is found first. States that are over are scored, and then each state
+is scored as soon as all of its successors have been, working back to the
+start. Since every move costs SP, no state can be reached from itself, so
+every state gets scored.
+
+Run this file to solve and save the tablebase of every matchup and both
+kinds of BattleQueue:
+
+    python a2_tablebase.py --hp 100 --directory tablebases
+
+Each tablebase is saved as a flat file of fixed-width parts, so that it can
+be read through mmap without loading it:
+
+    header: magic (4s), version, p1_kind, p2_kind, restricted (B each),
+            hp, sp (H each), number of states, number of queue codes,
+            number of slot bits (I each)
+    queue codes: queue code, flags code (I each), seen (B) for each
+                 different queue in the tablebase
+    slots: key (Q), score (h), 2 ** slot bits of them
+
+A state's key packs its HP, SP and the index of its queue in the queue
+codes (see get_key), and its slot is computed from its key (see
+get_slot). If that slot holds another state, the state is in the next
+slot, and so on. Empty slots have the key EMPTY. Queues and restriction
+flags are coded by encode_bits, and a score of NO_SCORE stands for None.
+"""
+from typing import BinaryIO, Dict, Iterator, Tuple
+import argparse
+import mmap
+import os
+import struct
+import time
+from a2_battle_state import BattleState, CHARACTER_KINDS, successors, \
+    is_over, score, acts_again, combine_scores
+
+MAGIC = b'A2TB'
+VERSION = 2
+HEADER = struct.Struct('<4sBBBBHHIII')
+QUEUE_CODE = struct.Struct('<IIB')
+SLOT = struct.Struct('<Qh')
+
+# Stands for a score of None in a saved tablebase.
+NO_SCORE = -32768
+
+# The key of an empty slot in a saved tablebase.
+EMPTY = (1 << 64) - 1
+
+# Returned by MappedTablebase.get for a state that is not in it. (A stored
+# score may itself be None.)
+_MISSING = object()
+
+# Multiplier for get_slot (2 ** 64 divided by the golden ratio).
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+# Where tablebases are saved and looked for by default.
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 'tablebases')
+
+
+def encode_bits(bits: Tuple[int, ...]) -> int:
+    """
+    Return a code for bits, a tuple of 0s and 1s, such as the queue or flags
+    of a BattleState. The code is the bits in order after a leading 1, so
+    that tuples of different lengths get different codes.
+
+    >>> encode_bits((0, 1, 1))
+    11
+    >>> encode_bits(())
+    1
+    """
+    code = 1
+    for bit in bits:
+        code = code << 1 | bit
+    return code
+
+
+def decode_bits(code: int) -> Tuple[int, ...]:
+    """
+    Return the tuple of bits that encode_bits coded as code.
+
+    >>> decode_bits(11)
+    (0, 1, 1)
+    >>> decode_bits(encode_bits((1, 0, 0, 1)))
+    (1, 0, 0, 1)
+    """
+    bits = []
+    while code > 1:
+        bits.append(code & 1)
+        code >>= 1
+    return tuple(reversed(bits))
+
+
+def get_key(state: BattleState, queue_index: int) -> int:
+    """
+    Return the key of state in a saved tablebase, where queue_index is the
+    index of state's queue in the tablebase's queue codes.
+
+    >>> hex(get_key(BattleState(0, 100, 80, 1, 40, 100, (0, 1)), 3))
+    '0x64500028640003'
+    """
+    return (state.p1_hp << 48 | state.p1_sp << 40 | state.p2_hp << 24 |
+            state.p2_sp << 16 | queue_index)
+
+
+def get_slot(key: int, slot_bits: int) -> int:
+    """
+    Return the first slot to look for key in, in a saved tablebase with
+    2 ** slot_bits slots.
+
+    >>> 0 <= get_slot(12345, 4) < 16
+    True
+    """
+    return (key * _HASH_MULTIPLIER & EMPTY) >> (64 - slot_bits)
+
+
+def get_start_state(p1_kind: int, p2_kind: int, restricted: bool,
+                    hp: int = 100, sp: int = 100) -> BattleState:
+    """
+    Return the state at the start of a game between characters of p1_kind
+    and p2_kind with hp HP and sp SP, where p1 was added first.
+
+    >>> get_start_state(0, 1, True)
+    BattleState(p1_kind=0, p1_hp=100, p1_sp=100, p2_kind=1, p2_hp=100, \
+p2_sp=100, queue=(0, 1), flags=(1, 1), seen=3)
+    """
+    if restricted:
+        return BattleState(p1_kind, hp, sp, p2_kind, hp, sp, (0, 1), (1, 1),
+                           3)
+    return BattleState(p1_kind, hp, sp, p2_kind, hp, sp, (0, 1))
+
+
+class Tablebase:
+    """
+    The solved scores of every state reachable from the start of a game
+    for one matchup and kind of BattleQueue.
+
+    p1_kind, p2_kind - the kinds of the characters (see CHARACTER_KINDS).
+    restricted - whether the BattleQueue is a RestrictedBattleQueue.
+    hp, sp - the HP and SP both characters start with.
+    """
+    p1_kind: int
+    p2_kind: int
+    restricted: bool
+    hp: int
+    sp: int
+    _scores: Dict[BattleState, int]
+
+    def __init__(self, p1_kind: int, p2_kind: int, restricted: bool,
+                 hp: int, sp: int, scores: Dict[BattleState, int]) -> None:
+        """
+        Initialize this Tablebase with the solved scores for the matchup.
+        """
+        self.p1_kind = p1_kind
+        self.p2_kind = p2_kind
+        self.restricted = restricted
+        self.hp = hp
+        self.sp = sp
+        self._scores = scores
+
+    def get(self, state: BattleState, default: object = None) -> int:
+        """
+        Return the score of state, or default if state is not in this
+        Tablebase.
+
+        >>> tb = generate_tablebase(0, 1, False, 20)
+        >>> tb.get(get_start_state(0, 1, False, 20))
+        20
+        >>> tb.get(get_start_state(0, 1, False, 30), 'missing')
+        'missing'
+        """
+        return self._scores.get(state, default)
+
+    def __contains__(self, state: BattleState) -> bool:
+        """
+        Return whether state is in this Tablebase.
+        """
+        return state in self._scores
+
+    def __len__(self) -> int:
+        """
+        Return the number of states in this Tablebase.
+        """
+        return len(self._scores)
+
+    def __iter__(self) -> Iterator[BattleState]:
+        """
+        Return an iterator over the states in this Tablebase.
+        """
+        return iter(self._scores)
+
+    def __repr__(self) -> str:
+        """
+        Return a representation of this Tablebase.
+
+        >>> generate_tablebase(0, 1, True, 20)
+        Tablebase(Mage vs Rogue, restricted, 20 HP, 100 SP: 9 states)
+        """
+        return 'Tablebase({} vs {}, {}, {} HP, {} SP: {} states)'.format(
+            CHARACTER_KINDS[self.p1_kind].__name__,
+            CHARACTER_KINDS[self.p2_kind].__name__,
+            'restricted' if self.restricted else 'normal', self.hp, self.sp,
+            len(self))
+
+    def save(self, path: str) -> None:
+        """
+        Save this Tablebase to the file at path.
+
+        Raise ValueError if a state cannot be saved (its HP or SP is too
+        large, or its queue is too long).
+        """
+        queues = sorted({(state.queue, state.flags, state.seen)
+                         for state in self})
+        queue_index = {queue: i for i, queue in enumerate(queues)}
+        slot_bits = max(len(self) * 2 - 1, 1).bit_length()
+        slots = [(EMPTY, 0)] * (1 << slot_bits)
+
+        for state in self:
+            if state.p1_hp >= 1 << 16 or state.p2_hp >= 1 << 16 or \
+                    state.p1_sp >= 1 << 8 or state.p2_sp >= 1 << 8 or \
+                    len(state.queue) >= 32 or len(queues) >= 1 << 16:
+                raise ValueError('Cannot save {}'.format(state))
+            key = get_key(state, queue_index[(state.queue, state.flags,
+                                              state.seen)])
+            slot = get_slot(key, slot_bits)
+            while slots[slot][0] != EMPTY:
+                slot = (slot + 1) % len(slots)
+            state_score = self.get(state)
+            slots[slot] = key, NO_SCORE if state_score is None \
+                else state_score
+
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.p1_kind,
+                                   self.p2_kind, self.restricted, self.hp,
+                                   self.sp, len(self), len(queues),
+                                   slot_bits))
+            for queue, flags, seen in queues:
+                file.write(QUEUE_CODE.pack(
+                    encode_bits(queue),
+                    0 if flags is None else encode_bits(flags), seen))
+            for key, state_score in slots:
+                file.write(SLOT.pack(key, state_score))
+
+
+class MappedTablebase(Tablebase):
+    """
+    A Tablebase read from a saved file through mmap, so that only the parts
+    of the file that are looked up are read from disk.
+
+    Opening a MappedTablebase only reads its header and queue codes.
+    """
+    _file: BinaryIO
+    _map: mmap.mmap
+    _count: int
+    _slot_bits: int
+    _slots_offset: int
+    _queues: list
+    _queue_index: dict
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize this MappedTablebase from the file at path.
+
+        Raise ValueError if the file is not a tablebase.
+        """
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError('{} is not a tablebase'.format(path))
+
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError('{} is not a tablebase'.format(path))
+        magic, version, p1_kind, p2_kind, restricted, hp, sp, \
+            self._count, queue_count, self._slot_bits = \
+            HEADER.unpack_from(self._map)
+        self._slots_offset = HEADER.size + queue_count * QUEUE_CODE.size
+        if magic != MAGIC or version != VERSION or len(self._map) != \
+                self._slots_offset + (SLOT.size << self._slot_bits):
+            self.close()
+            raise ValueError('{} is not a tablebase'.format(path))
+
+        super().__init__(p1_kind, p2_kind, bool(restricted), hp, sp, {})
+        self._queues = []
+        for queue, flags, seen in QUEUE_CODE.iter_unpack(
+                self._map[HEADER.size:self._slots_offset]):
+            self._queues.append((decode_bits(queue),
+                                 decode_bits(flags) if restricted else None,
+                                 seen))
+        self._queue_index = {queue: i for i, queue in enumerate(self._queues)}
+
+    def get(self, state: BattleState, default: object = None) -> int:
+        """
+        Return the score of state, or default if state is not in this
+        MappedTablebase.
+        """
+        queue_index = self._queue_index.get((state.queue, state.flags,
+                                             state.seen))
+        if queue_index is None or state.p1_kind != self.p1_kind or \
+                state.p2_kind != self.p2_kind:
+            return default
+
+        key = get_key(state, queue_index)
+        slot = get_slot(key, self._slot_bits)
+        while True:
+            slot_key, state_score = SLOT.unpack_from(
+                self._map, self._slots_offset + slot * SLOT.size)
+            if slot_key == key:
+                return None if state_score == NO_SCORE else state_score
+            if slot_key == EMPTY:
+                return default
+            slot = (slot + 1) & ((1 << self._slot_bits) - 1)
+
+    def __contains__(self, state: BattleState) -> bool:
+        """
+        Return whether state is in this MappedTablebase.
+        """
+        return self.get(state, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        """
+        Return the number of states in this MappedTablebase.
+        """
+        return self._count
+
+    def __iter__(self) -> Iterator[BattleState]:
+        """
+        Return an iterator over the states in this MappedTablebase, which
+        reads the whole file.
+        """
+        for key, _ in SLOT.iter_unpack(self._map[self._slots_offset:]):
+            if key != EMPTY:
+                queue, flags, seen = self._queues[key & 0xFFFF]
+                yield BattleState(self.p1_kind, key >> 48, key >> 40 & 0xFF,
+                                  self.p2_kind, key >> 24 & 0xFFFF,
+                                  key >> 16 & 0xFF, queue, flags, seen)
+
+    def close(self) -> None:
+        """
+        Close the file of this MappedTablebase.
+        """
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+        self._file.close()
+
+
+def load_tablebase(path: str) -> MappedTablebase:
+    """
+    Return the Tablebase saved in the file at path, read through mmap.
+
+    Raise ValueError if the file is not a tablebase.
+    """
+    return MappedTablebase(path)
+
+
+def generate_tablebase(p1_kind: int, p2_kind: int, restricted: bool,
+                       hp: int = 100, sp: int = 100) -> Tablebase:
+    """
+    Return the solved Tablebase for a game between characters of p1_kind
+    and p2_kind that start with hp HP and sp SP.
+
+    >>> from a2_battle_state import get_battle_state_score
+    >>> tb = generate_tablebase(2, 3, False, 30)
+    >>> start = get_start_state(2, 3, False, 30)
+    >>> tb.get(start) == get_battle_state_score(start)
+    True
+    """
+    # Find every reachable state, and the states each one can be reached
+    # from.
+    start = get_start_state(p1_kind, p2_kind, restricted, hp, sp)
+    children = {start: []}
+    parents = {start: []}
+    to_visit = [start]
+    while to_visit:
+        state = to_visit.pop()
+        for _, child in successors(state):
+            children[state].append(child)
+            if child not in children:
+                children[child] = []
+                parents[child] = []
+                to_visit.append(child)
+            parents[child].append(state)
+
+    # Score the states that are over, then every state whose successors
+    # have all been scored.
+    scores = {}
+    unscored = {state: len(children[state]) for state in children}
+    ready = [state for state in children if is_over(state)]
+    while ready:
+        state = ready.pop()
+        if is_over(state):
+            scores[state] = score(state)
+        else:
+            scores[state] = combine_scores(acts_again(state),
+                                           [scores[child]
+                                            for child in children[state]])
+
+        for parent in parents[state]:
+            unscored[parent] -= 1
+            if unscored[parent] == 0:
+                ready.append(parent)
+
+    return Tablebase(p1_kind, p2_kind, restricted, hp, sp, scores)
+
+
+def get_tablebase_path(p1_kind: int, p2_kind: int, restricted: bool,
+                       directory: str = DEFAULT_DIRECTORY) -> str:
+    """
+    Return the path of the tablebase file for the matchup in directory.
+
+    >>> os.path.basename(get_tablebase_path(2, 3, True))
+    'vampire_sorcerer_restricted.a2tb'
+    """
+    return os.path.join(directory, '{}_{}_{}.a2tb'.format(
+        CHARACTER_KINDS[p1_kind].__name__.lower(),
+        CHARACTER_KINDS[p2_kind].__name__.lower(),
+        'restricted' if restricted else 'normal'))
+
+
+# The Tablebases loaded by find_tablebase, by path.
+_LOADED = {}
+
+
+def find_tablebase(state: BattleState,
+                   directory: str = DEFAULT_DIRECTORY) -> Tablebase:
+    """
+    Return the Tablebase in directory for the matchup and kind of
+    BattleQueue of state, or None if it has not been generated. Each
+    Tablebase is only loaded once.
+    """
+    path = get_tablebase_path(state.p1_kind, state.p2_kind,
+                              state.flags is not None, directory)
+    if path not in _LOADED:
+        if not os.path.exists(path):
+            return None
+        _LOADED[path] = load_tablebase(path)
+    return _LOADED[path]
+
+
+def main() -> None:
+    """
+    Generate and save the tablebase for every matchup and both kinds of
+    BattleQueue.
+    """
+    parser = argparse.ArgumentParser(
+        description='Solve every matchup and save the tablebases.')
+    parser.add_argument('--hp', type=int, default=100,
+                        help='the HP both characters start with')
+    parser.add_argument('--sp', type=int, default=100,
+                        help='the SP both characters start with')
+    parser.add_argument('--directory', default=DEFAULT_DIRECTORY,
+                        help='where to save the tablebases')
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    for restricted in [False, True]:
+        for p1_kind in range(len(CHARACTER_KINDS)):
+            for p2_kind in range(len(CHARACTER_KINDS)):
+                start = time.perf_counter()
+                tablebase = generate_tablebase(p1_kind, p2_kind, restricted,
+                                               args.hp, args.sp)
+                path = get_tablebase_path(p1_kind, p2_kind, restricted,
+                                          args.directory)
+                tablebase.save(path)
+                print('{} in {:.2f}s -> {} ({} bytes)'.format(
+                    tablebase, time.perf_counter() - start, path,
+                    os.path.getsize(path)))
+
+
+if __name__ == '__main__':
+    main()
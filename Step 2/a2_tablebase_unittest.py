@@ -0,0 +1,158 @@
+"""
+Unittests for the endgame tablebases and TablebasePlaystyle for A2.
+"""
+import os
+import tempfile
+import unittest
+
+from a2_game import CHARACTER_CLASSES, PLAYSTYLE_CLASSES
+from a2_playstyle import ManualPlaystyle
+from a2_battle_queue import BattleQueue, RestrictedBattleQueue
+from a2_battle_state import get_battle_state_score
+from a2_alpha_beta_benchmark import set_up_matchup
+from a2_skill_decision_tree import SkillDecisionTree
+from a2_skills import MageSpecial
+from a2_tablebase import generate_tablebase, load_tablebase, \
+    get_tablebase_path, get_start_state, MappedTablebase
+Tablebase = PLAYSTYLE_CLASSES['tb']
+Minimax = PLAYSTYLE_CLASSES['mr']
+
+
+class TablebaseUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Make a directory to save tablebases in.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """
+        Delete the directory made in setUp.
+        """
+        self.directory.cleanup()
+
+    def test_scores_match_search(self):
+        """
+        Test that every state in a tablebase has the same score as
+        get_battle_state_score gives, for every matchup.
+        """
+        for restricted in [False, True]:
+            for p1_kind in range(4):
+                for p2_kind in range(4):
+                    tablebase = generate_tablebase(p1_kind, p2_kind,
+                                                   restricted, 40)
+                    self.assertIn(get_start_state(p1_kind, p2_kind,
+                                                  restricted, 40), tablebase)
+                    for state in tablebase:
+                        self.assertEqual(tablebase.get(state),
+                                         get_battle_state_score(state))
+
+    def test_save_and_load(self):
+        """
+        Test that a saved tablebase loads with the same scores.
+        """
+        for p1_kind, p2_kind, restricted, hp in [(1, 2, False, 60),
+                                                 (1, 2, True, 60),
+                                                 (1, 1, False, 100)]:
+            tablebase = generate_tablebase(p1_kind, p2_kind, restricted, hp)
+            path = get_tablebase_path(p1_kind, p2_kind, restricted,
+                                      self.directory.name)
+            tablebase.save(path)
+            loaded = load_tablebase(path)
+
+            self.assertIsInstance(loaded, MappedTablebase)
+            self.assertEqual(repr(loaded), repr(tablebase))
+            self.assertEqual(set(loaded), set(tablebase))
+            for state in tablebase:
+                self.assertEqual(loaded.get(state, 'missing'),
+                                 tablebase.get(state))
+            loaded.close()
+
+    def test_missing_states(self):
+        """
+        Test that states that are not in a loaded tablebase are not found.
+        """
+        path = get_tablebase_path(0, 1, False, self.directory.name)
+        generate_tablebase(0, 1, False, 50).save(path)
+        loaded = load_tablebase(path)
+
+        start = get_start_state(0, 1, False, 50)
+        self.assertIn(start, loaded)
+        for state in [get_start_state(0, 1, False, 60),
+                      get_start_state(1, 0, False, 50),
+                      get_start_state(0, 1, True, 50),
+                      start._replace(queue=(0, 1, 1, 0))]:
+            self.assertNotIn(state, loaded)
+            self.assertEqual(loaded.get(state, 'missing'), 'missing')
+        loaded.close()
+
+    def test_load_rejects_other_files(self):
+        """
+        Test that loading a file that is not a tablebase raises ValueError.
+        """
+        path = os.path.join(self.directory.name, 'other.a2tb')
+        with open(path, 'wb') as file:
+            file.write(b'not a tablebase at all')
+        self.assertRaises(ValueError, load_tablebase, path)
+
+        open(path, 'wb').close()
+        self.assertRaises(ValueError, load_tablebase, path)
+
+    def test_playstyle_same_moves_as_minimax(self):
+        """
+        Test that TablebasePlaystyle picks the same moves as the recursive
+        Minimax playstyle, with and without a tablebase.
+        """
+        for p1_key in CHARACTER_CLASSES:
+            for p2_key in CHARACTER_CLASSES:
+                for battle_queue_class in [BattleQueue,
+                                           RestrictedBattleQueue]:
+                    bq = battle_queue_class()
+                    p1 = CHARACTER_CLASSES[p1_key]("p1", bq,
+                                                   ManualPlaystyle(bq))
+                    p2 = CHARACTER_CLASSES[p2_key]("p2", bq,
+                                                   ManualPlaystyle(bq))
+                    p1.enemy = p2
+                    p2.enemy = p1
+                    p1.set_hp(40)
+                    p2.set_hp(40)
+                    bq.add(p1)
+                    bq.add(p2)
+                    restricted = battle_queue_class is RestrictedBattleQueue
+                    kinds = [list(CHARACTER_CLASSES).index(key)
+                             for key in [p1_key, p2_key]]
+
+                    expected = Minimax(bq).select_attack()
+                    self.assertEqual(Tablebase(
+                        bq, self.directory.name).select_attack(), expected)
+
+                    generate_tablebase(kinds[0], kinds[1], restricted,
+                                       40).save(get_tablebase_path(
+                                           kinds[0], kinds[1], restricted,
+                                           self.directory.name))
+                    self.assertEqual(Tablebase(
+                        bq, self.directory.name).select_attack(), expected)
+
+    def test_playstyle_with_other_tree(self):
+        """
+        Test that TablebasePlaystyle searches a game with a Sorcerer that
+        was given another tree, rather than reading a tablebase made for the
+        default tree.
+        """
+        kinds = [list(CHARACTER_CLASSES).index(key) for key in ['s', 'm']]
+        generate_tablebase(kinds[0], kinds[1], False, 30).save(
+            get_tablebase_path(kinds[0], kinds[1], False,
+                               self.directory.name))
+        bq = set_up_matchup('s', 'm', 30)
+        self.assertEqual(Tablebase(bq, self.directory.name).select_attack(),
+                         'S')
+
+        bq.peek().set_skill_decision_tree(
+            SkillDecisionTree(MageSpecial(), lambda _, __: True, 1))
+        self.assertEqual(Minimax(bq).select_attack(), 'A')
+        self.assertEqual(Tablebase(bq, self.directory.name).select_attack(),
+                         'A')
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,302 @@
+"""
+A tournament runner for A2: play seeded headless matches for every pairing
+of CHARACTER_CLASSES, PLAYSTYLE_CLASSES and BATTLE_QUEUE_CLASSES across a
+pool of worker processes, and print the matchup win-rate matrix.
+
+    python a2_tournament.py --games 100 --results results.a2r
+
+Results are appended to a columnar results file as the games finish, so a
+sweep that is stopped part of the way keeps the games it has played. Each
+block in the file is:
+
+    magic (4s), length of the header (I), the header as JSON, and then each
+    column's values in the order listed in the header
+
+The header gives the number of rows, the name and array typecode of each
+column, and the keys that the values of the p1, p2, ps1, ps2 and queue
+columns are indexes into.
+"""
+from typing import Dict, Iterator, List, Tuple
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from a2_game import CHARACTER_CLASSES, PLAYSTYLE_CLASSES, \
+    BATTLE_QUEUE_CLASSES
+from a2_match import simulate
+
+BLOCK_MAGIC = b'A2RB'
+BLOCK_HEADER = struct.Struct('<4sI')
+
+# The columns of a results file, and the array typecodes they are stored
+# with.
+COLUMNS = [('p1', 'B'), ('p2', 'B'), ('ps1', 'B'), ('ps2', 'B'),
+           ('queue', 'B'), ('seed', 'I'), ('winner', 'b'), ('turns', 'H'),
+           ('p1_hp', 'H'), ('p1_sp', 'H'), ('p2_hp', 'H'), ('p2_sp', 'H'),
+           ('invalid_moves', 'H')]
+
+# The playstyles played by default. Manual playstyles cannot play without
+# a player, and MinimaxTimed takes its whole time budget on most moves.
+DEFAULT_PLAYSTYLES = [key for key in PLAYSTYLE_CLASSES
+                      if key not in ['m', 'mt']]
+
+# The number of games each worker plays before sending its results back.
+DEFAULT_CHUNK_SIZE = 50
+
+
+def get_pairings(playstyles: List[str]) -> List[Tuple[str, str, str, str,
+                                                      str]]:
+    """
+    Return every (p1, p2, ps1, ps2, queue) pairing of the keys in
+    CHARACTER_CLASSES, playstyles and BATTLE_QUEUE_CLASSES.
+
+    >>> len(get_pairings(['r', 'ma']))
+    128
+    >>> get_pairings(['r'])[1]
+    ('m', 'm', 'r', 'r', 'r')
+    """
+    return [(p1, p2, ps1, ps2, queue)
+            for p1 in CHARACTER_CLASSES for p2 in CHARACTER_CLASSES
+            for ps1 in playstyles for ps2 in playstyles
+            for queue in BATTLE_QUEUE_CLASSES]
+
+
+def play_games(pairing: Tuple[str, str, str, str, str],
+               seeds: List[int]) -> Dict[str, list]:
+    """
+    Play a game for pairing with each seed in seeds, and return the results
+    as a dict of columns (with the keys of pairing, rather than indexes).
+
+    This runs in the worker processes.
+
+    >>> columns = play_games(('m', 'r', 'r', 'r', 'n'), [0, 1])
+    >>> columns['seed']
+    [0, 1]
+    >>> columns['p2']
+    ['r', 'r']
+    """
+    p1, p2, ps1, ps2, queue = pairing
+    columns = {name: [] for name, _ in COLUMNS}
+    for seed in seeds:
+        result = simulate(CHARACTER_CLASSES[p1], CHARACTER_CLASSES[p2],
+                          PLAYSTYLE_CLASSES[ps1], PLAYSTYLE_CLASSES[ps2],
+                          BATTLE_QUEUE_CLASSES[queue], seed)
+        p1_hp, p1_sp, p2_hp, p2_sp = result.trace[-1]
+        for name, value in [('p1', p1), ('p2', p2), ('ps1', ps1),
+                            ('ps2', ps2), ('queue', queue), ('seed', seed),
+                            ('winner', -1 if result.winner is None
+                             else result.winner),
+                            ('turns', result.turns), ('p1_hp', p1_hp),
+                            ('p1_sp', p1_sp), ('p2_hp', p2_hp),
+                            ('p2_sp', p2_sp),
+                            ('invalid_moves', result.invalid_moves)]:
+            columns[name].append(value)
+    return columns
+
+
+def get_labels() -> Dict[str, List[str]]:
+    """
+    Return the keys that the values of each key column are indexes into.
+    """
+    return {'p1': list(CHARACTER_CLASSES), 'p2': list(CHARACTER_CLASSES),
+            'ps1': list(PLAYSTYLE_CLASSES), 'ps2': list(PLAYSTYLE_CLASSES),
+            'queue': list(BATTLE_QUEUE_CLASSES)}
+
+
+def append_block(path: str, columns: Dict[str, list]) -> None:
+    """
+    Append columns, as returned by play_games, to the results file at path
+    as one block.
+    """
+    labels = get_labels()
+    rows = len(columns['seed'])
+    header = json.dumps({'rows': rows, 'columns': COLUMNS,
+                         'labels': labels}).encode('utf-8')
+
+    data = [BLOCK_HEADER.pack(BLOCK_MAGIC, len(header)), header]
+    for name, typecode in COLUMNS:
+        values = columns[name]
+        if name in labels:
+            values = [labels[name].index(value) for value in values]
+        data.append(array(typecode, values).tobytes())
+
+    with open(path, 'ab') as file:
+        file.write(b''.join(data))
+
+
+def read_blocks(path: str) -> Iterator[Dict[str, list]]:
+    """
+    Yield each block in the results file at path as a dict of columns, with
+    the key columns turned back into keys. A block that was only partly
+    written (for example, because the tournament was stopped) is skipped.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    offset = 0
+    while offset + BLOCK_HEADER.size <= len(data):
+        magic, header_size = BLOCK_HEADER.unpack_from(data, offset)
+        if magic != BLOCK_MAGIC:
+            raise ValueError('{} is not a results file'.format(path))
+        offset += BLOCK_HEADER.size
+        if offset + header_size > len(data):
+            return
+        header = json.loads(data[offset:offset + header_size])
+        offset += header_size
+
+        columns = {}
+        for name, typecode in header['columns']:
+            values = array(typecode)
+            size = values.itemsize * header['rows']
+            if offset + size > len(data):
+                return
+            values.frombytes(data[offset:offset + size])
+            offset += size
+            if name in header['labels']:
+                columns[name] = [header['labels'][name][value]
+                                 for value in values]
+            else:
+                columns[name] = values.tolist()
+        yield columns
+
+
+def read_results(path: str) -> Dict[str, list]:
+    """
+    Return every row in the results file at path as a dict of columns.
+    """
+    results = {}
+    for block in read_blocks(path):
+        for name, values in block.items():
+            results.setdefault(name, []).extend(values)
+    return results
+
+
+def get_win_rates(results: Dict[str, list]) -> Dict[Tuple[str, str],
+                                                      Tuple[int, int, int]]:
+    """
+    Return (p1 wins, p2 wins, ties) for each (p1, p2) matchup in results.
+
+    >>> get_win_rates({'p1': ['m', 'm', 'r'], 'p2': ['r', 'r', 'm'],
+    ...                'winner': [0, -1, 0]})
+    {('m', 'r'): (1, 0, 1), ('r', 'm'): (1, 0, 0)}
+    """
+    counts = {}
+    for p1, p2, winner in zip(results['p1'], results['p2'],
+                              results['winner']):
+        wins = counts.setdefault((p1, p2), [0, 0, 0])
+        wins[winner] += 1
+    return {matchup: tuple(wins) for matchup, wins in counts.items()}
+
+
+def format_matrix(win_rates: Dict[Tuple[str, str], Tuple[int, int, int]]) \
+        -> str:
+    """
+    Return a table of the percentage of games p1 (rows) won against p2
+    (columns).
+
+    >>> print(format_matrix({('m', 'r'): (3, 1, 0)}))
+    p1\\p2      m      r      v      s
+        m      -  75.0%      -      -
+        r      -      -      -      -
+        v      -      -      -      -
+        s      -      -      -      -
+    """
+    lines = ['p1\\p2' + ''.join('{:>7}'.format(key)
+                                for key in CHARACTER_CLASSES)]
+    for p1 in CHARACTER_CLASSES:
+        cells = []
+        for p2 in CHARACTER_CLASSES:
+            wins = win_rates.get((p1, p2))
+            if wins is None:
+                cells.append('{:>7}'.format('-'))
+            else:
+                cells.append('{:>6.1f}%'.format(100 * wins[0] / sum(wins)))
+        lines.append('{:>5}'.format(p1) + ''.join(cells))
+    return '\n'.join(lines)
+
+
+def run_tournament(path: str, games: int, playstyles: List[str],
+                   workers: int = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   progress: bool = True) -> int:
+    """
+    Play games seeded games (seeds 0 to games - 1) for every pairing of
+    playstyles, on workers processes, appending the results to path as they
+    finish. Report progress on stderr if progress. Return the number of
+    games played.
+    """
+    tasks = []
+    for pairing in get_pairings(playstyles):
+        for start in range(0, games, chunk_size):
+            tasks.append((pairing, list(range(start,
+                                              min(start + chunk_size,
+                                                  games)))))
+    total = sum(len(seeds) for _, seeds in tasks)
+
+    played = 0
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(play_games, pairing, seeds)
+                   for pairing, seeds in tasks]
+        for future in as_completed(futures):
+            columns = future.result()
+            append_block(path, columns)
+            played += len(columns['seed'])
+
+            if progress:
+                elapsed = time.perf_counter() - start_time
+                remaining = elapsed / played * (total - played)
+                sys.stderr.write('\r{}/{} games ({:.1f}%), {:.0f}s elapsed, '
+                                 '~{:.0f}s left'.format(
+                                     played, total, 100 * played / total,
+                                     elapsed, remaining))
+                sys.stderr.flush()
+
+    if progress:
+        sys.stderr.write('\n')
+    return played
+
+
+def main() -> None:
+    """
+    Run a tournament and print the win-rate matrix of the results file.
+    """
+    parser = argparse.ArgumentParser(
+        description='Play every matchup and print the win rates.')
+    parser.add_argument('--games', type=int, default=100,
+                        help='the number of seeded games per pairing')
+    parser.add_argument('--playstyles', default=','.join(DEFAULT_PLAYSTYLES),
+                        help='comma-separated keys of the playstyles to '
+                             'play (default: %(default)s)')
+    parser.add_argument('--results', default='results.a2r',
+                        help='the results file to append to')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='the number of worker processes (default: one '
+                             'per CPU)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='the number of games per task')
+    args = parser.parse_args()
+
+    playstyles = [key.strip() for key in args.playstyles.split(',')]
+    for key in playstyles:
+        if key not in PLAYSTYLE_CLASSES or PLAYSTYLE_CLASSES[key](
+                None).is_manual:
+            parser.error('{} is not a playstyle that can play by '
+                         'itself'.format(key))
+
+    start = time.perf_counter()
+    played = run_tournament(args.results, args.games, playstyles,
+                            args.workers, args.chunk_size)
+    print('Played {} games in {:.1f}s'.format(played,
+                                              time.perf_counter() - start))
+
+    if os.path.exists(args.results):
+        print(format_matrix(get_win_rates(read_results(args.results))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Unittests for the tournament runner and results files in A2.
+"""
+import os
+import tempfile
+import unittest
+
+from a2_tournament import run_tournament, read_results, append_block, \
+    play_games, get_pairings, get_win_rates
+
+
+class TournamentUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Make a directory for results files.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'results.a2r')
+
+    def tearDown(self):
+        """
+        Delete the directory made in setUp.
+        """
+        self.directory.cleanup()
+
+    def get_rows(self, results):
+        """
+        Return the rows of results, sorted.
+        """
+        return sorted(zip(*[results[name] for name in sorted(results)]))
+
+    def test_every_pairing_is_played(self):
+        """
+        Test that a tournament plays every seed for every pairing, and that
+        the rows do not depend on how the games were split between workers.
+        """
+        played = run_tournament(self.path, 3, ['r'], 2, 2, False)
+        results = read_results(self.path)
+
+        self.assertEqual(played, len(get_pairings(['r'])) * 3)
+        self.assertEqual(len(results['seed']), played)
+        self.assertEqual(set(zip(results['p1'], results['p2'],
+                                 results['ps1'], results['ps2'],
+                                 results['queue'])),
+                         set(get_pairings(['r'])))
+
+        other_path = os.path.join(self.directory.name, 'other.a2r')
+        run_tournament(other_path, 3, ['r'], 1, 3, False)
+        self.assertEqual(self.get_rows(read_results(other_path)),
+                         self.get_rows(results))
+
+    def test_append_only(self):
+        """
+        Test that blocks are appended to a results file, and that a block
+        that was only partly written is skipped.
+        """
+        first = play_games(('v', 's', 'r', 'ma', 'r'), [0, 1, 2])
+        second = play_games(('s', 'v', 'mr', 'r', 'n'), [5])
+        append_block(self.path, first)
+        append_block(self.path, second)
+        self.assertEqual(read_results(self.path), {
+            name: first[name] + second[name] for name in first})
+
+        with open(self.path, 'ab') as file:
+            file.write(b'A2RB\x10\x00')
+        self.assertEqual(len(read_results(self.path)['seed']), 4)
+
+    def test_win_rates(self):
+        """
+        Test that the win rates count every game once.
+        """
+        run_tournament(self.path, 4, ['r'], 1, 4, False)
+        win_rates = get_win_rates(read_results(self.path))
+        self.assertEqual(len(win_rates), 16)
+        for wins in win_rates.values():
+            self.assertEqual(sum(wins), 4 * 2)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -0,0 +1,158 @@
+"""
+The TranspositionTable class for A2.
+
+A TranspositionTable remembers the scores of battle states that have already
+been searched, so that get_state_score does not explore the same position
+twice when different move orders lead to it.
+
+States are keyed by BattleQueue.get_state_key(), which is a canonical hashable
+encoding of a BattleQueue (both characters' type, name, HP and SP, the order
+of the queue and, for a RestrictedBattleQueue, its restriction flags).
+"""
+from typing import Any, Hashable
+from collections import OrderedDict
+
+DEFAULT_MAX_SIZE = 200000
+
+
+class TranspositionTable:
+    """
+    A bounded table mapping battle state keys to scores. When the table is
+    full, the least recently used entry is evicted.
+
+    max_size - the maximum number of entries this table holds.
+    hits - the number of lookups that found an entry.
+    misses - the number of lookups that did not find an entry.
+    """
+    max_size: int
+    hits: int
+    misses: int
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        """
+        Initialize this TranspositionTable so that it holds at most max_size
+        entries.
+
+        >>> table = TranspositionTable(10)
+        >>> len(table)
+        0
+        >>> table.max_size
+        10
+        """
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the score stored for key, or default if there is none.
+
+        A successful lookup marks key as the most recently used entry.
+
+        >>> table = TranspositionTable()
+        >>> table.get((1, 2)) is None
+        True
+        >>> table.put((1, 2), 40)
+        >>> table.get((1, 2))
+        40
+        >>> table.hits, table.misses
+        (1, 1)
+        """
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store value as the score for key, evicting the least recently used
+        entry if this table is full.
+
+        >>> table = TranspositionTable(2)
+        >>> table.put('a', 1)
+        >>> table.put('b', 2)
+        >>> table.get('a')
+        1
+        >>> table.put('c', 3)
+        >>> 'b' in table
+        False
+        >>> 'a' in table and 'c' in table
+        True
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Remove every entry from this table and reset its counters.
+
+        >>> table = TranspositionTable()
+        >>> table.put('a', 1)
+        >>> table.get('a')
+        1
+        >>> table.clear()
+        >>> len(table), table.hits, table.misses
+        (0, 0, 0)
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self) -> float:
+        """
+        Return the fraction of lookups that found an entry.
+
+        >>> table = TranspositionTable()
+        >>> table.hit_rate()
+        0.0
+        >>> table.put('a', 1)
+        >>> _ = table.get('a')
+        >>> _ = table.get('b')
+        >>> table.hit_rate()
+        0.5
+        """
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+
+        return self.hits / lookups
+
+    def __contains__(self, key: Hashable) -> bool:
+        """
+        Return whether key has an entry in this table. This does not count as
+        a lookup.
+        """
+        return key in self._entries
+
+    def __len__(self) -> int:
+        """
+        Return the number of entries in this table.
+        """
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        """
+        Return a representation of this TranspositionTable.
+
+        >>> TranspositionTable(5)
+        TranspositionTable(0/5, hits: 0, misses: 0)
+        """
+        return "TranspositionTable({}/{}, hits: {}, misses: {})".format(
+            len(self._entries), self.max_size, self.hits, self.misses)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')
@@ -0,0 +1,184 @@
+"""
+Unittests for the TranspositionTable used by the Minimax playstyles in A2.
+"""
+import pickle
+import unittest
+
+from a2_game import CHARACTER_CLASSES, PLAYSTYLE_CLASSES
+from a2_playstyle import get_state_score, get_state_score_iterative, \
+    ManualPlaystyle
+from a2_battle_queue import BattleQueue, RestrictedBattleQueue
+from a2_transposition_table import TranspositionTable
+from a2_alpha_beta_benchmark import set_up_matchup
+from a2_skill_decision_tree import SkillDecisionTree
+from a2_skills import MageSpecial
+MageConstructor = CHARACTER_CLASSES['m']
+RogueConstructor = CHARACTER_CLASSES['r']
+
+
+class TranspositionTableUnitTests(unittest.TestCase):
+    def setUp(self):
+        """
+        Sets up a Battle Queue containing a Rogue and a Mage for all of the
+        unittests.
+        """
+        self.battle_queue = BattleQueue()
+        playstyle = ManualPlaystyle(self.battle_queue)
+
+        self.p1 = RogueConstructor("R", self.battle_queue, playstyle)
+        self.p2 = MageConstructor("M", self.battle_queue, playstyle)
+
+        self.p1.enemy = self.p2
+        self.p2.enemy = self.p1
+
+        self.battle_queue.add(self.p1)
+        self.battle_queue.add(self.p2)
+
+        self.p1.set_hp(30)
+        self.p2.set_hp(30)
+
+    def tearDown(self):
+        """
+        Delete the attributes that were created in setUp.
+        """
+        del self.battle_queue
+        del self.p1
+        del self.p2
+
+    def test_lru_eviction(self):
+        """
+        Test that the least recently used entry is evicted when the table is
+        full.
+        """
+        table = TranspositionTable(2)
+        table.put('a', 1)
+        table.put('b', 2)
+        table.get('a')
+        table.put('c', 3)
+
+        self.assertEqual(len(table), 2)
+        self.assertTrue('a' in table)
+        self.assertFalse('b' in table)
+        self.assertTrue('c' in table)
+
+    def test_stored_none_is_a_hit(self):
+        """
+        Test that a stored score of None can be told apart from a miss.
+        """
+        table = TranspositionTable()
+        missing = object()
+        table.put('a', None)
+
+        self.assertIsNone(table.get('a', missing))
+        self.assertIs(table.get('b', missing), missing)
+        self.assertEqual((table.hits, table.misses), (1, 1))
+
+    def test_invalid_size(self):
+        """
+        Test that a table must be able to hold at least one entry.
+        """
+        self.assertRaises(ValueError, TranspositionTable, 0)
+
+    def test_copy_has_same_key(self):
+        """
+        Test that a copy of a BattleQueue has the same state key, and that
+        changing the copy changes its key.
+        """
+        copy = self.battle_queue.copy()
+        self.assertEqual(copy.get_state_key(),
+                         self.battle_queue.get_state_key())
+
+        copy.peek().attack()
+        self.assertNotEqual(copy.get_state_key(),
+                            self.battle_queue.get_state_key())
+
+    def test_restricted_key_includes_flags(self):
+        """
+        Test that the state key of a RestrictedBattleQueue records which
+        characters are able to add.
+        """
+        keys = []
+        for battle_queue_class in [BattleQueue, RestrictedBattleQueue]:
+            bq = battle_queue_class()
+            r = RogueConstructor("R", bq, ManualPlaystyle(bq))
+            m = MageConstructor("M", bq, ManualPlaystyle(bq))
+            r.enemy = m
+            m.enemy = r
+            bq.add(r)
+            bq.add(m)
+            # r is at the front, so the Mage it adds cannot add
+            bq.add(m)
+            keys.append(bq.get_state_key())
+
+        self.assertEqual(keys[0][1:4], keys[1][1:4])
+        self.assertEqual(keys[1][4], ('Y', 'Y', 'N'))
+        self.assertNotEqual(keys[0], keys[1])
+
+    def test_sorcerer_trees_are_kept_apart(self):
+        """
+        Test that a shared table does not give a Sorcerer with its own tree
+        the scores of a Sorcerer with the default tree, and that a pickled
+        Sorcerer with the default tree still shares its states.
+        """
+        table = TranspositionTable()
+        default_bq = set_up_matchup('s', 'r', 40)
+        custom_bq = set_up_matchup('s', 'r', 40)
+        custom_bq.peek().set_skill_decision_tree(
+            SkillDecisionTree(MageSpecial(), lambda _, __: True, 1))
+        self.assertNotEqual(custom_bq.get_state_key(),
+                            default_bq.get_state_key())
+        self.assertNotEqual(custom_bq.get_state_hash(),
+                            default_bq.get_state_hash())
+
+        expected = get_state_score(custom_bq, None)
+        self.assertNotEqual(get_state_score(default_bq, None), expected)
+        get_state_score(default_bq, table)
+        self.assertEqual(get_state_score(custom_bq, table), expected)
+
+        unpickled = pickle.loads(pickle.dumps(default_bq))
+        self.assertEqual(unpickled.get_state_key(),
+                         default_bq.get_state_key())
+
+    def test_scores_match_without_table(self):
+        """
+        Test that searching with a table gives the same score as searching
+        without one, and that a second search is answered from the table.
+        """
+        table = TranspositionTable()
+        expected = get_state_score(self.battle_queue, None)
+
+        self.assertEqual(get_state_score(self.battle_queue, table), expected)
+        self.assertGreater(len(table), 0)
+
+        misses = table.misses
+        self.assertEqual(get_state_score(self.battle_queue, table), expected)
+        self.assertEqual(table.misses, misses)
+        self.assertEqual(get_state_score_iterative(self.battle_queue, table),
+                         expected)
+
+    def test_iterative_scores_match_without_table(self):
+        """
+        Test that the iterative search gives the same score with and without
+        a table.
+        """
+        table = TranspositionTable()
+        expected = get_state_score_iterative(self.battle_queue, None)
+
+        self.assertEqual(get_state_score_iterative(self.battle_queue, table),
+                         expected)
+        self.assertGreater(len(table), 0)
+
+    def test_minimax_uses_its_table(self):
+        """
+        Test that the Minimax playstyles store their searches in their
+        transposition_table.
+        """
+        for key in ['mr', 'mi']:
+            minimax = PLAYSTYLE_CLASSES[key](self.battle_queue)
+            minimax.transposition_table = TranspositionTable()
+            minimax.select_attack()
+            self.assertGreater(len(minimax.transposition_table), 0)
+
+
+if __name__ == '__main__':
+    unittest.main(exit=False)
@@ -11,11 +11,18 @@ all of your client code.
 import a2_game
 import pygame
 import sys
+from a2_sprite_cache import SpriteCache
+from a2_move_worker import MoveWorker
+from a2_dirty_renderer import DirtyRenderer
+from a2_playstyle import ManualPlaystyle
 
 GAME_SPEED = 100
 pygame.init()
 
 PYGAME_SCREEN = None
+SPRITE_CACHE = None
+RENDERER = None
+MOVE_WORKER = MoveWorker()
 CHARACTER_SIZE = 120
 NUMBER_OF_CHARACTERS = 2
 PADDING = 40
@@ -23,12 +30,14 @@ P1_POSITION = CHARACTER_SIZE // 4
 P2_POSITION = CHARACTER_SIZE - (CHARACTER_SIZE // 4)
 RANDOM_TIMER = 10
 FONT_SIZE = 18
+THINKING_DOT_MS = 250
 
 def start_game():
     """
     Start and initialize the game
     """
-    global PYGAME_SCREEN, CHARACTER_SIZE, NUMBER_OF_CHARACTERS, FONT_SIZE
+    global PYGAME_SCREEN, CHARACTER_SIZE, NUMBER_OF_CHARACTERS, FONT_SIZE, \
+        SPRITE_CACHE, RENDERER
     a2_game.set_up_game()
     
     # Set up the width and height of the screen (proportional to the character
@@ -41,6 +50,25 @@ def start_game():
     # set the screen to draw on
     PYGAME_SCREEN = pygame.display.set_mode(pixel_size)
 
+    # Load every sprite and make the font once, now that the display exists
+    SPRITE_CACHE = SpriteCache('sprites', FONT_SIZE)
+    # Only redraw the parts of the screen that change between frames
+    RENDERER = DirtyRenderer(PYGAME_SCREEN, (255, 255, 255))
+
+def perform_chosen_attack(move):
+    """
+    Perform move for the next character, the same way that
+    a2_game.perform_attack would if the character's playstyle picked it.
+    """
+    character = a2_game.BATTLE_QUEUE.peek()
+    playstyle = character.playstyle
+    character.playstyle = ManualPlaystyle(a2_game.BATTLE_QUEUE)
+    a2_game.LAST_KEY_PRESSED = move
+    try:
+        a2_game.perform_attack()
+    finally:
+        character.playstyle = playstyle
+
 def update_game():
     """
     Update the game's UI.
@@ -63,43 +91,35 @@ def update_game():
     
     p2_label = "{}\nHP: {}\nSP: {}".format(p2_name, p2_hp, p2_sp).split("\n")
     
-    font_type = pygame.font.get_default_font()
-    font = pygame.font.SysFont(font_type, FONT_SIZE)
-    
-    p1_icon = pygame.image.load('sprites/' + p1_sprite + '.png')
-    p2_icon = pygame.image.load('sprites/' + p2_sprite + '.png')
+    p1_icon = SPRITE_CACHE.get_sprite(p1_sprite)
+    # Flip p2 so they face p1
+    p2_icon = SPRITE_CACHE.get_sprite(p2_sprite, flipped=True)
 
-    PYGAME_SCREEN.fill((255, 255, 255)) # (255, 255, 255)=(r,g,b)=white
-    bg = pygame.image.load('sprites/background.png')
-    rect = pygame.Rect(0, 0, NUMBER_OF_CHARACTERS * CHARACTER_SIZE,
-                       CHARACTER_SIZE + PADDING * 2)
-    PYGAME_SCREEN.blit(bg, rect)
+    # Collect what to draw, from the back to the front, as (surface,
+    # position) layers. The renderer compares them with the last frame's.
+    layers = []
+    bg = SPRITE_CACHE.get_sprite('background')
+    layers.append((bg, (0, 0)))
     
     # Draw the first character
-    (x, y) = P1_POSITION, PADDING
-    rect = pygame.Rect(x, y, CHARACTER_SIZE, CHARACTER_SIZE)
-    PYGAME_SCREEN.blit(p1_icon, rect)
+    layers.append((p1_icon, (P1_POSITION, PADDING)))
     
     y_coordinate = 0
     for line in p1_label:
-        text = font.render(line, True, (0, 0, 0))
-        PYGAME_SCREEN.blit(text, (P1_POSITION + PADDING, y_coordinate))
+        text = SPRITE_CACHE.get_label(line)
+        layers.append((text, (P1_POSITION + PADDING, y_coordinate)))
         y_coordinate += FONT_SIZE
     
     # Draw the HP bar
     # Draw the SP bar
     
     # Draw the second character
-    # Flip p2 so they face p1
-    p2_icon = pygame.transform.flip(p2_icon, True, False)
-    (x, y) = P2_POSITION, PADDING
-    rect = pygame.Rect(x, y, CHARACTER_SIZE, CHARACTER_SIZE)
-    PYGAME_SCREEN.blit(p2_icon, rect)
+    layers.append((p2_icon, (P2_POSITION, PADDING)))
 
     y_coordinate = 0
     for line in p2_label:
-        text = font.render(line, True, (0, 0, 0))
-        PYGAME_SCREEN.blit(text, (P2_POSITION + PADDING, y_coordinate))
+        text = SPRITE_CACHE.get_label(line)
+        layers.append((text, (P2_POSITION + PADDING, y_coordinate)))
         y_coordinate += FONT_SIZE    
     
     # Update the current player and available actions
@@ -108,11 +128,15 @@ def update_game():
         current_player = draw_parameters['current_player']
         action_label = ["Current Character: {}".format(current_player),
                         "Available Actions: {}".format(", ".join(actions))]
+        if MOVE_WORKER.is_thinking():
+            # Show that the AI is picking a move, with dots that keep moving
+            dots = pygame.time.get_ticks() // THINKING_DOT_MS % 4
+            action_label[1] = "Thinking" + "." * dots
     
         y_coordinate = CHARACTER_SIZE + PADDING
         for line in action_label:
-            text = font.render(line, True, (0, 0, 0))
-            PYGAME_SCREEN.blit(text, (P1_POSITION + PADDING // 2, y_coordinate))
+            text = SPRITE_CACHE.get_label(line)
+            layers.append((text, (P1_POSITION + PADDING // 2, y_coordinate)))
             y_coordinate += FONT_SIZE
     else:
         game_label = ["Game over!"]
@@ -124,11 +148,13 @@ def update_game():
         
         y_coordinate = CHARACTER_SIZE + PADDING
         for line in game_label:
-            text = font.render(line, True, (0, 0, 0))
-            PYGAME_SCREEN.blit(text, (P1_POSITION + PADDING // 2, y_coordinate))
+            text = SPRITE_CACHE.get_label(line)
+            layers.append((text, (P1_POSITION + PADDING // 2, y_coordinate)))
             y_coordinate += FONT_SIZE 
     
-    pygame.display.flip()
+    dirty = RENDERER.render(layers)
+    if dirty:
+        pygame.display.update(dirty)
 
 if __name__ == '__main__':
     start_game()
@@ -139,8 +165,13 @@ if __name__ == '__main__':
     
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                # Don't wait for a move that is still being picked
+                MOVE_WORKER.cancel()
                 pygame.quit()
                 sys.exit(0)
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                # Whatever was covering the window has to be drawn over
+                RENDERER.invalidate()
             if event.type == pygame.KEYDOWN and not a2_game.GAME_IS_OVER:
                 # If the current player is using a manual playstyle, the
                 # pick a move when a key is pressed
@@ -156,11 +187,16 @@ if __name__ == '__main__':
                     a2_game.perform_attack()
                 
         # If the current player isn't using a manual playstyle, pick a move
+        # on the move worker's thread, so the game keeps drawing meanwhile,
+        # and perform it once it's ready
         if (not a2_game.GAME_IS_OVER and
             not a2_game.BATTLE_QUEUE.is_over() and 
-            not a2_game.BATTLE_QUEUE.peek().playstyle.is_manual and
-            RANDOM_TIMER == 10):
-            a2_game.perform_attack()
+            not a2_game.BATTLE_QUEUE.peek().playstyle.is_manual):
+            move = MOVE_WORKER.get_move(a2_game.BATTLE_QUEUE)
+            if move is not None:
+                perform_chosen_attack(move)
+            elif not MOVE_WORKER.is_thinking() and RANDOM_TIMER == 10:
+                MOVE_WORKER.submit(a2_game.BATTLE_QUEUE)
     
         # Redraw the game
         update_game()
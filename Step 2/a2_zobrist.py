@@ -0,0 +1,127 @@
+"""
+Zobrist hashing for A2's BattleQueues.
+
+Each feature of a battle state (which class of BattleQueue it is, who the
+players are, and each player's HP and SP) has a random 64-bit key, and the
+hash of a state is the XOR of the keys of its features. Changing a feature
+only takes XORing its old key out and its new key in.
+
+The order of a queue is hashed as a polynomial over the codes of its
+entries, sum(code * BASE ** i), modulo 2 ** 64. Adding or removing an entry
+at either end only changes one term (and, at the front, multiplies the rest
+by BASE or its inverse), so it takes constant time too.
+
+The keys come from blake2b rather than hash(), so they are the same in every
+process.
+"""
+from typing import Hashable, Sequence
+from functools import lru_cache
+from hashlib import blake2b
+
+MASK = (1 << 64) - 1
+
+# Any odd number has an inverse modulo 2 ** 64.
+BASE = 0x100000001b3
+BASE_INVERSE = pow(BASE, -1, 1 << 64)
+
+# BASE ** i modulo 2 ** 64, for the lengths that queues usually have.
+_POWERS = [pow(BASE, i, 1 << 64) for i in range(64)]
+
+
+@lru_cache(maxsize=None)
+def get_zobrist_key(*feature: Hashable) -> int:
+    """
+    Return the 64-bit key of feature, which is a tuple of ints and strs.
+
+    >>> get_zobrist_key('hp', 0, 100) == get_zobrist_key('hp', 0, 100)
+    True
+    >>> get_zobrist_key('hp', 0, 100) == get_zobrist_key('hp', 1, 100)
+    False
+    >>> 0 <= get_zobrist_key('sp', 0, 5) <= MASK
+    True
+    """
+    digest = blake2b(repr(feature).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def get_code(*feature: Hashable) -> int:
+    """
+    Return the code of an entry in a queue, which is an odd key so that no
+    entry adds nothing to the queue's hash.
+    """
+    return get_zobrist_key(*feature) | 1
+
+
+def push_back(queue_hash: int, length: int, code: int) -> int:
+    """
+    Return the hash of a queue of length entries hashed to queue_hash, after
+    adding an entry with code to its back.
+
+    >>> push_back(push_back(0, 0, 3), 1, 5) == get_queue_hash([3, 5])
+    True
+    >>> codes = list(range(1, 200, 2))
+    >>> push_back(get_queue_hash(codes), 100, 7) == get_queue_hash(codes + [7])
+    True
+    """
+    if length < len(_POWERS):
+        return (queue_hash + code * _POWERS[length]) & MASK
+    return (queue_hash + code * pow(BASE, length, 1 << 64)) & MASK
+
+
+def pop_front(queue_hash: int, code: int) -> int:
+    """
+    Return the hash of the queue hashed to queue_hash, after removing the
+    entry with code from its front.
+
+    >>> pop_front(get_queue_hash([3, 5]), 3) == get_queue_hash([5])
+    True
+    """
+    return ((queue_hash - code) * BASE_INVERSE) & MASK
+
+
+def push_front(queue_hash: int, code: int) -> int:
+    """
+    Return the hash of the queue hashed to queue_hash, after adding an entry
+    with code to its front.
+
+    >>> push_front(get_queue_hash([5]), 3) == get_queue_hash([3, 5])
+    True
+    """
+    return (queue_hash * BASE + code) & MASK
+
+
+def pop_back(queue_hash: int, length: int, code: int) -> int:
+    """
+    Return the hash of a queue of length entries hashed to queue_hash, after
+    removing the entry with code from its back.
+
+    >>> pop_back(get_queue_hash([3, 5]), 2, 5) == get_queue_hash([3])
+    True
+    >>> codes = list(range(1, 200, 2))
+    >>> pop_back(get_queue_hash(codes), 100, 199) == get_queue_hash(codes[:-1])
+    True
+    """
+    if length <= len(_POWERS):
+        return (queue_hash - code * _POWERS[length - 1]) & MASK
+    return (queue_hash - code * pow(BASE, length - 1, 1 << 64)) & MASK
+
+
+def get_queue_hash(codes: Sequence[int]) -> int:
+    """
+    Return the hash of a queue whose entries have codes, from front to back,
+    working it out from scratch.
+
+    >>> get_queue_hash([])
+    0
+    >>> get_queue_hash([3, 5]) == get_queue_hash([5, 3])
+    False
+    """
+    queue_hash = 0
+    for code in reversed(codes):
+        queue_hash = push_front(queue_hash, code)
+    return queue_hash
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config='a2_pyta.txt')